@@ -0,0 +1,369 @@
+"""Load benchmark for the pattern endpoints.
+
+Boots main:app in-process, drives each endpoint through the ASGI interface
+against the local FakeLlm backend and writes a JSON report with throughput,
+time to first byte, latency percentiles, event-loop lag and peak RSS.
+
+Example:
+    python benchmark.py --requests 50 --concurrency 10 --output bench.json
+
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import resource
+import sys
+import time
+from collections.abc import Awaitable, Callable, MutableMapping
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlencode
+
+# Agents read GEMINI_MODEL at import time, so select the local backend first.
+# The RAG embeddings client also requires a key to be configured on import.
+os.environ.setdefault("GEMINI_MODEL", "fake")
+os.environ.setdefault("GOOGLE_API_KEY", "unused-by-benchmark")
+
+from main import app, load_patterns
+from patterns.rag import db, embeddings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Interval of the event-loop lag probe in seconds
+LAG_PROBE_INTERVAL = 0.01
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    """An endpoint to benchmark and how to build a request for it."""
+
+    name: str
+    method: str
+    path: str
+    prompt_field: str
+    json_body: bool = False
+
+
+ENDPOINTS = [
+    Endpoint("stream_voting", "GET", "/stream_voting", "prompt"),
+    Endpoint("stream_orchestrator", "GET", "/stream_orchestrator", "prompt"),
+    Endpoint("stream_reflection", "GET", "/stream_reflection", "prompt"),
+    Endpoint("sequential_run", "POST", "/sequential/run", "input_text", json_body=True),
+    Endpoint("rag_query", "POST", "/rag/query", "query", json_body=True),
+    Endpoint("hitl_run", "POST", "/hitl/run", "prompt", json_body=True),
+    Endpoint("demo_tool_use", "GET", "/demo/tool_use", "prompt"),
+    Endpoint("demo_reflection", "GET", "/demo/reflection", "prompt"),
+    Endpoint("demo_sequential", "GET", "/demo/sequential", "prompt"),
+    Endpoint("demo_rag", "GET", "/demo/rag", "prompt"),
+    Endpoint("demo_human_in_the_loop", "GET", "/demo/human_in_the_loop", "prompt"),
+    Endpoint("demo_voting", "GET", "/demo/voting", "prompt"),
+    Endpoint("demo_orchestrator", "GET", "/demo/orchestrator", "prompt"),
+]
+
+
+@dataclass
+class RequestResult:
+    """Timings of a single request, in seconds from its start."""
+
+    status: int = 0
+    ttfb: float | None = None
+    latency: float = 0.0
+    body_bytes: int = 0
+    error: str | None = None
+
+
+@dataclass
+class EndpointRun:
+    """Raw measurements collected while benchmarking one endpoint."""
+
+    results: list[RequestResult] = field(default_factory=list)
+    loop_lag: list[float] = field(default_factory=list)
+    peak_rss: int = 0
+    wall_time: float = 0.0
+
+
+def _build_request(endpoint: Endpoint, prompt: str) -> tuple[dict[str, Any], bytes]:
+    """Build the ASGI scope and body of one request to endpoint."""
+    body = b""
+    query = ""
+    if endpoint.json_body:
+        body = json.dumps({endpoint.prompt_field: prompt}).encode()
+    else:
+        query = urlencode({endpoint.prompt_field: prompt})
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": endpoint.method,
+        "scheme": "http",
+        "path": endpoint.path,
+        "raw_path": endpoint.path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [
+            (b"host", b"benchmark"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": ("benchmark", 80),
+    }
+    return scope, body
+
+
+async def call_asgi(endpoint: Endpoint, prompt: str) -> RequestResult:
+    """Send one request straight through the ASGI app and time it."""
+    scope, body = _build_request(endpoint, prompt)
+    result = RequestResult()
+    finished = asyncio.Event()
+    request_sent = False
+    started = time.perf_counter()
+
+    async def receive() -> dict[str, Any]:
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # Stay connected until the response is complete
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: MutableMapping[str, Any]) -> None:
+        if message["type"] == "http.response.start":
+            result.status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunk = message.get("body", b"")
+            if chunk and result.ttfb is None:
+                result.ttfb = time.perf_counter() - started
+            result.body_bytes += len(chunk)
+            if not message.get("more_body", False):
+                finished.set()
+
+    try:
+        await app(scope, receive, send)
+    except Exception as e:  # noqa: BLE001 - record the failure and keep going
+        result.error = f"{type(e).__name__}: {e}"
+    finally:
+        finished.set()
+    result.latency = time.perf_counter() - started
+    if result.status >= 400 and result.error is None:  # noqa: PLR2004
+        result.error = f"HTTP {result.status}"
+    return result
+
+
+def current_rss_bytes() -> int:
+    """Return the resident set size of this process."""
+    statm = Path("/proc/self/statm")
+    if statm.exists():
+        pages = int(statm.read_text().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    # Fall back to the lifetime peak (KiB on Linux, bytes on macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+async def probe_loop(run: EndpointRun, stop: asyncio.Event) -> None:
+    """Sample event-loop lag and RSS until stop is set."""
+    while not stop.is_set():
+        expected = time.perf_counter() + LAG_PROBE_INTERVAL
+        await asyncio.sleep(LAG_PROBE_INTERVAL)
+        run.loop_lag.append(max(0.0, time.perf_counter() - expected))
+        run.peak_rss = max(run.peak_rss, current_rss_bytes())
+
+
+async def run_endpoint(
+    endpoint: Endpoint,
+    args: argparse.Namespace,
+) -> EndpointRun:
+    """Drive one endpoint with closed-loop concurrency or open-loop arrivals."""
+    run = EndpointRun(peak_rss=current_rss_bytes())
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_loop(run, stop))
+
+    def prompt_for(i: int) -> str:
+        # Unique prompts by default so coalescing and caching do not kick in
+        return args.prompt if args.same_prompt else f"{args.prompt} (request {i})"
+
+    started = time.perf_counter()
+    if args.rate:
+        run.results = await _open_loop(endpoint, args, prompt_for)
+    else:
+        run.results = await _closed_loop(endpoint, args, prompt_for)
+    run.wall_time = time.perf_counter() - started
+
+    stop.set()
+    await probe
+    return run
+
+
+async def _closed_loop(
+    endpoint: Endpoint,
+    args: argparse.Namespace,
+    prompt_for: Callable[[int], str],
+) -> list[RequestResult]:
+    """Keep args.concurrency requests in flight until all are sent."""
+    counter = iter(range(args.requests))
+
+    async def worker() -> list[RequestResult]:
+        return [await call_asgi(endpoint, prompt_for(i)) for i in counter]
+
+    batches = await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    return [result for batch in batches for result in batch]
+
+
+async def _open_loop(
+    endpoint: Endpoint,
+    args: argparse.Namespace,
+    prompt_for: Callable[[int], str],
+) -> list[RequestResult]:
+    """Start requests at Poisson arrivals of args.rate per second."""
+    rng = random.Random(args.seed)  # noqa: S311 - not used for security
+    pending: list[Awaitable[RequestResult]] = []
+    for i in range(args.requests):
+        pending.append(asyncio.create_task(call_asgi(endpoint, prompt_for(i))))
+        await asyncio.sleep(rng.expovariate(args.rate))
+    return list(await asyncio.gather(*pending))
+
+
+def percentile(values: list[float], pct: float) -> float | None:
+    """Return the pct-th percentile of values using linear interpolation."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def _ms_summary(values: list[float]) -> dict[str, float | None]:
+    """Summarize durations in milliseconds."""
+
+    def ms(value: float | None) -> float | None:
+        return round(value * 1000, 2) if value is not None else None
+
+    return {
+        "p50": ms(percentile(values, 50)),
+        "p95": ms(percentile(values, 95)),
+        "p99": ms(percentile(values, 99)),
+        "max": ms(max(values)) if values else None,
+    }
+
+
+def summarize(run: EndpointRun) -> dict[str, Any]:
+    """Turn raw measurements into the report entry for one endpoint."""
+    ok = [r for r in run.results if r.error is None]
+    errors: dict[str, int] = {}
+    for r in run.results:
+        if r.error is not None:
+            errors[r.error] = errors.get(r.error, 0) + 1
+    return {
+        "requests": len(run.results),
+        "succeeded": len(ok),
+        "errors": errors,
+        "wall_time_s": round(run.wall_time, 3),
+        "throughput_rps": round(len(ok) / run.wall_time, 2) if run.wall_time else 0,
+        "ttfb_ms": _ms_summary([r.ttfb for r in ok if r.ttfb is not None]),
+        "latency_ms": _ms_summary([r.latency for r in ok]),
+        "loop_lag_ms": _ms_summary(run.loop_lag),
+        "peak_rss_mb": round(run.peak_rss / 2**20, 1),
+        "mean_body_bytes": (
+            round(sum(r.body_bytes for r in ok) / len(ok)) if ok else 0
+        ),
+    }
+
+
+def _stub_retrieval() -> None:
+    """Serve RAG retrieval locally so the benchmark needs no network or index."""
+
+    def embed_query(text: str) -> list[float]:  # noqa: ARG001
+        return [0.0] * embeddings.EMBEDDING_DIMENSIONS
+
+    embeddings.embed_query = embed_query
+    db.query_documents = lambda _db_path, _embedding, *_args, **_kwargs: [
+        "Mission ID: M-001\nLog: Benchmark knowledge entry.",
+    ]
+
+
+async def run_benchmark(args: argparse.Namespace) -> dict[str, Any]:
+    """Run every selected endpoint in turn and build the report."""
+    if not os.environ["GEMINI_MODEL"].startswith("fake"):
+        logger.warning("GEMINI_MODEL=%s: benchmarking a live model", args.model)
+    os.environ["FAKE_LLM_TTFT_SECONDS"] = str(args.ttft)
+    os.environ["FAKE_LLM_TOKENS_PER_SECOND"] = str(args.tokens_per_second)
+    _stub_retrieval()
+    load_patterns()
+
+    selected = [e for e in ENDPOINTS if not args.endpoints or e.name in args.endpoints]
+    report: dict[str, Any] = {
+        "config": {
+            "model": os.environ["GEMINI_MODEL"],
+            "requests": args.requests,
+            "concurrency": None if args.rate else args.concurrency,
+            "arrival_rate_rps": args.rate,
+            "same_prompt": args.same_prompt,
+            "fake_ttft_s": args.ttft,
+            "fake_tokens_per_second": args.tokens_per_second,
+        },
+        "endpoints": {},
+    }
+    for endpoint in selected:
+        logger.info("Benchmarking %s %s...", endpoint.method, endpoint.path)
+        run = await run_endpoint(endpoint, args)
+        report["endpoints"][endpoint.name] = summarize(run)
+    return report
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20, help="per endpoint")
+    parser.add_argument("--concurrency", type=int, default=5, help="closed loop")
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=0,
+        help="open-loop arrivals per second (overrides --concurrency)",
+    )
+    parser.add_argument(
+        "--endpoints",
+        nargs="*",
+        choices=[e.name for e in ENDPOINTS],
+        help="endpoints to run (default: all)",
+    )
+    parser.add_argument("--prompt", default="A smart collar for cats")
+    parser.add_argument(
+        "--same-prompt",
+        action="store_true",
+        help="reuse one prompt so coalescing and caching apply",
+    )
+    parser.add_argument("--ttft", type=float, default=0.2, help="fake model TTFT (s)")
+    parser.add_argument("--tokens-per-second", type=float, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="write the JSON report here")
+    args = parser.parse_args(argv)
+    args.model = os.environ["GEMINI_MODEL"]
+    return args
+
+
+def main() -> None:
+    """Run the benchmark from the command line."""
+    args = parse_args()
+    report = asyncio.run(run_benchmark(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+        logger.info("Report written to %s", args.output)
+    else:
+        sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
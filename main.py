@@ -8,10 +8,19 @@ from pathlib import Path
 
 import uvicorn
 from dotenv import load_dotenv
-from fastapi import FastAPI, Request, Response
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
+from patterns.config import TRACE_FILE, TRACING
+from patterns.metrics import render_metrics
+from patterns.tracing import (
+    CriticalPath,
+    TracingMiddleware,
+    configure_tracing,
+    find_critical_path,
+    recent_critical_paths,
+)
 from patterns.utils import PatternMetadata
 
 load_dotenv()
@@ -71,6 +80,10 @@ async def lifespan(_app: FastAPI) -> AsyncGenerator[None]:
 
 app = FastAPI(lifespan=lifespan)
 
+if TRACING:
+    configure_tracing(TRACE_FILE)
+    app.add_middleware(TracingMiddleware)
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 # Mount patterns directory to serve raw files
@@ -83,10 +96,31 @@ def get_patterns() -> list[PatternMetadata]:
     return patterns
 
 
+@app.get("/metrics")
+def get_metrics() -> Response:
+    """Expose in-process metrics in Prometheus text format."""
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/traces")
+def get_traces() -> list[CriticalPath]:
+    """Return critical-path summaries of the most recent traced requests."""
+    return recent_critical_paths()
+
+
+@app.get("/traces/{trace_id}")
+def get_trace(trace_id: str) -> CriticalPath:
+    """Return the critical-path summary of one request (see X-Trace-Id)."""
+    summary = find_critical_path(trace_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return summary
+
+
 @app.get("/")
 def read_root(request: Request) -> Response:
     """Serve the static index.html."""
-    return templates.TemplateResponse("index.html.j2", {"request": request})
+    return templates.TemplateResponse(request, "index.html.j2")
 
 
 def main() -> None:
@@ -0,0 +1,222 @@
+"""In-memory caches shared by the pattern runtimes."""
+
+import hashlib
+import itertools
+import json
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Mapping
+from typing import Any
+
+from google.adk.agents import BaseAgent
+
+from patterns.similarity import cosine_similarity
+
+
+def agent_fingerprint(agent: BaseAgent) -> str:
+    """Return a stable hash of everything that shapes an agent's output.
+
+    The fingerprint covers the agent type, name, model, instruction, output
+    schema, generation config, tools and (recursively) sub-agents, so editing
+    any of them invalidates cached runs.
+
+    Args:
+        agent: The agent to fingerprint.
+
+    Returns:
+        A hex digest identifying the agent configuration.
+
+    """
+
+    def _describe(node: BaseAgent) -> dict[str, Any]:
+        model = getattr(node, "model", None)
+        instruction = getattr(node, "instruction", None)
+        output_schema = getattr(node, "output_schema", None)
+        config = getattr(node, "generate_content_config", None)
+        return {
+            "type": type(node).__name__,
+            "name": node.name,
+            "model": model if isinstance(model, str) else getattr(model, "model", ""),
+            "instruction": (
+                instruction
+                if isinstance(instruction, str)
+                else getattr(instruction, "__qualname__", repr(instruction))
+            ),
+            "output_schema": (
+                output_schema.model_json_schema()
+                if isinstance(output_schema, type)
+                and hasattr(output_schema, "model_json_schema")
+                else None
+            ),
+            "generate_content_config": (
+                config.model_dump(mode="json", exclude_none=True) if config else None
+            ),
+            "output_key": getattr(node, "output_key", None),
+            "include_contents": getattr(node, "include_contents", None),
+            "tools": [
+                getattr(tool, "name", getattr(tool, "__name__", repr(tool)))
+                for tool in getattr(node, "tools", [])
+            ],
+            "max_iterations": getattr(node, "max_iterations", None),
+            "sub_agents": [_describe(sub) for sub in node.sub_agents],
+        }
+
+    payload = json.dumps(_describe(agent), sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class TTLCache:
+    """A size-bounded LRU cache whose entries expire after a fixed TTL."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of entries before the least recently
+                used one is evicted.
+            ttl_seconds: Lifetime of an entry in seconds.
+
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        """Return the number of stored entries, including expired ones."""
+        return len(self._entries)
+
+    def get(self, key: str) -> Any | None:  # noqa: ANN401
+        """Return the cached value for key, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: Any) -> None:  # noqa: ANN401
+        """Store value under key, evicting the least recently used entries."""
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove every entry and reset the counters."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+class SemanticCache:
+    """A size-bounded LRU cache looked up by similarity rather than equality.
+
+    Entries are stored under a term vector (see patterns.similarity) and a
+    lookup returns the most similar unexpired entry, if its cosine similarity
+    reaches the threshold. Only entries stored under the same namespace are
+    compared, so a namespace can carry what must match exactly, such as an
+    agent fingerprint. A lookup can also pass an accept predicate to reject
+    entries that are similar but unusable. Lookups scan every entry, which
+    suits a few hundred.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, threshold: float) -> None:
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of entries before the least recently
+                used one is evicted; 0 disables the cache.
+            ttl_seconds: Lifetime of an entry in seconds.
+            threshold: Minimum similarity (0-1) for a lookup to hit.
+
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self._ids = itertools.count()
+        self._entries: OrderedDict[
+            int,
+            tuple[float, str, Mapping[str, float], Any],
+        ] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        """Return the number of stored entries, including expired ones."""
+        return len(self._entries)
+
+    def get(
+        self,
+        namespace: str,
+        vector: Mapping[str, float],
+        accept: Callable[[Mapping[str, float], Any], bool] | None = None,
+    ) -> tuple[Any, float] | None:
+        """Return the most similar cached value and its similarity, or None.
+
+        With accept, only entries for which accept(entry_vector, value) is
+        true are considered.
+        """
+        now = time.monotonic()
+        best: tuple[float, int] | None = None
+        for entry_id, (expires_at, entry_namespace, entry_vector, value) in list(
+            self._entries.items(),
+        ):
+            if expires_at < now:
+                del self._entries[entry_id]
+                continue
+            if entry_namespace != namespace:
+                continue
+            similarity = cosine_similarity(vector, entry_vector)
+            if similarity < self.threshold or (best and similarity <= best[0]):
+                continue
+            if accept is None or accept(entry_vector, value):
+                best = (similarity, entry_id)
+
+        if best is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(best[1])
+        self.hits += 1
+        return self._entries[best[1]][3], best[0]
+
+    def put(
+        self,
+        namespace: str,
+        vector: Mapping[str, float],
+        value: Any,  # noqa: ANN401
+    ) -> None:
+        """Store value under vector, evicting the least recently used entries."""
+        if self.max_entries <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds
+        self._entries[next(self._ids)] = (expires_at, namespace, vector, value)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove every entry and reset the counters."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+def run_cache_key(agent: BaseAgent, user_request: str, variant: str = "") -> str:
+    """Build the response cache key for running agent on user_request.
+
+    Runs whose recorded events differ for the same request, such as streamed
+    and unstreamed ones, pass a distinct variant.
+    """
+    digest = hashlib.sha256(f"{variant}\n{user_request}".encode()).hexdigest()
+    return f"{agent_fingerprint(agent)}:{digest}"
@@ -2,5 +2,150 @@
 
 import os
 
-# Default model to use for agents
+# Importing the module registers the local "fake" model backend with ADK
+import patterns.fake_llm  # noqa: F401
+
+
+def _parse_counts(value: str) -> dict[str, int]:
+    """Parse "name=count,name=count" into a dict."""
+    counts = {}
+    for item in value.split(","):
+        name, _, count = item.partition("=")
+        if name.strip() and count.strip():
+            counts[name.strip()] = int(count)
+    return counts
+
+
+# Default model to use for agents ("fake" selects the local FakeLlm backend)
 GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-3.7-flash")
+
+# Opt-in whole-run response cache. Comma-separated pattern ids, or "*" for all.
+RESPONSE_CACHE_PATTERNS = frozenset(
+    p.strip() for p in os.getenv("RESPONSE_CACHE_PATTERNS", "").split(",") if p.strip()
+)
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+
+# Share one in-flight run between identical concurrent stateless requests
+REQUEST_COALESCING = os.getenv("REQUEST_COALESCING", "true").lower() in {"1", "true"}
+
+# Events buffered per merged fan-in stream before its overflow policy applies
+STREAM_BUFFER_SIZE = int(os.getenv("STREAM_BUFFER_SIZE", "64"))
+
+# Hedge a voting candidate that has not responded within this percentile of its
+# recent first-event latency (0 disables), once that many samples were seen
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+
+# Voting: candidates generated per persona, how many generate at once, whether
+# each is a "separate" agent run or all are "batched" into one model call, and
+# how they are judged ("single" prompt with every option, or a "tournament" of
+# VOTING_BRACKET_SIZE-way matches judged in parallel rounds)
+VOTING_SAMPLES_PER_PERSONA = int(os.getenv("VOTING_SAMPLES_PER_PERSONA", "1"))
+VOTING_MAX_CONCURRENCY = int(os.getenv("VOTING_MAX_CONCURRENCY", "8"))
+VOTING_GENERATION = os.getenv("VOTING_GENERATION", "separate").lower()
+VOTING_JUDGE_MODE = os.getenv("VOTING_JUDGE_MODE", "single").lower()
+VOTING_BRACKET_SIZE = int(os.getenv("VOTING_BRACKET_SIZE", "2"))
+# Estimated word-shingle similarity (0-1) from which voting candidates are
+# merged as near-duplicates before judging (0 disables merging)
+VOTING_DEDUP_THRESHOLD = float(os.getenv("VOTING_DEDUP_THRESHOLD", "0.8"))
+
+# Orchestrator workers running at once within one request
+ORCHESTRATOR_MAX_CONCURRENCY = int(os.getenv("ORCHESTRATOR_MAX_CONCURRENCY", "8"))
+# Large fan-out mode (fanout=true) for batch jobs: plans of up to MAX_TASKS
+# sub-tasks, whose workers also share a process-wide pool of POOL_SIZE slots,
+# granted in turn across requests; at most MAX_QUEUED_EVENTS events are
+# buffered for a client that falls behind
+ORCHESTRATOR_FANOUT_MAX_TASKS = int(os.getenv("ORCHESTRATOR_FANOUT_MAX_TASKS", "32"))
+ORCHESTRATOR_FANOUT_POOL_SIZE = int(os.getenv("ORCHESTRATOR_FANOUT_POOL_SIZE", "16"))
+ORCHESTRATOR_FANOUT_MAX_QUEUED_EVENTS = int(
+    os.getenv("ORCHESTRATOR_FANOUT_MAX_QUEUED_EVENTS", "32"),
+)
+# Orchestrator plans reused for similar requests: up to MAX_ENTRIES plans, for
+# TTL_SECONDS, when a request's content words have a cosine similarity of at
+# least THRESHOLD (0-1) with a planned one (0 entries disables the cache)
+ORCHESTRATOR_PLAN_CACHE_MAX_ENTRIES = int(
+    os.getenv("ORCHESTRATOR_PLAN_CACHE_MAX_ENTRIES", "256"),
+)
+ORCHESTRATOR_PLAN_CACHE_TTL_SECONDS = float(
+    os.getenv("ORCHESTRATOR_PLAN_CACHE_TTL_SECONDS", "3600"),
+)
+ORCHESTRATOR_PLAN_CACHE_THRESHOLD = float(
+    os.getenv("ORCHESTRATOR_PLAN_CACHE_THRESHOLD", "0.9"),
+)
+
+# Orchestrator worker outputs replayed for identical sub-tasks of the same
+# request (0 entries disables the cache)
+ORCHESTRATOR_RESULT_CACHE_MAX_ENTRIES = int(
+    os.getenv("ORCHESTRATOR_RESULT_CACHE_MAX_ENTRIES", "512"),
+)
+ORCHESTRATOR_RESULT_CACHE_TTL_SECONDS = float(
+    os.getenv("ORCHESTRATOR_RESULT_CACHE_TTL_SECONDS", "3600"),
+)
+
+# Orchestrator worker agents kept for reuse, by sub-task title and instruction
+ORCHESTRATOR_WORKER_CACHE_SIZE = int(os.getenv("ORCHESTRATOR_WORKER_CACHE_SIZE", "256"))
+
+# Time budgets of an orchestrator request (0 disables them): at the deadline,
+# planning stops and unfinished workers are cancelled; a worker running longer
+# than its timeout is cancelled. Synthesis then proceeds without them, unless
+# fewer than ORCHESTRATOR_MIN_COMPLETED_FRACTION of the tasks completed.
+ORCHESTRATOR_DEADLINE_SECONDS = float(os.getenv("ORCHESTRATOR_DEADLINE_SECONDS", "180"))
+ORCHESTRATOR_WORKER_TIMEOUT_SECONDS = float(
+    os.getenv("ORCHESTRATOR_WORKER_TIMEOUT_SECONDS", "90"),
+)
+ORCHESTRATOR_MIN_COMPLETED_FRACTION = float(
+    os.getenv("ORCHESTRATOR_MIN_COMPLETED_FRACTION", "0.5"),
+)
+# Worker outputs are compressed before synthesis: boilerplate lines and passages
+# whose estimated similarity to an earlier passage reaches the dedup threshold
+# are dropped, and each output is cut to a budget of estimated tokens (0 for
+# no limit)
+ORCHESTRATOR_COMPRESSION = os.getenv("ORCHESTRATOR_COMPRESSION", "true").lower() in {
+    "1",
+    "true",
+}
+ORCHESTRATOR_WORKER_TOKEN_BUDGET = int(
+    os.getenv("ORCHESTRATOR_WORKER_TOKEN_BUDGET", "1000"),
+)
+ORCHESTRATOR_COMPRESSION_DEDUP_THRESHOLD = float(
+    os.getenv("ORCHESTRATOR_COMPRESSION_DEDUP_THRESHOLD", "0.8"),
+)
+# Plans with more workers than this are synthesized map-reduce style: groups of
+# ORCHESTRATOR_SYNTHESIS_GROUP_SIZE outputs are combined as they complete
+ORCHESTRATOR_HIERARCHICAL_THRESHOLD = int(
+    os.getenv("ORCHESTRATOR_HIERARCHICAL_THRESHOLD", "6"),
+)
+ORCHESTRATOR_SYNTHESIS_GROUP_SIZE = int(
+    os.getenv("ORCHESTRATOR_SYNTHESIS_GROUP_SIZE", "3"),
+)
+
+# The reflection loop stops early once the refiner changed less than
+# MIN_EDIT_RATIO (0-1) of the draft's words in a round, or the critique's
+# content words have a cosine similarity of at least CRITIQUE_REPEAT_THRESHOLD
+# with the previous round's (0 disables either check)
+REFLECTION_MIN_EDIT_RATIO = float(os.getenv("REFLECTION_MIN_EDIT_RATIO", "0.05"))
+REFLECTION_CRITIQUE_REPEAT_THRESHOLD = float(
+    os.getenv("REFLECTION_CRITIQUE_REPEAT_THRESHOLD", "0.9"),
+)
+
+# Reflection critics: one "single" general critic per round, or a "panel" of
+# specialised critics (style, factuality, length) reviewing each draft at once
+REFLECTION_CRITIC_MODE = os.getenv("REFLECTION_CRITIC_MODE", "single").lower()
+
+# With delta=true, /stream_reflection sends revisions as edits of the previous
+# version, and every SNAPSHOT_INTERVAL-th revision in full (0: only the first)
+REFLECTION_SNAPSHOT_INTERVAL = int(os.getenv("REFLECTION_SNAPSHOT_INTERVAL", "5"))
+
+# Global LLM scheduler: concurrency cap, start rate limit and per-pattern bulkheads
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+LLM_RATE_PER_SECOND = float(os.getenv("LLM_RATE_PER_SECOND", "0"))
+LLM_RATE_BURST = int(os.getenv("LLM_RATE_BURST", "0"))
+LLM_RESERVED_SLOTS = _parse_counts(
+    os.getenv("LLM_RESERVED_SLOTS", "rag=2,human_in_the_loop=2"),
+)
+
+# Request tracing: spans go to TRACE_FILE as OTLP/JSON when it is set, and
+# per-request critical-path summaries are served at /traces when enabled.
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+TRACING = bool(TRACE_FILE) or os.getenv("TRACING", "false").lower() in {"1", "true"}
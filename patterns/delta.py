@@ -0,0 +1,66 @@
+"""Compact edits between successive versions of a text.
+
+A delta lists the operations turning the previous version into the next,
+applied left to right: ["=", n] keeps the next n characters, ["-", n]
+skips (deletes) them and ["+", text] inserts text. Edits are found between
+words, so a revision that rewrites a few phrases costs about as much as
+those phrases, whatever the length of the text.
+
+Lengths count UTF-16 code units, as JavaScript strings do, so a browser can
+apply a delta with String.slice: characters outside the Basic Multilingual
+Plane, such as most emoji, count twice.
+"""
+
+import re
+from difflib import SequenceMatcher
+from typing import Any
+
+# Words and the whitespace between them, so joining the tokens restores the text
+_TOKEN_RE = re.compile(r"\s+|\S+")
+
+
+def _utf16_length(text: str) -> int:
+    return len(text.encode("utf-16-le")) // 2
+
+
+def text_delta(old: str, new: str) -> list[list[Any]]:
+    """Return the operations turning old into new."""
+    before = _TOKEN_RE.findall(old)
+    after = _TOKEN_RE.findall(new)
+    ops: list[list[Any]] = []
+    matcher = SequenceMatcher(None, before, after, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        length = sum(_utf16_length(token) for token in before[i1:i2])
+        if tag == "equal":
+            ops.append(["=", length])
+            continue
+        if length:
+            ops.append(["-", length])
+        if j2 > j1:
+            ops.append(["+", "".join(after[j1:j2])])
+    return ops
+
+
+def apply_delta(old: str, ops: list[list[Any]]) -> str:
+    """Apply the operations of a delta to old and return the new text.
+
+    Raises:
+        ValueError: If an operation is not one of "=", "-" or "+".
+
+    """
+    units = old.encode("utf-16-le")
+    parts: list[str] = []
+    position = 0
+    for op, argument in ops:
+        if op == "=":
+            end = position + 2 * argument
+            parts.append(units[position:end].decode("utf-16-le"))
+            position = end
+        elif op == "-":
+            position += 2 * argument
+        elif op == "+":
+            parts.append(argument)
+        else:
+            msg = f"Unknown delta operation: {op!r}"
+            raise ValueError(msg)
+    return "".join(parts)
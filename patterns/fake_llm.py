@@ -0,0 +1,337 @@
+"""Deterministic local LLM backend for offline demos and load testing.
+
+Set GEMINI_MODEL=fake (or any name starting with "fake-") to route every
+pattern to FakeLlm instead of Gemini. Responses are derived from a hash of
+the request, so the same prompt always produces the same output, and the
+backend simulates model latency with a configurable time-to-first-token,
+token rate and streaming chunk size.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+from collections.abc import AsyncGenerator, Callable
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.models.registry import LLMRegistry
+from google.genai import types
+from pydantic import BaseModel, Field
+
+_WORDS = (
+    "agent", "design", "pattern", "plan", "worker", "critic", "draft", "review",
+    "quality", "signal", "latency", "model", "context", "tool", "result",
+    "summary", "option", "judge", "vote", "insight", "detail", "clear",
+    "concise", "robust", "parallel", "step", "output", "value", "user", "goal",
+)  # fmt: skip
+
+# Placeholder values for non-string JSON schema types, by array index
+_SCALAR_VALUES: dict[str, Callable[[int], Any]] = {
+    "integer": int,
+    "number": float,
+    "boolean": lambda _: True,
+    "null": lambda _: None,
+}
+
+_AGENT_NAME_RE = re.compile(r'Your internal name is "([^"]+)"')
+_EXPRESSION_RE = re.compile(r"\d[\d\s.+\-*/()]*[+\-*/][\d\s.+\-*/()]*\d")
+
+
+class ScriptRule(BaseModel):
+    """A scripted response used when an agent and prompt match."""
+
+    agent: str = Field(default=".*", description="Regex matched against the agent")
+    prompt: str = Field(default=".*", description="Regex searched in the prompt")
+    text: str = Field(
+        default="",
+        description="Response template; {agent} and {prompt} are substituted",
+    )
+    tool: str | None = Field(default=None, description="Tool to call, if any")
+    args: dict[str, Any] = Field(default_factory=dict, description="Tool arguments")
+
+
+@lru_cache(maxsize=8)
+def load_script(path: str) -> tuple[ScriptRule, ...]:
+    """Load scripted rules from a JSON file containing a list of rules."""
+    if not path:
+        return ()
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    return tuple(ScriptRule.model_validate(rule) for rule in data)
+
+
+def _env_float(name: str, default: str) -> float:
+    return float(os.getenv(name, default))
+
+
+class FakeLlm(BaseLlm):
+    """A BaseLlm that answers locally with scripted or templated content.
+
+    Settings default to the FAKE_LLM_* environment variables, read when the
+    model is instantiated (ADK creates one per model call).
+    """
+
+    ttft_seconds: float = Field(
+        default_factory=lambda: _env_float("FAKE_LLM_TTFT_SECONDS", "0.2"),
+    )
+    tokens_per_second: float = Field(
+        default_factory=lambda: _env_float("FAKE_LLM_TOKENS_PER_SECOND", "50"),
+    )
+    chunk_tokens: int = Field(
+        default_factory=lambda: int(os.getenv("FAKE_LLM_CHUNK_TOKENS", "4")),
+    )
+    response_tokens: int = Field(
+        default_factory=lambda: int(os.getenv("FAKE_LLM_RESPONSE_TOKENS", "60")),
+    )
+    list_items: int = Field(
+        default_factory=lambda: int(os.getenv("FAKE_LLM_LIST_ITEMS", "3")),
+    )
+    script: tuple[ScriptRule, ...] = Field(
+        default_factory=lambda: load_script(os.getenv("FAKE_LLM_SCRIPT", "")),
+    )
+
+    @classmethod
+    def supported_models(cls) -> list[str]:
+        """Match "fake" and "fake-<anything>" model names."""
+        return [r"fake(-.*)?"]
+
+    async def generate_content_async(
+        self,
+        llm_request: LlmRequest,
+        stream: bool = False,  # noqa: FBT001, FBT002 - signature set by BaseLlm
+    ) -> AsyncGenerator[LlmResponse, None]:
+        """Produce one deterministic model turn for the request."""
+        parts = self._respond(llm_request)
+        text = "".join(p.text for p in parts if p.text)
+        tokens = text.split(" ") if text else []
+
+        await asyncio.sleep(self.ttft_seconds)
+        if stream and tokens:
+            step = max(self.chunk_tokens, 1)
+            for i in range(0, len(tokens), step):
+                chunk = " ".join(tokens[i : i + step])
+                if i:
+                    chunk = " " + chunk
+                await self._pace(min(step, len(tokens) - i))
+                yield LlmResponse(
+                    content=types.Content(role="model", parts=[types.Part(text=chunk)]),
+                    partial=True,
+                )
+        else:
+            await self._pace(len(tokens))
+
+        yield LlmResponse(
+            content=types.Content(role="model", parts=parts),
+            partial=False,
+            turn_complete=True,
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=_count_tokens(llm_request),
+                candidates_token_count=len(tokens),
+                total_token_count=_count_tokens(llm_request) + len(tokens),
+            ),
+        )
+
+    async def _pace(self, token_count: int) -> None:
+        """Sleep for as long as the configured token rate would take."""
+        if self.tokens_per_second > 0 and token_count:
+            await asyncio.sleep(token_count / self.tokens_per_second)
+
+    def _respond(self, llm_request: LlmRequest) -> list[types.Part]:
+        """Decide the content of the turn: a tool call, JSON or text."""
+        instruction = _system_instruction(llm_request)
+        agent = _AGENT_NAME_RE.search(instruction)
+        agent_name = agent.group(1) if agent else "agent"
+        prompt = _last_user_text(llm_request)
+        seed = f"{agent_name}\n{instruction}\n{prompt}"
+
+        for rule in self.script:
+            if re.fullmatch(rule.agent, agent_name) and re.search(rule.prompt, prompt):
+                text = rule.text.format(agent=agent_name, prompt=prompt)
+                parts = [types.Part(text=text)] if text else []
+                if rule.tool and not _answered_tool_call(llm_request):
+                    parts.append(
+                        types.Part(
+                            function_call=types.FunctionCall(
+                                name=rule.tool,
+                                args=rule.args,
+                            ),
+                        ),
+                    )
+                return parts or [types.Part(text=self._text(seed))]
+
+        tool_result = _answered_tool_call(llm_request)
+        if tool_result is not None:
+            text = self._text(seed)
+            if tool_result:
+                text += f" Tool result: {json.dumps(tool_result)}"
+            return [types.Part(text=text)]
+
+        call = self._tool_call(llm_request, instruction, prompt, seed)
+        if call is not None:
+            return [types.Part(function_call=call)]
+
+        schema = llm_request.config.response_schema if llm_request.config else None
+        if isinstance(schema, type) and issubclass(schema, BaseModel):
+            return [types.Part(text=json.dumps(self._instance(schema, seed, prompt)))]
+
+        return [types.Part(text=self._text(seed))]
+
+    def _tool_call(
+        self,
+        llm_request: LlmRequest,
+        instruction: str,
+        prompt: str,
+        seed: str,
+    ) -> types.FunctionCall | None:
+        """Call the first tool the instruction names, filling its arguments."""
+        for declaration in _declarations(llm_request):
+            if not declaration.name or declaration.name not in instruction:
+                continue
+            args = {}
+            for name in _parameter_names(declaration):
+                expression = _EXPRESSION_RE.search(prompt)
+                if name == "expression" and expression:
+                    args[name] = expression.group(0).strip()
+                elif name == "query":
+                    args[name] = prompt
+                else:
+                    args[name] = self._text(seed)
+            return types.FunctionCall(name=declaration.name, args=args)
+        return None
+
+    def _text(self, seed: str, token_count: int | None = None) -> str:
+        """Build deterministic filler text from the seed."""
+        count = token_count if token_count is not None else self.response_tokens
+        words: list[str] = []
+        block = 0
+        while len(words) < count:
+            digest = hashlib.sha256(f"{seed}:{block}".encode()).digest()
+            words.extend(_WORDS[byte % len(_WORDS)] for byte in digest)
+            block += 1
+        return " ".join(words[:count]).capitalize() + "."
+
+    def _instance(
+        self,
+        schema: type[BaseModel],
+        seed: str,
+        prompt: str,
+    ) -> dict[str, Any]:
+        """Build a valid instance of a pydantic schema."""
+        json_schema = schema.model_json_schema()
+        definitions = json_schema.get("$defs", {})
+
+        def build(node: dict[str, Any], field: str, index: int) -> Any:  # noqa: ANN401
+            node = _resolve_schema(node, definitions)
+            kind = node.get("type")
+            if kind == "object" or "properties" in node:
+                # Optional fields are left out, as models often do
+                required = node.get("required", list(node.get("properties", {})))
+                return {
+                    name: build(child, name, index)
+                    for name, child in node.get("properties", {}).items()
+                    if name in required
+                }
+            if kind == "array":
+                return [
+                    build(node.get("items", {}), field, i)
+                    for i in range(self.list_items)
+                ]
+            if kind in _SCALAR_VALUES:
+                return _SCALAR_VALUES[kind](index)
+            label = f"{field.replace('_', ' ').capitalize()} {index + 1}"
+            if field.endswith(("title", "name", "type")):
+                return label
+            return f"{label}: {self._text(f'{seed}{field}{index}', 12)}"
+
+        instance = build(json_schema, schema.__name__, 0)
+        # Keep the user's topic visible in top-level titles
+        for name, value in instance.items():
+            if name.endswith("title") and isinstance(value, str):
+                instance[name] = prompt[:80]
+        return schema.model_validate(instance).model_dump(mode="json")
+
+
+def _resolve_schema(
+    node: dict[str, Any],
+    definitions: dict[str, Any],
+) -> dict[str, Any]:
+    """Follow $ref links and pick the non-null branch of optional fields."""
+    if "$ref" in node:
+        node = definitions[node["$ref"].rsplit("/", 1)[-1]]
+    if "anyOf" in node:
+        node = next(
+            (n for n in node["anyOf"] if n.get("type") != "null"),
+            node["anyOf"][0],
+        )
+    return node
+
+
+def _system_instruction(llm_request: LlmRequest) -> str:
+    """Return the system instruction of a request as plain text."""
+    instruction = llm_request.config.system_instruction if llm_request.config else None
+    if instruction is None:
+        return ""
+    if isinstance(instruction, str):
+        return instruction
+    if isinstance(instruction, types.Content):
+        return "".join(p.text or "" for p in instruction.parts or [])
+    return str(instruction)
+
+
+def _last_user_text(llm_request: LlmRequest) -> str:
+    """Return the text of the most recent user turn."""
+    for content in reversed(llm_request.contents):
+        if content.role == "user":
+            text = "".join(p.text or "" for p in content.parts or [])
+            if text:
+                return text
+    return ""
+
+
+def _answered_tool_call(llm_request: LlmRequest) -> dict[str, Any] | None:
+    """Return the tool response in the latest turn, if the model just called one."""
+    if not llm_request.contents:
+        return None
+    for part in llm_request.contents[-1].parts or []:
+        if part.function_response:
+            return part.function_response.response or {}
+    return None
+
+
+def _declarations(llm_request: LlmRequest) -> list[types.FunctionDeclaration]:
+    """Return every function declaration offered to the model."""
+    tools = llm_request.config.tools if llm_request.config else None
+    return [
+        declaration
+        for tool in tools or []
+        if isinstance(tool, types.Tool)
+        for declaration in tool.function_declarations or []
+    ]
+
+
+def _parameter_names(declaration: types.FunctionDeclaration) -> list[str]:
+    """Return the parameter names of a function declaration."""
+    if declaration.parameters and declaration.parameters.properties:
+        return list(declaration.parameters.properties)
+    json_schema = declaration.parameters_json_schema
+    if isinstance(json_schema, dict):
+        return list(json_schema.get("properties", {}))
+    return []
+
+
+def _count_tokens(llm_request: LlmRequest) -> int:
+    """Approximate the prompt size in whitespace-separated tokens."""
+    words = len(_system_instruction(llm_request).split())
+    for content in llm_request.contents:
+        for part in content.parts or []:
+            words += len((part.text or "").split())
+    return words
+
+
+# Make "fake" model names resolve to this backend
+LLMRegistry.register(FakeLlm)
@@ -0,0 +1,208 @@
+"""Hedged requests: race a duplicate run against a straggling one."""
+
+import asyncio
+import math
+import time
+from collections import deque
+from collections.abc import AsyncGenerator, AsyncIterator, Callable
+from typing import Any
+
+from opentelemetry import trace
+
+from patterns.metrics import Counter, Histogram
+from patterns.utils import cancel_tasks, get_current_pattern
+
+HEDGE_CANDIDATES = Counter(
+    "adp_hedge_candidates_total",
+    "Runs started with enough latency history to be hedged.",
+    ("pattern", "candidate"),
+)
+HEDGES = Counter(
+    "adp_hedges_total",
+    "Duplicate runs launched because the original was straggling.",
+    ("pattern", "candidate"),
+)
+HEDGE_WINS = Counter(
+    "adp_hedge_wins_total",
+    "Duplicate runs that responded before the original.",
+    ("pattern", "candidate"),
+)
+HEDGE_SAVED_SECONDS = Histogram(
+    "adp_hedge_latency_saved_seconds",
+    "Estimated first-event latency saved by winning duplicate runs.",
+    ("pattern", "candidate"),
+)
+
+
+class LatencyTracker:
+    """Rolling window of first-event latencies, per key."""
+
+    def __init__(self, percentile: float, min_samples: int, window: int = 200) -> None:
+        """Initialize the tracker.
+
+        Args:
+            percentile: Latency percentile (0-100) after which to hedge; 0
+                disables hedging.
+            min_samples: Samples required before a key is hedged.
+            window: Most recent samples kept per key.
+
+        """
+        self.percentile = percentile
+        self.min_samples = max(min_samples, 1)
+        self.window = window
+        self._samples: dict[str, deque[float]] = {}
+
+    def record(self, key: str, seconds: float) -> None:
+        """Add one latency sample for key."""
+        samples = self._samples.get(key)
+        if samples is None:
+            samples = deque(maxlen=self.window)
+            self._samples[key] = samples
+        samples.append(seconds)
+
+    def hedge_delay(self, key: str) -> float | None:
+        """Return how long to wait before hedging, or None to not hedge."""
+        samples = self._samples.get(key, ())
+        if self.percentile <= 0 or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        rank = math.ceil(self.percentile / 100 * len(ordered))
+        return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+    def expected_beyond(self, key: str, elapsed: float) -> float:
+        """Estimate a run's latency given that it took longer than elapsed.
+
+        This is the mean of the recent samples above elapsed, or elapsed
+        itself when no sample was that slow.
+        """
+        slower = [s for s in self._samples.get(key, ()) if s > elapsed]
+        return sum(slower) / len(slower) if slower else elapsed
+
+
+# Queued by an attempt after its last item
+_END = object()
+
+
+class _Attempt:
+    """One run of a hedged stream, pumped by its own task.
+
+    Each stream is iterated by a single task from start to finish, so the
+    context (and tracing spans) it sets up stays consistent.
+    """
+
+    def __init__(self, stream: AsyncIterator[Any]) -> None:
+        self.started = time.monotonic()
+        self.first_at: float | None = None
+        # A single slot keeps backpressure from the consumer on the run
+        self.queue: asyncio.Queue[Any] = asyncio.Queue(maxsize=1)
+        self.ready = asyncio.Event()
+        self.error: Exception | None = None
+        self.task = asyncio.create_task(self._pump(stream))
+
+    async def _pump(self, stream: AsyncIterator[Any]) -> None:
+        try:
+            async for item in stream:
+                await self._put(item)
+            await self._put(_END)
+        except Exception as e:  # noqa: BLE001
+            self.error = e
+            await self._put(e)
+        finally:
+            aclose = getattr(stream, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    async def _put(self, item: Any) -> None:  # noqa: ANN401
+        await self.queue.put(item)
+        if self.first_at is None:
+            self.first_at = time.monotonic()
+            self.ready.set()
+
+
+async def _first_ready(
+    attempts: list[_Attempt],
+    wait_seconds: float | None,
+) -> _Attempt | None:
+    """Wait (at most wait_seconds) until an attempt responds or ends."""
+    waiters = [asyncio.create_task(a.ready.wait()) for a in attempts]
+    try:
+        await asyncio.wait(
+            waiters,
+            timeout=wait_seconds,
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+    finally:
+        for waiter in waiters:
+            waiter.cancel()
+    return next((a for a in attempts if a.ready.is_set()), None)
+
+
+async def _pick_winner(
+    factory: Callable[[], AsyncIterator[Any]],
+    tracker: LatencyTracker,
+    key: str,
+    pattern_id: str,
+    attempts: list[_Attempt],
+) -> _Attempt:
+    """Return the first attempt to respond, hedging once if it straggles."""
+    primary = attempts[0]
+    delay = tracker.hedge_delay(key)
+    if delay is not None:
+        HEDGE_CANDIDATES.inc(pattern=pattern_id, candidate=key)
+    winner = await _first_ready(attempts, delay)
+    if winner is None:
+        HEDGES.inc(pattern=pattern_id, candidate=key)
+        trace.get_current_span().add_event("hedge.launched", {"candidate": key})
+        attempts.append(_Attempt(factory()))
+        winner = await _first_ready(attempts, None) or primary
+    # Prefer a run still in flight over one that already failed
+    if winner.error is not None and len(attempts) > 1:
+        others = [a for a in attempts if a is not winner]
+        winner = await _first_ready(others, None) or winner
+
+    latency = (winner.first_at or time.monotonic()) - winner.started
+    tracker.record(key, latency)
+    if winner is not primary:
+        HEDGE_WINS.inc(pattern=pattern_id, candidate=key)
+        elapsed = (winner.first_at or time.monotonic()) - primary.started
+        saved = tracker.expected_beyond(key, elapsed) - elapsed
+        HEDGE_SAVED_SECONDS.observe(max(saved, 0), pattern=pattern_id, candidate=key)
+    return winner
+
+
+async def hedged_stream(
+    factory: Callable[[], AsyncIterator[Any]],
+    tracker: LatencyTracker,
+    key: str,
+) -> AsyncGenerator[Any]:
+    """Stream factory(), racing a duplicate run if the first one straggles.
+
+    If the run has not produced its first item (or finished) within the
+    tracker's latency percentile for key, a second run is started and the
+    first to respond is streamed; the other is cancelled. Only the start is
+    hedged, so the items of the two runs are never mixed.
+
+    Args:
+        factory: Starts a new run of the stream.
+        tracker: Latency history deciding when to hedge.
+        key: Identifies the kind of run in the history and metrics.
+
+    Yields:
+        The items of whichever run responded first.
+
+    """
+    pattern_id = get_current_pattern("unknown")
+    attempts = [_Attempt(factory())]
+    try:
+        winner = await _pick_winner(factory, tracker, key, pattern_id, attempts)
+        await cancel_tasks([a.task for a in attempts if a is not winner])
+        while True:
+            item = await winner.queue.get()
+            if item is _END:
+                await winner.task
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        await cancel_tasks([a.task for a in attempts])
@@ -103,6 +103,8 @@ def register(app: FastAPI) -> PatternMetadata:
             base_file=__file__,
             handler=web_handler,
             template_name="hitl.html.j2",
+            # Publishing is a side effect, so every request runs on its own
+            coalesce_requests=False,
         ),
     )
 
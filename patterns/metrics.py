@@ -0,0 +1,190 @@
+"""In-process metrics with Prometheus text exposition."""
+
+import math
+from abc import ABC, abstractmethod
+from collections.abc import Iterable
+
+# Default latency buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+LabelValues = tuple[str, ...]
+
+# Every metric registers itself here on creation
+REGISTRY: list["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the Prometheus text format."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    """Render a Prometheus label set such as {pattern="voting"}."""
+    pairs = [
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)
+    ]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    """Render a sample value the way Prometheus expects."""
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class _Metric(ABC):
+    """Shared plumbing for named, labelled metrics."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...]) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = labels
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    @abstractmethod
+    def samples(self) -> Iterable[tuple[str, LabelValues, tuple[str, ...], float]]:
+        """Yield (suffix, label values, extra label names, value) tuples."""
+
+    def render(self) -> str:
+        """Render this metric in Prometheus text format."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for suffix, values, extra_names, value in self.samples():
+            labels = _format_labels((*self.label_names, *extra_names), values)
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """A monotonically increasing count, named with a _total suffix."""
+
+    kind = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+    ) -> None:
+        """Register a counter with the given label names."""
+        super().__init__(name, documentation, labels)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """Add amount to the counter for the given labels."""
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        """Return the current count for the given labels."""
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> Iterable[tuple[str, LabelValues, tuple[str, ...], float]]:
+        """Yield one sample per label set."""
+        for key, value in self._values.items():
+            yield "", key, (), value
+
+
+class Gauge(_Metric):
+    """A value that can go up and down."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+    ) -> None:
+        """Register a gauge with the given label names."""
+        super().__init__(name, documentation, labels)
+        self._values: dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        """Set the gauge for the given labels."""
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """Increase the gauge for the given labels."""
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        """Decrease the gauge for the given labels."""
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        """Return the current value for the given labels."""
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> Iterable[tuple[str, LabelValues, tuple[str, ...], float]]:
+        """Yield one sample per label set."""
+        for key, value in self._values.items():
+            yield "", key, (), value
+
+
+class Histogram(_Metric):
+    """Bucketed observations with a running sum and count."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        """Register a histogram with the given label names and bucket bounds."""
+        super().__init__(name, documentation, labels)
+        self.buckets = (*sorted(buckets), math.inf)
+        # Per label set: [count per bucket..., sum, count]
+        self._values: dict[LabelValues, list[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Record one observation for the given labels."""
+        key = self._key(labels)
+        state = self._values.get(key)
+        if state is None:
+            state = [0.0] * (len(self.buckets) + 2)
+            self._values[key] = state
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                state[i] += 1
+                break
+        state[-2] += value
+        state[-1] += 1
+
+    def count(self, **labels: str) -> float:
+        """Return the number of observations for the given labels."""
+        state = self._values.get(self._key(labels))
+        return state[-1] if state else 0
+
+    def total(self, **labels: str) -> float:
+        """Return the sum of observations for the given labels."""
+        state = self._values.get(self._key(labels))
+        return state[-2] if state else 0
+
+    def samples(self) -> Iterable[tuple[str, LabelValues, tuple[str, ...], float]]:
+        """Yield cumulative buckets, then the sum and count, per label set."""
+        for key, state in self._values.items():
+            cumulative = 0.0
+            for bound, bucket_count in zip(self.buckets, state, strict=False):
+                cumulative += bucket_count
+                le = "+Inf" if math.isinf(bound) else repr(float(bound))
+                yield "_bucket", (*key, le), ("le",), cumulative
+            yield "_sum", key, (), state[-2]
+            yield "_count", key, (), state[-1]
+
+
+def render_metrics() -> str:
+    """Render every registered metric in Prometheus text format."""
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
@@ -1,9 +1,15 @@
 """Orchestrator Agent Pattern Logic."""
 
+from functools import lru_cache
+
 from google.adk.agents import LlmAgent
 from pydantic import BaseModel, Field
 
-from patterns.config import GEMINI_MODEL
+from patterns.config import (
+    GEMINI_MODEL,
+    ORCHESTRATOR_FANOUT_MAX_TASKS,
+    ORCHESTRATOR_WORKER_CACHE_SIZE,
+)
 
 # --- Data Models ---
 
@@ -19,6 +25,13 @@ class SubTask(BaseModel):
             "'Fact Checker')"
         ),
     )
+    depends_on: list[str] = Field(
+        default_factory=list,
+        description=(
+            "Titles of the other tasks whose results this task needs; empty if "
+            "it can start right away"
+        ),
+    )
 
 
 class ExecutionPlan(BaseModel):
@@ -26,33 +39,54 @@ class ExecutionPlan(BaseModel):
 
     plan_title: str = Field(description="Overarching goal of the plan")
     tasks: list[SubTask] = Field(
-        description="List of tasks to be performed in parallel",
+        description="List of tasks, performed in parallel where dependencies allow",
     )
 
 
 # --- Agent Definitions ---
 
 # 1. The Orchestrator (Planner)
-orchestrator_agent = LlmAgent(
-    name="Orchestrator",
-    model=GEMINI_MODEL,
-    instruction="""You are an expert Project Manager and Orchestrator.
-Your goal is to take a complex user request and break it down into 2-4 independent,
-well-defined sub-tasks that can be executed in parallel by specialized workers.
+_PLANNER_INSTRUCTION = """You are an expert Project Manager and Orchestrator.
+Your goal is to take a complex user request and break it down into
+{task_count} well-defined sub-tasks that can be executed in parallel by
+specialized workers.
 
 Focus on:
 - Modularity: Each task should be self-contained.
+- Dependencies: Only when a task truly needs another task's result, list that
+  task's title in its depends_on; it will then receive that result. Tasks
+  without dependencies run in parallel, so keep dependency chains short.
 - Clarity: Provide clear instructions for each worker.
 - Synergy: Ensure the combined output of these tasks will cover the original request.
-""",
+"""
+
+orchestrator_agent = LlmAgent(
+    name="Orchestrator",
+    model=GEMINI_MODEL,
+    instruction=_PLANNER_INSTRUCTION.format(task_count="2-4"),
+    output_schema=ExecutionPlan,
+)
+
+# Plans batch jobs in large fan-out mode, where workers run through a pool
+fanout_orchestrator_agent = LlmAgent(
+    name="FanoutOrchestrator",
+    model=GEMINI_MODEL,
+    instruction=_PLANNER_INSTRUCTION.format(
+        task_count=f"as many as needed, up to {ORCHESTRATOR_FANOUT_MAX_TASKS},",
+    ),
     output_schema=ExecutionPlan,
 )
 
 
 # 2. The Worker (Executor)
-# We use a factory function or a generic agent that can be customized.
+# Workers are built per sub-task, and reused when a sub-task comes up again.
 def create_worker_agent(name: str, instruction: str) -> LlmAgent:
-    """Create a worker agent for a specific sub-task.
+    """Return a worker agent for a specific sub-task.
+
+    Agents are cached (up to ORCHESTRATOR_WORKER_CACHE_SIZE of them) by
+    sanitized name and instruction, so repeated sub-tasks skip building and
+    validating a new agent. They hold no per-run state, so concurrent runs
+    can share them.
 
     Args:
         name: The name of the worker agent.
@@ -67,6 +101,11 @@ def create_worker_agent(name: str, instruction: str) -> LlmAgent:
     if not safe_name or not safe_name[0].isalpha():
         safe_name = f"worker_{safe_name}"
 
+    return _worker_agent(safe_name, instruction)
+
+
+@lru_cache(maxsize=ORCHESTRATOR_WORKER_CACHE_SIZE)
+def _worker_agent(safe_name: str, instruction: str) -> LlmAgent:
     return LlmAgent(
         name=safe_name,
         model=GEMINI_MODEL,
@@ -90,3 +129,22 @@ Ensure the final output is:
 - Comprehensive: Check that all parts of the user's initial request are met.
 """,
 )
+
+
+# 4. The Partial Synthesizer (Reducer)
+# Combines a group of outputs when there are too many for a single synthesis.
+partial_synthesizer_agent = LlmAgent(
+    name="PartialSynthesizer",
+    model=GEMINI_MODEL,
+    instruction="""You are a Research Editor.
+You will receive the original user request and the outputs of some of the
+workers (or earlier combined summaries) contributing to it.
+Your task is to merge them into a single consolidated section that a final
+reviewer will combine with other sections.
+
+Ensure the section is:
+- Faithful: Keep every fact, figure, recommendation and caveat relevant to the request.
+- Deduplicated: State each point once.
+- Plain: No introduction or conclusion, and do not address the user.
+""",
+)
@@ -0,0 +1,102 @@
+"""Compression of worker outputs before synthesis.
+
+Workers pad their answers with pleasantries, and parallel workers covering
+neighbouring sub-tasks repeat each other. Outputs are compressed line by
+line, with local checks only: boilerplate lines are dropped, as are lines
+near-duplicating a line kept earlier (from the same worker or another one),
+and what is left is cut to a token budget per worker.
+"""
+
+import re
+from collections import Counter
+
+from patterns.similarity import MinHasher, MinHashIndex, shingles
+
+# Lines that only address the reader, with nothing for the synthesis. Openers
+# must make up the whole line: "Of course, prices rose" carries content.
+_BOILERPLATE_RE = re.compile(
+    r"""^(?:\W*(?:
+        (?:sure|certainly|of\ course|absolutely|(?:great|good)\ question)
+        |(?:i'd\ be\ )?happy\ to\ help
+        |here(?:'s|\ is|\ are)\ (?:what\ i\ found|my\ (?:answer|findings|response)
+            |(?:a|the)\ (?:summary|breakdown|overview))
+        |(?:i\ hope\ (?:this|that)\ helps|let\ me\ know\ if|feel\ free\ to)\b[^\n]*
+    )\b)+\W*$""",
+    re.IGNORECASE | re.VERBOSE,
+)
+
+# Lines this short (headings, separators) are never treated as duplicates
+_MIN_DEDUP_WORDS = 5
+
+# Shown where an output was cut to its token budget
+TRUNCATION_MARK = "[...]"
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the model tokens of text, at about 4 tokens per 3 words."""
+    return round(len(text.split()) * 4 / 3)
+
+
+class OutputCompressor:
+    """Compresses the outputs of one request's workers, one at a time.
+
+    Lines of later outputs are checked for duplicates against every line kept
+    so far, so the first output to mention something keeps it. Token counts
+    before and after, and tokens removed by reason ("boilerplate",
+    "duplicate" or "budget"), accumulate across outputs.
+    """
+
+    def __init__(self, token_budget: int, dedup_threshold: float) -> None:
+        """Initialize the compressor.
+
+        Args:
+            token_budget: Estimated tokens kept per output; 0 for no limit.
+            dedup_threshold: Estimated similarity (0-1) from which a line is
+                a duplicate; 0 disables duplicate removal.
+
+        """
+        self.token_budget = token_budget
+        self.dedup_threshold = dedup_threshold
+        self._hasher = MinHasher()
+        self._seen = MinHashIndex(dedup_threshold)
+        self.tokens_before = 0
+        self.tokens_after = 0
+        self.removed: Counter[str] = Counter()
+
+    def _signature(self, line: str) -> tuple[int, ...]:
+        """Return the line's MinHash signature, empty if it is not deduplicated."""
+        if self.dedup_threshold <= 0 or len(line.split()) < _MIN_DEDUP_WORDS:
+            return ()
+        return self._hasher.signature(shingles(line))
+
+    def compress(self, text: str) -> str:
+        """Return text without boilerplate and repeats, cut to the budget."""
+        kept: list[str] = []
+        used = 0
+        truncated = False
+        for line in text.splitlines():
+            tokens = estimate_tokens(line)
+            signature = self._signature(line)
+            if not line.strip():
+                kept.append("")
+            elif truncated:
+                self.removed["budget"] += tokens
+            elif _BOILERPLATE_RE.match(line):
+                self.removed["boilerplate"] += tokens
+            elif self._seen.find(signature):
+                self.removed["duplicate"] += tokens
+            elif self.token_budget and used + tokens > self.token_budget:
+                # Keep the words that fit of the first line over budget, then stop
+                truncated = True
+                fitted = " ".join(line.split()[: (self.token_budget - used) * 3 // 4])
+                kept.extend([fitted, TRUNCATION_MARK] if fitted else [TRUNCATION_MARK])
+                self.removed["budget"] += tokens - estimate_tokens(fitted)
+            else:
+                kept.append(line)
+                used += tokens
+                self._seen.add(signature)
+
+        compressed = re.sub(r"\n{3,}", "\n\n", "\n".join(kept)).strip()
+        self.tokens_before += estimate_tokens(text)
+        self.tokens_after += estimate_tokens(compressed)
+        return compressed
@@ -0,0 +1,88 @@
+"""Dependency graph of the sub-tasks of an execution plan.
+
+Tasks name the tasks they depend on by title. The graph maps every task,
+by its position in the plan, to the positions of its dependencies.
+"""
+
+from typing import Any
+
+
+def _title(task: Any, index: int) -> str:  # noqa: ANN401
+    if isinstance(task, dict):
+        return str(task.get("title", f"Task {index}"))
+    return f"Task {index}"
+
+
+def resolve_dependencies(tasks: list[Any]) -> dict[int, list[int]]:
+    """Map each task position to the positions of the tasks it depends on.
+
+    Titles are matched case-insensitively. References to unknown titles and
+    to the task itself are ignored, as the planner may produce them. Entries
+    that are not task objects have no dependencies and cannot be depended on.
+    """
+    positions: dict[str, int] = {}
+    for index, task in enumerate(tasks):
+        if isinstance(task, dict):
+            positions.setdefault(_title(task, index).strip().lower(), index)
+
+    dependencies: dict[int, list[int]] = {}
+    for index, task in enumerate(tasks):
+        names = task.get("depends_on") if isinstance(task, dict) else None
+        resolved: list[int] = []
+        for name in names if isinstance(names, list) else []:
+            position = positions.get(str(name).strip().lower())
+            if position is not None and position != index and position not in resolved:
+                resolved.append(position)
+        dependencies[index] = resolved
+    return dependencies
+
+
+def unknown_dependencies(tasks: list[Any], index: int) -> list[str]:
+    """Return the names in a task's depends_on that match no task title.
+
+    While a plan is still streaming, these may refer to tasks yet to come.
+    """
+    task = tasks[index]
+    names = task.get("depends_on") if isinstance(task, dict) else None
+    titles = {
+        _title(t, i).strip().lower() for i, t in enumerate(tasks) if isinstance(t, dict)
+    }
+    return [
+        str(name)
+        for name in (names if isinstance(names, list) else [])
+        if str(name).strip().lower() not in titles
+    ]
+
+
+def find_cycle(dependencies: dict[int, list[int]]) -> list[int] | None:
+    """Return the positions along one dependency cycle, or None if acyclic.
+
+    The returned path starts and ends with the same task.
+    """
+    visiting: list[int] = []
+    done: set[int] = set()
+
+    def visit(node: int) -> list[int] | None:
+        if node in visiting:
+            return [*visiting[visiting.index(node) :], node]
+        if node in done:
+            return None
+        visiting.append(node)
+        for dependency in dependencies.get(node, []):
+            cycle = visit(dependency)
+            if cycle is not None:
+                return cycle
+        visiting.pop()
+        done.add(node)
+        return None
+
+    for node in dependencies:
+        cycle = visit(node)
+        if cycle is not None:
+            return cycle
+    return None
+
+
+def describe_cycle(tasks: list[Any], cycle: list[int]) -> str:
+    """Render a cycle as "A -> B -> A" using task titles."""
+    return " -> ".join(_title(tasks[index], index) for index in cycle)
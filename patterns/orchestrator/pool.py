@@ -0,0 +1,74 @@
+"""Worker slots shared fairly by the orchestrator requests in large fan-out mode.
+
+A batch job can plan dozens of sub-tasks. Its own concurrency limit keeps
+it from running them all at once, but several such jobs together would
+still crowd the process and the model quota. They therefore also draw
+their workers' slots from one pool, and while slots are short, the pool
+serves the waiting requests in turn, so a job queueing many tasks does not
+hold back one that queued few.
+"""
+
+import asyncio
+from collections import OrderedDict, deque
+from collections.abc import Hashable
+
+
+class FairPool:
+    """A fixed number of slots, granted round-robin across owners.
+
+    Each owner's waiters are served first come first served; after one of
+    them is granted a slot, the owner moves behind the other waiting owners.
+    """
+
+    def __init__(self, size: int) -> None:
+        """Initialize a pool of size slots (at least one)."""
+        self.size = max(size, 1)
+        self.active = 0
+        self._waiting: OrderedDict[Hashable, deque[asyncio.Future[None]]] = (
+            OrderedDict()
+        )
+
+    @property
+    def queued(self) -> int:
+        """Number of waiters without a slot."""
+        return sum(len(waiters) for waiters in self._waiting.values())
+
+    async def acquire(self, owner: Hashable) -> None:
+        """Wait for a slot, in owner's turn."""
+        if self.active < self.size and not self._waiting:
+            self.active += 1
+            return
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(owner, deque()).append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as the waiter was cancelled: hand the slot on
+                self.release()
+            else:
+                self._withdraw(owner, future)
+            raise
+
+    def release(self) -> None:
+        """Return a slot, granting it to the next owner waiting."""
+        self.active -= 1
+        self._grant()
+
+    def _withdraw(self, owner: Hashable, future: asyncio.Future[None]) -> None:
+        waiters = self._waiting.get(owner)
+        if waiters is not None and future in waiters:
+            waiters.remove(future)
+            if not waiters:
+                del self._waiting[owner]
+
+    def _grant(self) -> None:
+        while self.active < self.size and self._waiting:
+            owner, waiters = self._waiting.popitem(last=False)
+            future = waiters.popleft()
+            if waiters:
+                self._waiting[owner] = waiters
+            # Skip waiters cancelled before they could withdraw
+            if not future.done():
+                self.active += 1
+                future.set_result(None)
@@ -2,7 +2,7 @@
 
 import asyncio
 import json
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, Callable
 from typing import Any
 from unittest.mock import MagicMock, patch
 
@@ -14,10 +14,40 @@ from patterns.orchestrator.agent import (
     ExecutionPlan,
     SubTask,
     create_worker_agent,
+    fanout_orchestrator_agent,
     orchestrator_agent,
+    partial_synthesizer_agent,
     synthesizer_agent,
 )
-from patterns.orchestrator.ui import register, stream_orchestrator_generator
+from patterns.orchestrator.compression import (
+    TRUNCATION_MARK,
+    OutputCompressor,
+    estimate_tokens,
+)
+from patterns.orchestrator.dag import (
+    describe_cycle,
+    find_cycle,
+    resolve_dependencies,
+    unknown_dependencies,
+)
+from patterns.orchestrator.pool import FairPool
+from patterns.orchestrator.ui import (
+    _PLAN_CACHE,
+    _RESULT_CACHE,
+    COMPRESSION_TOKENS_REMOVED,
+    PLAN_CACHE_LOOKUPS,
+    RESULT_CACHE_LOOKUPS,
+    _Schedule,
+    register,
+    stream_orchestrator_generator,
+)
+
+
+@pytest.fixture(autouse=True)
+def _clear_caches() -> None:
+    """Plan and run every request afresh unless a test relies on caching."""
+    _PLAN_CACHE.clear()
+    _RESULT_CACHE.clear()
 
 
 def test_agent_definitions() -> None:
@@ -44,6 +74,11 @@ def test_create_worker_agent() -> None:
     worker2 = create_worker_agent("123-Invalid!", "Instructions")
     assert worker2.name == "worker_123_Invalid_"
 
+    # Agents are reused for the same sub-task only
+    assert create_worker_agent("Research Scientist", "Do some research") is worker
+    assert create_worker_agent("Research-Scientist", "Do some research") is worker
+    assert create_worker_agent("Research Scientist", "Do more research") is not worker
+
 
 def test_registration() -> None:
     """Test that pattern can be registered without error."""
@@ -80,6 +115,7 @@ async def test_stream_orchestrator_generator() -> None:
         agent: BaseAgent,
         _prompt: str,
         _app_name: str,
+        **_kwargs: object,
     ) -> AsyncGenerator[tuple[Any, Any, Any], None]:
         # 1. Orchestrator Plan
         if agent == orchestrator_agent:
@@ -140,7 +176,7 @@ async def test_stream_orchestrator_generator() -> None:
 
 @pytest.mark.asyncio
 async def test_stream_orchestrator_race_condition() -> None:
-    """Reproduces a race condition where worker_task is cancelled prematurely."""
+    """Synthesis runs only after the worker phase has finished."""
     user_request = "Any request"
 
     # Mock plan
@@ -154,6 +190,7 @@ async def test_stream_orchestrator_race_condition() -> None:
         _agent: BaseAgent,
         _prompt: str,
         _app_name: str,
+        **_kwargs: object,
     ) -> AsyncGenerator[tuple[Any, Any, Any], None]:
         event = MagicMock()
         event.is_final_response.return_value = True
@@ -168,29 +205,28 @@ async def test_stream_orchestrator_race_condition() -> None:
         _agent: BaseAgent,
         _prompt: str,
         _app_name: str,
+        **_kwargs: object,
     ) -> AsyncGenerator[tuple[Any, Any, Any], None]:
         event = MagicMock()
         event.is_final_response.return_value = False
         event.content.parts = [MagicMock(text="Synthesis content")]
         yield event, None, None
 
-    # 3. Mock _execute_workers to simulate the race condition
-    # It puts None in the queue then sleeps, simulating the case where
-    # the task is still "running" but the signal has been sent.
+    # 3. Mock _execute_workers with a worker that pauses between its events,
+    # so the stream must wait for the merged worker phase to end.
     async def mock_execute_workers_race(
         _tasks_list: list[dict[str, Any]],
         _user_request: str,
-        queue: asyncio.Queue,
-    ) -> list[str]:
-        await queue.put({"type": "worker_start", "task_id": 0})
-        await queue.put(None)
-        await asyncio.sleep(0.1)  # Simulate delay after signaling completion
-        return ["Worker Output"]
+        **_kwargs: object,
+    ) -> AsyncGenerator[dict[str, Any]]:
+        yield {"type": "worker_start", "task_id": 0}
+        await asyncio.sleep(0.1)  # Simulate a slow worker
+        yield {"type": "worker_complete", "task_id": 0, "final": "Worker Output"}
 
     with (
         patch(
             "patterns.orchestrator.ui.run_agent_standard",
-            side_effect=lambda agent, *args: (
+            side_effect=lambda agent, *args, **_kwargs: (
                 mock_run_agent_orchestrator(agent, *args)
                 if agent == orchestrator_agent
                 else mock_run_agent_synthesizer(agent, *args)
@@ -202,7 +238,7 @@ async def test_stream_orchestrator_race_condition() -> None:
         ),
     ):
         items = []
-        # This should proceed to synthesis despite the delay in _execute_workers
+        # This should proceed to synthesis once the worker phase ends
         async for chunk in stream_orchestrator_generator(user_request):
             if chunk.startswith("data: "):
                 data = json.loads(chunk[6:])
@@ -212,3 +248,733 @@ async def test_stream_orchestrator_race_condition() -> None:
         # In the failing case, 'synthesis_step' might not be reached or it might crash
         assert "synthesis_step" in types
         assert "complete" in types
+
+
+def test_dependency_graph() -> None:
+    """Dependencies resolve by title, and cycles and unknown names are found."""
+    tasks: list[Any] = [
+        {"title": "Research"},
+        {"title": "Draft", "depends_on": ["research", "Unknown", "Draft"]},
+        {"title": "Review", "depends_on": ["Draft", "Research"]},
+        "not a task",
+    ]
+    dependencies = resolve_dependencies(tasks)
+    assert dependencies == {0: [], 1: [0], 2: [1, 0], 3: []}
+    assert find_cycle(dependencies) is None
+    assert unknown_dependencies(tasks, 1) == ["Unknown"]
+
+    tasks[0]["depends_on"] = ["Review"]
+    cycle = find_cycle(resolve_dependencies(tasks))
+    assert cycle is not None
+    assert describe_cycle(tasks, cycle) == "Research -> Review -> Draft -> Research"
+
+
+def _plan_runner(
+    plan: ExecutionPlan,
+    prompts: dict[str, str],
+) -> Callable[..., AsyncGenerator[tuple[Any, Any, Any], None]]:
+    """Mock run_agent_standard: the plan, then each worker echoes its name."""
+
+    async def mock_run_agent_standard(
+        agent: BaseAgent,
+        prompt: str,
+        _app_name: str,
+        **_kwargs: object,
+    ) -> AsyncGenerator[tuple[Any, Any, Any], None]:
+        prompts[agent.name] = prompt
+        event = MagicMock()
+        event.is_final_response.return_value = True
+        event.author = agent.name
+        if agent in (orchestrator_agent, fanout_orchestrator_agent):
+            text = plan.model_dump_json()
+        else:
+            await asyncio.sleep(0.01)
+            text = f"Output of {agent.name}"
+        event.content.parts = [MagicMock(text=text)]
+        yield event, None, None
+
+    return mock_run_agent_standard
+
+
+@pytest.mark.asyncio
+async def test_dependent_task_receives_upstream_output() -> None:
+    """A task starts after its dependency and gets its output in the prompt."""
+    plan = ExecutionPlan(
+        plan_title="Guide",
+        tasks=[
+            SubTask(
+                title="Draft", description="D", worker_type="W", depends_on=["Facts"]
+            ),
+            SubTask(title="Facts", description="F", worker_type="W"),
+        ],
+    )
+    prompts: dict[str, str] = {}
+    with patch(
+        "patterns.orchestrator.ui.run_agent_standard",
+        side_effect=_plan_runner(plan, prompts),
+    ):
+        items = [
+            json.loads(chunk.removeprefix("data: "))
+            async for chunk in stream_orchestrator_generator("Write a guide")
+        ]
+
+    order = [
+        (item["type"], item["task_id"])
+        for item in items
+        if item["type"] in {"worker_start", "worker_complete"}
+    ]
+    assert order == [
+        ("worker_start", 1),
+        ("worker_complete", 1),
+        ("worker_start", 0),
+        ("worker_complete", 0),
+    ]
+    draft_start = next(
+        i for i in items if i["type"] == "worker_start" and i["task_id"] == 0
+    )
+    assert draft_start["wave"] == 1
+    assert draft_start["depends_on"] == [1]
+    assert all("duration_ms" in i for i in items if i["type"] == "worker_complete")
+    assert "--- Facts ---\nOutput of Facts" in prompts["Draft"]
+    assert "Output of Draft" in prompts[synthesizer_agent.name]
+
+
+@pytest.mark.asyncio
+async def test_cyclic_plan_is_rejected() -> None:
+    """A plan whose tasks depend on each other in a cycle runs no worker."""
+    plan = ExecutionPlan(
+        plan_title="Loop",
+        tasks=[
+            SubTask(title="A", description="A", worker_type="W", depends_on=["B"]),
+            SubTask(title="B", description="B", worker_type="W", depends_on=["A"]),
+        ],
+    )
+    prompts: dict[str, str] = {}
+    with patch(
+        "patterns.orchestrator.ui.run_agent_standard",
+        side_effect=_plan_runner(plan, prompts),
+    ):
+        items = [
+            json.loads(chunk.removeprefix("data: "))
+            async for chunk in stream_orchestrator_generator("Loop")
+        ]
+
+    error = next(item for item in items if item["type"] == "error")
+    assert error["message"] == "Plan has a dependency cycle: A -> B -> A"
+    assert list(prompts) == [orchestrator_agent.name]
+    assert items[-1] == {"type": "complete"}
+
+
+@pytest.mark.asyncio
+async def test_workers_start_while_plan_streams() -> None:
+    """The first task runs before the planner has finished the plan."""
+    plan = ExecutionPlan(
+        plan_title="Guide",
+        tasks=[
+            SubTask(title="First", description="F", worker_type="W"),
+            SubTask(title="Second", description="S", worker_type="W"),
+        ],
+    )
+    text = plan.model_dump_json()
+    split = text.index("}") + 1
+    first_started = asyncio.Event()
+
+    async def mock_run_agent_standard(
+        agent: BaseAgent,
+        _prompt: str,
+        _app_name: str,
+        **_kwargs: object,
+    ) -> AsyncGenerator[tuple[Any, Any, Any], None]:
+        if agent != orchestrator_agent:
+            first_started.set()
+            chunks = [(f"Output of {agent.name}", True)]
+        else:
+            chunks = [(text[:split], False)]
+        for chunk, final in chunks:
+            event = MagicMock()
+            event.is_final_response.return_value = final
+            event.author = agent.name
+            event.content.parts = [MagicMock(text=chunk)]
+            yield event, None, None
+        if agent == orchestrator_agent:
+            await asyncio.wait_for(first_started.wait(), timeout=1)
+            event = MagicMock()
+            event.is_final_response.return_value = True
+            event.author = agent.name
+            event.content.parts = [MagicMock(text=text)]
+            yield event, None, None
+
+    with patch(
+        "patterns.orchestrator.ui.run_agent_standard",
+        side_effect=mock_run_agent_standard,
+    ):
+        items = [
+            json.loads(chunk.removeprefix("data: "))
+            async for chunk in stream_orchestrator_generator("Write a guide")
+        ]
+
+    plans = [item for item in items if item["type"] == "plan"]
+    assert plans[0]["partial"]
+    assert [t["title"] for t in plans[0]["plan"]["tasks"]] == ["First"]
+    assert [t["title"] for t in plans[-1]["plan"]["tasks"]] == ["First", "Second"]
+    completed = {i["task_id"] for i in items if i["type"] == "worker_complete"}
+    assert completed == {0, 1}
+    assert items[-1] == {"type": "complete"}
+
+
+@pytest.mark.asyncio
+async def test_large_plan_is_synthesized_hierarchically() -> None:
+    """Outputs are combined in groups while the slowest worker still runs."""
+    plan = ExecutionPlan(
+        plan_title="Survey",
+        tasks=[
+            SubTask(title=f"Part {i}", description=str(i), worker_type="W")
+            for i in range(5)
+        ],
+    )
+    calls: list[str] = []
+    prompts: list[str] = []
+
+    async def mock_run_agent_standard(
+        agent: BaseAgent,
+        prompt: str,
+        _app_name: str,
+        **_kwargs: object,
+    ) -> AsyncGenerator[tuple[Any, Any, Any], None]:
+        if agent == orchestrator_agent:
+            text = plan.model_dump_json()
+        elif agent in (partial_synthesizer_agent, synthesizer_agent):
+            calls.append(agent.name)
+            prompts.append(prompt)
+            text = f"Summary {len(prompts)}"
+        else:
+            await asyncio.sleep(0.2 if agent.name == "Part_4" else 0.01)
+            calls.append(f"{agent.name} done")
+            text = f"Output of {agent.name}"
+        event = MagicMock()
+        event.is_final_response.return_value = True
+        event.author = agent.name
+        event.content.parts = [MagicMock(text=text)]
+        yield event, None, None
+
+    with (
+        patch(
+            "patterns.orchestrator.ui.run_agent_standard",
+            side_effect=mock_run_agent_standard,
+        ),
+        patch("patterns.orchestrator.ui.ORCHESTRATOR_HIERARCHICAL_THRESHOLD", 3),
+        patch("patterns.orchestrator.ui.ORCHESTRATOR_SYNTHESIS_GROUP_SIZE", 2),
+    ):
+        items = [
+            json.loads(chunk.removeprefix("data: "))
+            async for chunk in stream_orchestrator_generator("Survey")
+        ]
+
+    # Two pairs of fast workers are combined, then the pairs themselves
+    assert calls.index("PartialSynthesizer") < calls.index("Part_4 done")
+    partials = [item for item in items if item["type"] == "synthesis_partial"]
+    assert sorted(len(item["covers"]) for item in partials) == [2, 2, 4]
+    assert calls[-1] == synthesizer_agent.name
+    final_prompt = prompts[-1]
+    assert "--- Worker: Part 4 ---\nOutput of Part_4" in final_prompt
+    assert final_prompt.count("--- Combined: ") == 1
+    assert "Output of" not in final_prompt.replace("Output of Part_4", "")
+    assert items[-1] == {"type": "complete"}
+
+
+@pytest.mark.asyncio
+async def test_failed_partial_synthesis_falls_back_to_its_parts() -> None:
+    """Outputs a failed combination covered reach the final synthesis as they are."""
+    plan = ExecutionPlan(
+        plan_title="Survey",
+        tasks=[
+            SubTask(title=f"Part {i}", description=str(i), worker_type="W")
+            for i in range(4)
+        ],
+    )
+    prompts: dict[str, str] = {}
+
+    async def mock_run_agent_standard(
+        agent: BaseAgent,
+        prompt: str,
+        _app_name: str,
+        **_kwargs: object,
+    ) -> AsyncGenerator[tuple[Any, Any, Any], None]:
+        prompts[agent.name] = prompt
+        if agent == orchestrator_agent:
+            text = plan.model_dump_json()
+        elif agent == partial_synthesizer_agent:
+            msg = "partial synthesis crashed"
+            raise RuntimeError(msg)
+        else:
+            text = f"Output of {agent.name}"
+        event = MagicMock()
+        event.is_final_response.return_value = True
+        event.author = agent.name
+        event.content.parts = [MagicMock(text=text)]
+        yield event, None, None
+
+    with (
+        patch(
+            "patterns.orchestrator.ui.run_agent_standard",
+            side_effect=mock_run_agent_standard,
+        ),
+        patch("patterns.orchestrator.ui.ORCHESTRATOR_HIERARCHICAL_THRESHOLD", 3),
+        patch("patterns.orchestrator.ui.ORCHESTRATOR_SYNTHESIS_GROUP_SIZE", 2),
+    ):
+        items = [
+            json.loads(chunk.removeprefix("data: "))
+            async for chunk in stream_orchestrator_generator("Survey")
+        ]
+
+    failures = [i for i in items if i["type"] == "synthesis_partial_failed"]
+    assert sorted(len(item["covers"]) for item in failures) == [2, 2]
+    assert failures[0]["message"] == "partial synthesis crashed"
+    assert not any(item["type"] == "error" for item in items)
+    final_prompt = prompts[synthesizer_agent.name]
+    for i in range(4):
+        assert f"--- Worker: Part {i} ---\nOutput of Part_{i}" in final_prompt
+    assert items[-1] == {"type": "complete"}
+
+
+def _unreliable_runner(
+    plan: ExecutionPlan,
+    prompts: dict[str, str],
+) -> Callable[..., AsyncGenerator[tuple[Any, Any, Any], None]]:
+    """Mock run_agent_standard where "Broken" fails and "Slow" hangs."""
+
+    async def mock_run_agent_standard(
+        agent: BaseAgent,
+        prompt: str,
+        _app_name: str,
+        **_kwargs: object,
+    ) -> AsyncGenerator[tuple[Any, Any, Any], None]:
+        prompts[agent.name] = prompt
+        if agent.name == "Broken":
+            msg = "worker crashed"
+            raise RuntimeError(msg)
+        if agent.name == "Slow":
+            await asyncio.sleep(10)
+        event = MagicMock()
+        event.is_final_response.return_value = True
+        event.author = agent.name
+        text = plan.model_dump_json() if agent == orchestrator_agent else "Done"
+        event.content.parts = [MagicMock(text=text)]
+        yield event, None, None
+
+    return mock_run_agent_standard
+
+
+_UNRELIABLE_PLAN = ExecutionPlan(
+    plan_title="Report",
+    tasks=[
+        SubTask(title="Intro", description="I", worker_type="W"),
+        SubTask(title="Broken", description="B", worker_type="W"),
+        SubTask(title="Slow", description="S", worker_type="W"),
+        SubTask(title="After", description="A", worker_type="W", depends_on=["Broken"]),
+    ],
+)
+
+
+@pytest.mark.asyncio
+async def test_failed_and_slow_workers_are_synthesized_around() -> None:
+    """Failures and timeouts are reported and noted as missing sections."""
+    prompts: dict[str, str] = {}
+    with (
+        patch(
+            "patterns.orchestrator.ui.run_agent_standard",
+            side_effect=_unreliable_runner(_UNRELIABLE_PLAN, prompts),
+        ),
+        patch("patterns.orchestrator.ui.ORCHESTRATOR_WORKER_TIMEOUT_SECONDS", 0.1),
+        patch("patterns.orchestrator.ui.ORCHESTRATOR_MIN_COMPLETED_FRACTION", 0.25),
+    ):
+        items = [
+            json.loads(chunk.removeprefix("data: "))
+            async for chunk in stream_orchestrator_generator("Report")
+        ]
+
+    failures = {
+        item["task_id"]: item["reason"]
+        for item in items
+        if item["type"] == "worker_failed"
+    }
+    assert failures == {1: "error", 2: "timeout", 3: "dependency"}
+    assert "After" not in prompts
+    synthesis_prompt = prompts[synthesizer_agent.name]
+    assert "--- Worker: Intro ---\nDone" in synthesis_prompt
+    assert "--- Missing: Broken, Slow, After ---" in synthesis_prompt
+    assert items[-1] == {"type": "complete"}
+
+
+@pytest.mark.asyncio
+async def test_too_few_completed_tasks_is_an_error() -> None:
+    """Below the minimum completed fraction, no synthesis is attempted."""
+    prompts: dict[str, str] = {}
+    with (
+        patch(
+            "patterns.orchestrator.ui.run_agent_standard",
+            side_effect=_unreliable_runner(_UNRELIABLE_PLAN, prompts),
+        ),
+        patch("patterns.orchestrator.ui.ORCHESTRATOR_DEADLINE_SECONDS", 0.1),
+    ):
+        items = [
+            json.loads(chunk.removeprefix("data: "))
+            async for chunk in stream_orchestrator_generator("Report")
+        ]
+
+    error = next(item for item in items if item["type"] == "error")
+    assert error["message"] == (
+        "Only 1 of 4 tasks completed; missing: Broken, Slow, After."
+    )
+    assert synthesizer_agent.name not in prompts
+    assert items[-1] == {"type": "complete"}
+
+
+@pytest.mark.asyncio
+async def test_similar_request_reuses_cached_plan() -> None:
+    """A reworded request skips the planner; a different one does not."""
+    plan = ExecutionPlan(
+        plan_title="Guide",
+        tasks=[SubTask(title="Sights", description="S", worker_type="W")],
+    )
+    planner_calls = 0
+
+    def runner(*args: Any, **kwargs: Any) -> AsyncGenerator[Any]:  # noqa: ANN401
+        nonlocal planner_calls
+        planner_calls += args[0] == orchestrator_agent
+        return _plan_runner(plan, {})(*args, **kwargs)
+
+    hits = PLAN_CACHE_LOOKUPS.value(result="hit")
+    events = []
+    with patch("patterns.orchestrator.ui.run_agent_standard", side_effect=runner):
+        for prompt in ["Travel guide for Tokyo", "Tokyo travel guide", "Kyoto guide"]:
+            items = [
+                json.loads(chunk.removeprefix("data: "))
+                async for chunk in stream_orchestrator_generator(prompt)
+            ]
+            events.append(next(i for i in items if i["type"] == "plan"))
+            assert items[-1] == {"type": "complete"}
+
+    assert planner_calls == 2  # noqa: PLR2004
+    assert events[1]["cached"]
+    assert events[1]["plan"]["tasks"][0]["title"] == "Sights"
+    assert "cached" not in events[2]
+    assert PLAN_CACHE_LOOKUPS.value(result="hit") == hits + 1
+
+
+@pytest.mark.asyncio
+async def test_cached_plan_is_not_reused_for_another_entity() -> None:
+    """A long request differing only in the city it names is planned afresh."""
+    request = (
+        "Write a detailed seven day travel guide for {city} covering temples,"
+        " museums, street food, nightlife, day trips, local transport passes,"
+        " budget hotels and seasonal festivals"
+    )
+    planner_prompts: list[str] = []
+
+    def runner(*args: Any, **kwargs: Any) -> AsyncGenerator[Any]:  # noqa: ANN401
+        city = "Osaka" if "Osaka" in args[1] else "Tokyo"
+        if args[0] == orchestrator_agent:
+            planner_prompts.append(args[1])
+        plan = ExecutionPlan(
+            plan_title=f"{city} Guide",
+            tasks=[
+                SubTask(
+                    title="Sights",
+                    description=f"Temples and museums in {city}",
+                    worker_type="Travel Writer",
+                ),
+            ],
+        )
+        return _plan_runner(plan, {})(*args, **kwargs)
+
+    events = []
+    with patch("patterns.orchestrator.ui.run_agent_standard", side_effect=runner):
+        for city in ["Tokyo", "Osaka"]:
+            items = [
+                json.loads(chunk.removeprefix("data: "))
+                async for chunk in stream_orchestrator_generator(
+                    request.format(city=city),
+                )
+            ]
+            events.append(next(i for i in items if i["type"] == "plan"))
+
+    assert len(planner_prompts) == 2  # noqa: PLR2004
+    assert "cached" not in events[1]
+    assert events[1]["plan"]["plan_title"] == "Osaka Guide"
+
+
+@pytest.mark.asyncio
+async def test_repeated_sub_task_is_replayed_from_cache() -> None:
+    """An identical sub-task replays its events; bypassing the cache reruns it."""
+    plan = ExecutionPlan(
+        plan_title="Guide",
+        tasks=[SubTask(title="Sights", description="List sights", worker_type="W")],
+    )
+    runs: list[str] = []
+
+    def runner(*args: Any, **kwargs: Any) -> AsyncGenerator[Any]:  # noqa: ANN401
+        runs.append(args[0].name)
+        return _plan_runner(plan, {})(*args, **kwargs)
+
+    hits = RESULT_CACHE_LOOKUPS.value(result="hit")
+    completions = []
+    with patch("patterns.orchestrator.ui.run_agent_standard", side_effect=runner):
+        for use_cache in (True, True, False):
+            # A new plan every time, so only the worker result can be reused
+            _PLAN_CACHE.clear()
+            items = [
+                json.loads(chunk.removeprefix("data: "))
+                async for chunk in stream_orchestrator_generator(
+                    "Tokyo guide",
+                    use_cache=use_cache,
+                )
+            ]
+            completions.append(
+                next(i for i in items if i["type"] == "worker_complete"),
+            )
+
+    assert runs.count("Sights") == 2  # noqa: PLR2004
+    assert completions[1]["cached"]
+    assert completions[1]["final"] == completions[0]["final"] == "Output of Sights"
+    assert "cached" not in completions[2]
+    assert RESULT_CACHE_LOOKUPS.value(result="hit") == hits + 1
+
+
+def test_compressor_drops_boilerplate_repeats_and_overflow() -> None:
+    """Pleasantries and lines another output already made are removed."""
+    compressor = OutputCompressor(token_budget=0, dedup_threshold=0.8)
+    first = compressor.compress(
+        "Sure! Here's what I found:\n"
+        "The Senso-ji temple in Asakusa is the oldest temple in Tokyo.\n\n\n"
+        "I hope this helps!"
+    )
+    assert first == "The Senso-ji temple in Asakusa is the oldest temple in Tokyo."
+
+    second = compressor.compress(
+        "Meiji Shrine sits in a forest next to Harajuku station.\n"
+        "The Senso-ji temple in Asakusa is the oldest temple in Tokyo!"
+    )
+    assert second == "Meiji Shrine sits in a forest next to Harajuku station."
+    assert compressor.removed["boilerplate"] > 0
+    assert compressor.removed["duplicate"] > 0
+    assert compressor.tokens_after < compressor.tokens_before
+
+    budgeted = OutputCompressor(token_budget=8, dedup_threshold=0)
+    text = "one two three\nfour five six seven eight nine\nten eleven"
+    assert budgeted.compress(text) == f"one two three\nfour five six\n{TRUNCATION_MARK}"
+    assert budgeted.removed["budget"] > 0
+
+
+def test_compressor_keeps_content_after_stock_openers() -> None:
+    """Only whole stock phrases are boilerplate, not sentences starting like one."""
+    compressor = OutputCompressor(token_budget=0, dedup_threshold=0)
+    lines = [
+        "Of course, prices rose 20% in 2023.",
+        "Certainly the most important factor is cost.",
+        "Sure enough, latency doubled under load.",
+        "Here are the three districts worth visiting:",
+    ]
+    stock = ["Certainly!", "Great question!", "Of course."]
+    assert compressor.compress("\n".join([*lines, *stock])) == "\n".join(lines)
+    assert compressor.removed["boilerplate"] == sum(map(estimate_tokens, stock))
+
+
+@pytest.mark.asyncio
+async def test_worker_outputs_are_compressed_before_synthesis() -> None:
+    """The synthesizer gets compressed outputs and the savings are reported."""
+    plan = ExecutionPlan(
+        plan_title="Guide",
+        tasks=[
+            SubTask(title="Sights", description="S", worker_type="Sights"),
+            SubTask(title="Food", description="F", worker_type="Food"),
+        ],
+    )
+    prompts: dict[str, str] = {}
+    base = _plan_runner(plan, prompts)
+    shared = "Tsukiji Outer Market is the best place for a sushi breakfast."
+
+    async def runner(
+        agent: BaseAgent,
+        prompt: str,
+        app_name: str,
+        **kwargs: object,
+    ) -> AsyncGenerator[tuple[Any, Any, Any], None]:
+        async for event, a, b in base(agent, prompt, app_name, **kwargs):
+            if agent.name in {"Sights", "Food"}:
+                text = f"Certainly!\n{agent.name} notes for the trip.\n{shared}"
+                event.content.parts = [MagicMock(text=text)]
+            yield event, a, b
+
+    removed = COMPRESSION_TOKENS_REMOVED.value(reason="duplicate")
+    with patch("patterns.orchestrator.ui.run_agent_standard", side_effect=runner):
+        items = [
+            json.loads(chunk.removeprefix("data: "))
+            async for chunk in stream_orchestrator_generator("Tokyo guide")
+        ]
+
+    report = next(i for i in items if i["type"] == "compression")
+    assert report["tokens_after"] < report["tokens_before"]
+    assert report["removed"]["boilerplate"] > 0
+    assert COMPRESSION_TOKENS_REMOVED.value(reason="duplicate") > removed
+    assert prompts["Synthesizer"].count(shared) == 1
+    assert "Certainly" not in prompts["Synthesizer"]
+    assert [i["type"] for i in items][-2:] == ["synthesis_complete", "complete"]
+
+
+@pytest.mark.asyncio
+async def test_fair_pool_serves_owners_in_turn() -> None:
+    """Slots go round-robin across owners, and cancelled waiters give way."""
+    pool = FairPool(1)
+    await pool.acquire("busy")
+    order: list[str] = []
+
+    async def take(owner: str) -> None:
+        await pool.acquire(owner)
+        order.append(owner)
+        pool.release()
+
+    waiters = [asyncio.create_task(take(owner)) for owner in ("a", "a", "a", "b")]
+    cancelled = asyncio.create_task(take("c"))
+    await asyncio.sleep(0)
+    assert pool.queued == 5  # noqa: PLR2004
+    cancelled.cancel()
+    await asyncio.sleep(0)
+    pool.release()
+    await asyncio.gather(*waiters)
+
+    assert order == ["a", "b", "a", "a"]
+    assert pool.active == 0
+    assert pool.queued == 0
+
+
+@pytest.mark.asyncio
+async def test_fair_pool_release_skips_cancelled_waiter() -> None:
+    """A slot released while a waiter is being cancelled is not lost."""
+    pool = FairPool(1)
+    await pool.acquire("busy")
+    waiter = asyncio.create_task(pool.acquire("gone"))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    # Released before the cancelled waiter had a chance to withdraw
+    pool.release()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    assert pool.active == 0
+    assert pool.queued == 0
+    await asyncio.wait_for(pool.acquire("next"), timeout=1)
+    assert pool.active == 1
+
+
+@pytest.mark.asyncio
+async def test_fanout_runs_large_plan_through_shared_pool() -> None:
+    """Fan-out workers share the pool; progress replaces their steps."""
+    plan = ExecutionPlan(
+        plan_title="Survey",
+        tasks=[
+            SubTask(title=f"Part {i}", description=f"P{i}", worker_type="W")
+            for i in range(12)
+        ],
+    )
+    prompts: dict[str, str] = {}
+    base = _plan_runner(plan, prompts)
+    pool = FairPool(3)
+    peak = 0
+
+    async def runner(
+        agent: BaseAgent,
+        prompt: str,
+        app_name: str,
+        **kwargs: object,
+    ) -> AsyncGenerator[tuple[Any, Any, Any], None]:
+        nonlocal peak
+        peak = max(peak, pool.active)
+        async for item in base(agent, prompt, app_name, **kwargs):
+            yield item
+
+    with (
+        patch("patterns.orchestrator.ui.run_agent_standard", side_effect=runner),
+        patch("patterns.orchestrator.ui._FANOUT_POOL", pool),
+    ):
+        items = [
+            json.loads(chunk.removeprefix("data: "))
+            async for chunk in stream_orchestrator_generator(
+                "Survey every part",
+                fanout=True,
+            )
+        ]
+
+    types = [item["type"] for item in items]
+    assert fanout_orchestrator_agent.name in prompts
+    assert orchestrator_agent.name not in prompts
+    assert types.count("worker_complete") == 12  # noqa: PLR2004
+    assert "worker_step" not in types
+    assert 0 < peak <= 3  # noqa: PLR2004
+    assert pool.active == 0
+    progress = [item for item in items if item["type"] == "progress"]
+    assert len(progress) == 12  # noqa: PLR2004
+    assert progress[-1] == {
+        "type": "progress",
+        "total": 12,
+        "completed": 12,
+        "failed": 0,
+        "running": 0,
+        "waiting": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_progress_ignores_plan_entries_that_are_not_tasks() -> None:
+    """Entries without a worker are neither waiting nor part of the total."""
+    schedule = _Schedule(max_concurrency=2)
+    for task in ({"title": "A"}, "stray note", {"title": "B"}):
+        schedule.add(task)
+    schedule.results[0].set_result("Output of A")
+    schedule.fail(2, "error", "crashed")
+
+    assert schedule.progress() == {
+        "type": "progress",
+        "total": 2,
+        "completed": 1,
+        "failed": 1,
+        "running": 0,
+        "waiting": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_fanout_drops_tasks_past_the_limit() -> None:
+    """Only the first ORCHESTRATOR_FANOUT_MAX_TASKS tasks of a plan run."""
+    plan = ExecutionPlan(
+        plan_title="Survey",
+        tasks=[
+            SubTask(title=f"Part {i}", description=f"P{i}", worker_type="W")
+            for i in range(5)
+        ],
+    )
+    prompts: dict[str, str] = {}
+    with (
+        patch(
+            "patterns.orchestrator.ui.run_agent_standard",
+            side_effect=_plan_runner(plan, prompts),
+        ),
+        patch("patterns.orchestrator.ui._FANOUT_POOL", FairPool(3)),
+        patch("patterns.orchestrator.ui.ORCHESTRATOR_FANOUT_MAX_TASKS", 3),
+    ):
+        items = [
+            json.loads(chunk.removeprefix("data: "))
+            async for chunk in stream_orchestrator_generator("Survey", fanout=True)
+        ]
+
+    plan_event = next(i for i in items if i["type"] == "plan")
+    assert len(plan_event["plan"]["tasks"]) == 3  # noqa: PLR2004
+    assert {i["task_id"] for i in items if i["type"] == "worker_complete"} == {
+        0,
+        1,
+        2,
+    }
+    assert "Part_3" not in prompts
+    statuses = [i["message"] for i in items if i["type"] == "status"]
+    assert "The plan has 5 tasks; running the first 3 and dropping 2." in statuses
+    assert items[-1] == {"type": "complete"}
@@ -1,213 +1,1142 @@
 """UI integration for the Orchestrator pattern."""
 
 import asyncio
+import copy
+import hashlib
 import json
-from collections.abc import AsyncGenerator
-from contextlib import suppress
+import logging
+import time
+from collections.abc import AsyncGenerator, AsyncIterator, Mapping
+from contextlib import aclosing
 from typing import Any
 
 from fastapi import APIRouter, FastAPI
-from fastapi.responses import StreamingResponse
+from google.adk.agents import LlmAgent, RunConfig
+from google.adk.agents.run_config import StreamingMode
 
+from patterns.cache import SemanticCache, TTLCache, agent_fingerprint
+from patterns.config import (
+    GEMINI_MODEL,
+    ORCHESTRATOR_COMPRESSION,
+    ORCHESTRATOR_COMPRESSION_DEDUP_THRESHOLD,
+    ORCHESTRATOR_DEADLINE_SECONDS,
+    ORCHESTRATOR_FANOUT_MAX_QUEUED_EVENTS,
+    ORCHESTRATOR_FANOUT_MAX_TASKS,
+    ORCHESTRATOR_FANOUT_POOL_SIZE,
+    ORCHESTRATOR_HIERARCHICAL_THRESHOLD,
+    ORCHESTRATOR_MAX_CONCURRENCY,
+    ORCHESTRATOR_MIN_COMPLETED_FRACTION,
+    ORCHESTRATOR_PLAN_CACHE_MAX_ENTRIES,
+    ORCHESTRATOR_PLAN_CACHE_THRESHOLD,
+    ORCHESTRATOR_PLAN_CACHE_TTL_SECONDS,
+    ORCHESTRATOR_RESULT_CACHE_MAX_ENTRIES,
+    ORCHESTRATOR_RESULT_CACHE_TTL_SECONDS,
+    ORCHESTRATOR_SYNTHESIS_GROUP_SIZE,
+    ORCHESTRATOR_WORKER_TIMEOUT_SECONDS,
+    ORCHESTRATOR_WORKER_TOKEN_BUDGET,
+    STREAM_BUFFER_SIZE,
+)
+from patterns.metrics import Counter, Histogram
 from patterns.orchestrator.agent import (
     create_worker_agent,
+    fanout_orchestrator_agent,
     orchestrator_agent,
+    partial_synthesizer_agent,
     synthesizer_agent,
 )
+from patterns.orchestrator.compression import OutputCompressor, estimate_tokens
+from patterns.orchestrator.dag import (
+    describe_cycle,
+    find_cycle,
+    resolve_dependencies,
+    unknown_dependencies,
+)
+from patterns.orchestrator.pool import FairPool
+from patterns.scheduler import Priority, set_priority
+from patterns.similarity import term_vector
+from patterns.tracing import tracer
 from patterns.utils import (
+    EventStreamResponse,
+    IncrementalJsonParser,
+    Overflow,
     PatternConfig,
     PatternMetadata,
+    cancel_tasks,
+    coalesce_stream,
     configure_pattern,
+    instrument_stream,
+    merge_streams,
     parse_json_from_text,
     run_agent_standard,
 )
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
+PLAN_CACHE_LOOKUPS = Counter(
+    "adp_orchestrator_plan_cache_lookups_total",
+    "Orchestrator plan cache lookups, by result (hit or miss).",
+    ("result",),
+)
+PLAN_CACHE_SAVED_SECONDS = Histogram(
+    "adp_orchestrator_plan_cache_saved_seconds",
+    "Planning time saved by plan cache hits, as taken by the cached plan.",
+)
+RESULT_CACHE_LOOKUPS = Counter(
+    "adp_orchestrator_result_cache_lookups_total",
+    "Orchestrator sub-task result cache lookups, by result (hit or miss).",
+    ("result",),
+)
+COMPRESSION_TOKENS_REMOVED = Counter(
+    "adp_orchestrator_compression_tokens_removed_total",
+    "Estimated worker output tokens removed before synthesis, by reason.",
+    ("reason",),
+)
+SYNTHESIS_SECONDS = Histogram(
+    "adp_orchestrator_synthesis_seconds",
+    "Duration of the final synthesis call, by whether its inputs were compressed.",
+    ("compressed",),
+)
+FANOUT_POOL_WAIT_SECONDS = Histogram(
+    "adp_orchestrator_fanout_pool_wait_seconds",
+    "Time fan-out workers, ready to run, waited for a slot of the shared pool.",
+)
+
+# The planner streams its output so workers can start before it is done
+_STREAMING = RunConfig(streaming_mode=StreamingMode.SSE)
+
+# Plans of recent requests, reused for similarly worded ones
+_PLAN_CACHE = SemanticCache(
+    ORCHESTRATOR_PLAN_CACHE_MAX_ENTRIES,
+    ORCHESTRATOR_PLAN_CACHE_TTL_SECONDS,
+    ORCHESTRATOR_PLAN_CACHE_THRESHOLD,
+)
+
+# Worker slots shared by the requests in large fan-out mode
+_FANOUT_POOL = FairPool(ORCHESTRATOR_FANOUT_POOL_SIZE)
+
+# Worker step texts and final output, by sub-task and request context
+_RESULT_CACHE = TTLCache(
+    ORCHESTRATOR_RESULT_CACHE_MAX_ENTRIES,
+    ORCHESTRATOR_RESULT_CACHE_TTL_SECONDS,
+)
+
 
-async def run_worker_to_queue(
+async def run_worker_stream(
     worker_name: str,
     worker_instruction: str,
     user_request: str,
-    queue: asyncio.Queue,
     task_id: int,
-) -> str:
-    """Run a specialized worker and stream its progress."""
+    upstream: list[tuple[str, str]] | None = None,
+) -> AsyncGenerator[dict[str, Any]]:
+    """Run a specialized worker and stream its progress events.
+
+    Args:
+        worker_name: Title of the sub-task, used to name the worker.
+        worker_instruction: Description of the sub-task.
+        user_request: The original user request.
+        task_id: Position of the sub-task in the plan.
+        upstream: Titles and outputs of the tasks this one depends on.
+
+    """
     full_text = ""
     worker = create_worker_agent(worker_name, worker_instruction)
 
     # Notify that worker has started
-    await queue.put({"type": "worker_start", "task_id": task_id, "name": worker_name})
+    yield {"type": "worker_start", "task_id": task_id, "name": worker_name}
+
+    prompt = f"Original Request: {user_request}\n\n"
+    if upstream:
+        prompt += "Results of the tasks this one builds on:\n"
+        for title, output in upstream:
+            prompt += f"--- {title} ---\n{output}\n\n"
+    prompt += f"Your specific task: {worker_instruction}"
+
+    with tracer.start_as_current_span(
+        "orchestrator.worker",
+        attributes={"task_id": task_id, "worker.name": worker_name},
+    ):
+        async for event, _, _ in run_agent_standard(
+            worker, prompt, f"worker_{task_id}"
+        ):
+            if event.content and event.content.parts:
+                part_text = event.content.parts[0].text
+                if part_text:
+                    full_text += part_text
+                    yield {
+                        "type": "worker_step",
+                        "task_id": task_id,
+                        "content": part_text,
+                    }
+
+    # The final text travels with the completion event, which is never dropped
+    yield {"type": "worker_complete", "task_id": task_id, "final": full_text}
+
+
+def _plan_fits(
+    vector: Mapping[str, float],
+    cached_vector: Mapping[str, float],
+    cached: tuple[dict[str, Any], float],
+) -> bool:
+    """Tell whether a plan cached for a similar request fits this one.
+
+    Requests can differ in a single word that changes what they are about,
+    such as a city. The content words the two requests do not share must
+    therefore not appear in the cached plan's titles, descriptions and
+    worker types, or the plan would be about the other request.
+    """
+    plan, _ = cached
+    tasks = plan.get("tasks", [])
+    fields = [str(plan.get("plan_title", ""))] + [
+        str(task.get(field, ""))
+        for task in tasks
+        if isinstance(task, dict)
+        for field in ("title", "description", "worker_type")
+    ]
+    differing = set(vector) ^ set(cached_vector)
+    return not differing & term_vector(" ".join(fields)).keys()
+
 
-    prompt = (
-        f"Original Request: {user_request}\n\nYour specific task: {worker_instruction}"
+def _cached_plan(namespace: str, vector: dict[str, float]) -> dict[str, Any] | None:
+    """Return a "plan" event from the plan cache, or None on a miss."""
+    if _PLAN_CACHE.max_entries <= 0:
+        return None
+    cached = _PLAN_CACHE.get(
+        namespace,
+        vector,
+        lambda cached_vector, value: _plan_fits(vector, cached_vector, value),
     )
+    if cached is None:
+        PLAN_CACHE_LOOKUPS.inc(result="miss")
+        return None
+    (plan, planning_seconds), similarity = cached
+    PLAN_CACHE_LOOKUPS.inc(result="hit")
+    PLAN_CACHE_SAVED_SECONDS.observe(planning_seconds)
+    return {
+        "type": "plan",
+        "plan": copy.deepcopy(plan),
+        "cached": True,
+        "similarity": round(similarity, 3),
+    }
 
-    async for event, _, _ in run_agent_standard(worker, prompt, f"worker_{task_id}"):
-        if event.content and event.content.parts:
-            part_text = event.content.parts[0].text
-            if part_text:
-                full_text += part_text
-                await queue.put(
-                    {"type": "worker_step", "task_id": task_id, "content": part_text},
-                )
 
-    await queue.put({"type": "worker_complete", "task_id": task_id, "final": full_text})
-    return full_text
+async def _stream_plan(
+    user_request: str,
+    *,
+    use_cache: bool = True,
+    planner: LlmAgent = orchestrator_agent,
+) -> AsyncGenerator[dict[str, Any]]:
+    """Run the planner, yielding the plan while it is being written.
 
+    The plan's JSON is parsed as it streams: a partial "plan" event is
+    yielded as soon as new sub-tasks are complete, then the complete plan,
+    or an error event if no plan could be parsed.
 
-async def _generate_plan(user_request: str) -> dict[str, Any] | None:
-    """Generate the execution plan."""
-    plan_json = None
-    async for event, _, _ in run_agent_standard(
-        orchestrator_agent,
-        user_request,
-        "orchestrator_plan",
-    ):
-        if (
-            event.is_final_response()
-            and event.author == orchestrator_agent.name
-            and event.content
-            and event.content.parts
+    The plan of a similarly worded earlier request (by the same planner) is
+    reused if the plan cache has one, skipping the planner, unless use_cache
+    is False.
+    """
+    namespace = agent_fingerprint(planner)
+    vector = term_vector(user_request)
+    cached = _cached_plan(namespace, vector) if use_cache else None
+    if cached is not None:
+        yield cached
+        return
+
+    started = time.monotonic()
+    parser = IncrementalJsonParser()
+    tasks: list[Any] = []
+    final_text = ""
+    with tracer.start_as_current_span("orchestrator.plan"):
+        async for event, _, _ in run_agent_standard(
+            planner,
+            user_request,
+            "orchestrator_plan",
+            run_config=_STREAMING,
         ):
-            # When output_schema is used, the final event's text is the JSON
+            if not (
+                event.author == planner.name and event.content and event.content.parts
+            ):
+                continue
             text = "".join(p.text for p in event.content.parts if p.text)
-            if text:
-                plan_json = parse_json_from_text(text)
+            chunk = text
+            if event.is_final_response():
+                # The final event repeats the whole text; feed what partial
+                # events did not (all of it when the model did not stream)
+                final_text = text
+                chunk = text[len(parser.text) :] if text.startswith(parser.text) else ""
+            new_tasks = [task for field, task in parser.feed(chunk) if field == "tasks"]
+            if new_tasks:
+                tasks.extend(new_tasks)
+                partial = {
+                    "plan_title": parser.fields.get("plan_title", ""),
+                    "tasks": list(tasks),
+                }
+                yield {"type": "plan", "plan": partial, "partial": True}
+
+    plan = parse_json_from_text(final_text or parser.text)
+    if isinstance(plan, dict) and isinstance(plan.get("tasks"), list) and tasks:
+        planning_seconds = time.monotonic() - started
+        _PLAN_CACHE.put(namespace, vector, (copy.deepcopy(plan), planning_seconds))
+    if not isinstance(plan, dict) and tasks:
+        # Keep the tasks that streamed in even if the end of the plan is broken
+        plan = {"plan_title": parser.fields.get("plan_title", ""), "tasks": tasks}
+    if not isinstance(plan, dict):
+        yield {"type": "error", "message": "Failed to generate plan."}
+        return
+    if not isinstance(plan.get("tasks"), list):
+        plan["tasks"] = []
+    yield {"type": "plan", "plan": plan}
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _result_key(
+    task: dict[str, Any],
+    user_request: str,
+    upstream: list[tuple[str, str]],
+) -> str:
+    """Address a sub-task's output by what determines it.
+
+    That is the task's title, description and worker type, the original
+    request (all compared ignoring case and spacing), the outputs of the
+    tasks it builds on and the worker model.
+    """
+    payload = {
+        "task": [
+            _normalize(str(task.get(field, "")))
+            for field in ("title", "description", "worker_type")
+        ],
+        "request": _normalize(user_request),
+        "upstream": upstream,
+        "model": GEMINI_MODEL,
+    }
+    return hashlib.sha256(json.dumps(payload).encode()).hexdigest()
+
+
+async def _cached_worker_stream(
+    task: dict[str, Any],
+    task_id: int,
+    user_request: str,
+    upstream: list[tuple[str, str]],
+    *,
+    use_cache: bool = True,
+) -> AsyncGenerator[dict[str, Any]]:
+    """Run a sub-task's worker, or replay its cached events.
+
+    The outputs of complete runs are cached. A hit replays the worker's
+    start, steps and completion, marked "cached", without a model call;
+    use_cache=False skips the lookup but still caches the fresh output.
+    """
+    key = _result_key(task, user_request, upstream)
+    title = str(task.get("title", f"Task {task_id}"))
+    cached = _RESULT_CACHE.get(key) if use_cache else None
+    if use_cache and _RESULT_CACHE.max_entries > 0:
+        RESULT_CACHE_LOOKUPS.inc(result="miss" if cached is None else "hit")
+    if cached is not None:
+        steps, final = cached
+        yield {
+            "type": "worker_start",
+            "task_id": task_id,
+            "name": title,
+            "cached": True,
+        }
+        for content in steps:
+            yield {"type": "worker_step", "task_id": task_id, "content": content}
+        yield {
+            "type": "worker_complete",
+            "task_id": task_id,
+            "final": final,
+            "cached": True,
+        }
+        return
+
+    steps: list[str] = []
+    async for item in run_worker_stream(
+        title,
+        task.get("description", ""),
+        user_request,
+        task_id,
+        upstream,
+    ):
+        if item["type"] == "worker_step":
+            steps.append(item["content"])
+        elif item["type"] == "worker_complete":
+            _RESULT_CACHE.put(key, (steps, item["final"]))
+        yield item
+
+
+def _deadline(seconds: float) -> float | None:
+    """Return the event loop time seconds from now, or None if seconds <= 0."""
+    return asyncio.get_running_loop().time() + seconds if seconds > 0 else None
+
+
+async def _next_before(
+    stream: AsyncIterator[dict[str, Any]],
+    deadline: float | None,
+) -> dict[str, Any]:
+    """Await the next item of stream, raising TimeoutError at deadline.
+
+    Only the wait for the item is bounded, never the consumer's handling of
+    it, so the timeout cannot fire outside of the stream.
+    """
+    async with asyncio.timeout_at(deadline):
+        return await anext(stream)
+
+
+class _Schedule:
+    """Tasks and shared state of one worker phase, as the plan streams in.
+
+    With a pool (large fan-out mode), workers also need one of its slots to
+    run, and worker steps are left out in favour of "progress" events.
+    With max_tasks, plan entries past the first max_tasks are not run.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        max_concurrency: int,
+        deadline_seconds: float = 0,
+        worker_timeout_seconds: float = 0,
+        *,
+        use_cache: bool = True,
+        pool: FairPool | None = None,
+        max_tasks: int = 0,
+    ) -> None:
+        self.tasks: list[Any] = []
+        # The output of each task, or None if it did not complete
+        self.results: dict[int, asyncio.Future[str | None]] = {}
+        self.waves: dict[int, int] = {}
+        self.planned = asyncio.Event()
+        self.slots = asyncio.Semaphore(max(max_concurrency, 1))
+        self.pool = pool
+        self.running: set[int] = set()
+        self.began = time.monotonic()
+        self.deadline = _deadline(deadline_seconds)
+        self.worker_timeout_seconds = worker_timeout_seconds
+        self.use_cache = use_cache
+        self.max_tasks = max_tasks
+
+    def limit(self, event: dict[str, Any]) -> tuple[dict[str, Any], int]:
+        """Cut a "plan" event to max_tasks tasks; return it and the number cut."""
+        tasks = event["plan"]["tasks"]
+        if not self.max_tasks or len(tasks) <= self.max_tasks:
+            return event, 0
+        plan = {**event["plan"], "tasks": tasks[: self.max_tasks]}
+        return {**event, "plan": plan}, len(tasks) - self.max_tasks
+
+    def add(self, task: Any) -> int:  # noqa: ANN401
+        """Append a task of the plan and return its id (its position)."""
+        self.tasks.append(task)
+        task_id = len(self.tasks) - 1
+        self.results[task_id] = asyncio.get_running_loop().create_future()
+        return task_id
+
+    def title(self, task_id: int) -> str:
+        """Return the title of a task."""
+        return str(self.tasks[task_id].get("title", f"Task {task_id}"))
+
+    async def dependencies(self, task_id: int) -> list[int]:
+        """Resolve a task's dependencies.
+
+        A task naming tasks that are not planned yet waits for the complete
+        plan; unknown names are then ignored.
+        """
+        if not self.planned.is_set() and unknown_dependencies(self.tasks, task_id):
+            await self.planned.wait()
+        return resolve_dependencies(self.tasks)[task_id]
+
+    async def acquire(self) -> None:
+        """Wait for a slot of this request, then of the pool if any."""
+        await self.slots.acquire()
+        if self.pool is None:
+            return
+        started = time.monotonic()
+        try:
+            await self.pool.acquire(self)
+        except BaseException:
+            self.slots.release()
+            raise
+        FANOUT_POOL_WAIT_SECONDS.observe(time.monotonic() - started)
+
+    def release(self) -> None:
+        """Return the slots taken by acquire."""
+        if self.pool is not None:
+            self.pool.release()
+        self.slots.release()
+
+    def progress(self) -> dict[str, Any]:
+        """Return a "progress" event counting the tasks in each state.
+
+        Plan entries that are not tasks (not objects) get no worker and are
+        not counted.
+        """
+        task_ids = [i for i, task in enumerate(self.tasks) if isinstance(task, dict)]
+        done = [self.results[i].result() for i in task_ids if self.results[i].done()]
+        completed = sum(output is not None for output in done)
+        return {
+            "type": "progress",
+            "total": len(task_ids),
+            "completed": completed,
+            "failed": len(done) - completed,
+            "running": len(self.running),
+            "waiting": len(task_ids) - len(done) - len(self.running),
+        }
+
+    def worker_deadline(self) -> float | None:
+        """Return when a worker starting now must be done by."""
+        timeout = _deadline(self.worker_timeout_seconds)
+        if timeout is None or self.deadline is None:
+            return timeout or self.deadline
+        return min(timeout, self.deadline)
+
+    def fail(self, task_id: int, reason: str, message: str) -> dict[str, Any]:
+        """Record that a task did not complete and return its event."""
+        if not self.results[task_id].done():
+            self.results[task_id].set_result(None)
+        return {
+            "type": "worker_failed",
+            "task_id": task_id,
+            "reason": reason,
+            "message": message,
+        }
+
+
+async def _announce(event: dict[str, Any]) -> AsyncGenerator[dict[str, Any]]:
+    yield event
+
+
+async def _guarded_worker(
+    stream: AsyncGenerator[dict[str, Any]],
+    task_id: int,
+    deadline: float | None,
+) -> AsyncGenerator[dict[str, Any]]:
+    """Stream a worker's events, turning its failure or timeout into an event.
+
+    A worker still running at deadline is cancelled. Either way the stream
+    ends with a "worker_failed" event instead of raising.
+    """
+    async with aclosing(stream):
+        while True:
+            try:
+                item = await _next_before(stream, deadline)
+            except StopAsyncIteration:
+                return
+            except Exception as e:
+                loop_time = asyncio.get_running_loop().time()
+                if deadline is not None and loop_time >= deadline:
+                    reason, message = "timeout", "Did not finish in time"
+                else:
+                    reason, message = "error", str(e) or type(e).__name__
+                    logger.warning("Worker %s failed", task_id, exc_info=e)
+                yield {
+                    "type": "worker_failed",
+                    "task_id": task_id,
+                    "reason": reason,
+                    "message": message,
+                }
+                return
+            yield item
+
+
+async def _await_upstream(
+    task_id: int,
+    schedule: _Schedule,
+) -> tuple[list[int], list[tuple[str, str | None]]]:
+    """Wait for a task's dependencies, returning them with their outputs."""
+    depends_on = await schedule.dependencies(task_id)
+    upstream = [(schedule.title(d), await schedule.results[d]) for d in depends_on]
+    return depends_on, upstream
+
+
+async def _run_scheduled_worker(
+    task_id: int,
+    user_request: str,
+    schedule: _Schedule,
+    announce: dict[str, Any] | None = None,
+) -> AsyncGenerator[dict[str, Any]]:
+    """Run one worker once its dependencies are done and a slot is free.
+
+    The plan event that introduced the task, if given, is yielded first, so
+    that it always precedes the worker's own events. Timing fields, relative
+    to the start of the worker phase, are added to the worker's start and
+    completion events.
+
+    A task ends with a "worker_failed" event instead if its worker fails or
+    times out, if a task it depends on did not complete, or if the request
+    deadline passes before it could start.
 
-    if isinstance(plan_json, dict):
-        return plan_json
-    return None
+    In fan-out mode, worker steps are not passed on.
+    """
+    if announce is not None:
+        yield announce
+    try:
+        async with asyncio.timeout_at(schedule.deadline):
+            depends_on, upstream = await _await_upstream(task_id, schedule)
+            missing = [title for title, output in upstream if output is None]
+            ready = time.monotonic()
+            if not missing:
+                await schedule.acquire()
+    except TimeoutError:
+        yield schedule.fail(task_id, "timeout", "Not started before the deadline")
+        return
+    if missing:
+        message = f"Depends on unfinished tasks: {', '.join(missing)}"
+        yield schedule.fail(task_id, "dependency", message)
+        return
+
+    schedule.waves[task_id] = max(
+        (schedule.waves[d] + 1 for d in depends_on), default=0
+    )
+    task = schedule.tasks[task_id]
+    schedule.running.add(task_id)
+    try:
+        started = time.monotonic()
+        worker = _cached_worker_stream(
+            task,
+            task_id,
+            user_request,
+            [(title, output or "") for title, output in upstream],
+            use_cache=schedule.use_cache,
+        )
+        item: dict[str, Any]
+        async for item in _guarded_worker(worker, task_id, schedule.worker_deadline()):
+            if item["type"] == "worker_step" and schedule.pool is not None:
+                continue
+            if item["type"] == "worker_start":
+                item = {  # noqa: PLW2901
+                    **item,
+                    "wave": schedule.waves[task_id],
+                    "depends_on": depends_on,
+                    "started_ms": round((started - schedule.began) * 1000),
+                    "waited_ms": round((started - ready) * 1000),
+                }
+            elif item["type"] in {"worker_complete", "worker_failed"}:
+                item = {  # noqa: PLW2901
+                    **item,
+                    "duration_ms": round((time.monotonic() - started) * 1000),
+                }
+                schedule.running.discard(task_id)
+                if item["type"] == "worker_complete":
+                    schedule.results[task_id].set_result(item["final"])
+                else:
+                    schedule.fail(task_id, item["reason"], item["message"])
+            yield item
+    finally:
+        schedule.running.discard(task_id)
+        schedule.release()
+
+
+async def _plan_before(
+    plan_events: AsyncGenerator[dict[str, Any]],
+    deadline: float | None,
+) -> AsyncGenerator[dict[str, Any]]:
+    """Pass plan events through until the plan is complete or deadline passes."""
+    async with aclosing(plan_events):
+        while True:
+            try:
+                yield await _next_before(plan_events, deadline)
+            except StopAsyncIteration:
+                return
+            except TimeoutError:
+                message = "Planning did not finish in time"
+                yield {"type": "status", "message": message}
+                return
+
+
+async def _worker_sources(
+    plan_events: AsyncGenerator[dict[str, Any]],
+    user_request: str,
+    schedule: _Schedule,
+) -> AsyncGenerator[AsyncIterator[dict[str, Any]]]:
+    """Produce a worker stream for each sub-task as soon as it is planned.
+
+    Plan events travel in the stream of the first task they introduce, or
+    alone. Once the plan is complete, a dependency cycle is reported as an
+    error event. Planning stops at the request deadline, keeping the tasks
+    planned so far. Tasks past the schedule's limit are dropped from the plan
+    events, and a status event after the complete plan says how many.
+    """
+    async for planned in _plan_before(plan_events, schedule.deadline):
+        event = planned
+        dropped = 0
+        if event["type"] == "plan":
+            event, dropped = schedule.limit(event)
+        announce: dict[str, Any] | None = event
+        if event["type"] == "plan":
+            for task in event["plan"]["tasks"][len(schedule.tasks) :]:
+                task_id = schedule.add(task)
+                if isinstance(task, dict):
+                    yield _run_scheduled_worker(
+                        task_id,
+                        user_request,
+                        schedule,
+                        announce,
+                    )
+                    announce = None
+        if announce is not None:
+            yield _announce(announce)
+        if dropped and not event.get("partial"):
+            message = (
+                f"The plan has {schedule.max_tasks + dropped} tasks; running the "
+                f"first {schedule.max_tasks} and dropping {dropped}."
+            )
+            yield _announce({"type": "status", "message": message})
+
+    schedule.planned.set()
+    cycle = find_cycle(resolve_dependencies(schedule.tasks))
+    if cycle is not None:
+        message = (
+            f"Plan has a dependency cycle: {describe_cycle(schedule.tasks, cycle)}"
+        )
+        yield _announce({"type": "error", "message": message})
 
 
 async def _execute_workers(
-    tasks_list: list[dict[str, Any]],
+    plan_events: AsyncGenerator[dict[str, Any]],
     user_request: str,
-    queue: asyncio.Queue,
-) -> list[str]:
-    """Execute workers in parallel."""
-    tasks = []
-    for i, task in enumerate(tasks_list):
-        if not isinstance(task, dict):
-            continue
-        tasks.append(
-            asyncio.create_task(
-                run_worker_to_queue(
-                    task.get("title", f"Task {i}"),
-                    task.get("description", ""),
-                    user_request,
-                    queue,
-                    i,
+    *,
+    use_cache: bool = True,
+    fanout: bool = False,
+) -> AsyncGenerator[dict[str, Any]]:
+    """Execute the workers of a streamed plan as a dependency graph.
+
+    Each worker starts as soon as its task is planned and the tasks it
+    depends on are complete, with their outputs in its prompt, and at most
+    ORCHESTRATOR_MAX_CONCURRENCY workers run at once. The plan events are
+    passed through, ahead of the events of the workers they introduce.
+
+    Failing workers, and workers still running past the request deadline
+    (ORCHESTRATOR_DEADLINE_SECONDS) or their own timeout
+    (ORCHESTRATOR_WORKER_TIMEOUT_SECONDS), end with a "worker_failed" event
+    rather than aborting the request.
+
+    The UI only uses worker steps as a liveness signal, so when the client
+    falls behind, buffered steps are dropped rather than piling up.
+
+    In large fan-out mode, workers also share the process-wide pool of
+    ORCHESTRATOR_FANOUT_POOL_SIZE slots with the other fan-out requests, and
+    only the first ORCHESTRATOR_FANOUT_MAX_TASKS tasks run. Worker steps are
+    left out, a "progress" event follows every worker's
+    completion or failure, and at most ORCHESTRATOR_FANOUT_MAX_QUEUED_EVENTS
+    events are buffered: beyond that, workers wait for the client.
+    """
+    schedule = _Schedule(
+        ORCHESTRATOR_MAX_CONCURRENCY,
+        ORCHESTRATOR_DEADLINE_SECONDS,
+        ORCHESTRATOR_WORKER_TIMEOUT_SECONDS,
+        use_cache=use_cache,
+        pool=_FANOUT_POOL if fanout else None,
+        max_tasks=ORCHESTRATOR_FANOUT_MAX_TASKS if fanout else 0,
+    )
+
+    # Worker tasks inherit this span as their parent
+    with tracer.start_as_current_span("orchestrator.workers") as span:
+        async with aclosing(
+            merge_streams(
+                _worker_sources(plan_events, user_request, schedule),
+                max_buffer=(
+                    ORCHESTRATOR_FANOUT_MAX_QUEUED_EVENTS
+                    if fanout
+                    else STREAM_BUFFER_SIZE
                 ),
+                overflow=Overflow.DROP,
+                droppable=lambda item: item["type"] == "worker_step",
             ),
-        )
+        ) as events:
+            async for item in events:
+                yield item
+                if fanout and item["type"] in {"worker_complete", "worker_failed"}:
+                    yield schedule.progress()
+        span.set_attribute("worker_count", len(schedule.tasks))
+        span.set_attribute("wave_count", max(schedule.waves.values(), default=-1) + 1)
 
-    try:
-        # Wait for all workers to complete
-        results = await asyncio.gather(*tasks)
-        return list(results)
-    finally:
-        # Signal the stream generator that worker phase is done
-        await queue.put(None)
 
+# Titles of the workers a synthesis input covers, and its text
+_Part = tuple[list[str], str]
 
-async def _synthesize_results(
+
+def _synthesis_prompt(
     user_request: str,
-    worker_outputs: list[str],
-    tasks_list: list[dict[str, Any]],
-) -> AsyncGenerator[str, None]:
-    """Synthesize worker outputs into a final response."""
-    synth_prompt = f"Original Request: {user_request}\n\n"
-    for i, output in enumerate(worker_outputs):
-        if i < len(tasks_list) and isinstance(tasks_list[i], dict):
-            title = tasks_list[i].get("title", f"Worker {i}")
+    parts: list[_Part],
+    missing: list[str] | None = None,
+) -> str:
+    prompt = f"Original Request: {user_request}\n\n"
+    for titles, text in parts:
+        if len(titles) == 1:
+            prompt += f"--- Worker: {titles[0]} ---\n{text}\n\n"
         else:
-            title = f"Worker {i}"
-        synth_prompt += f"--- Worker: {title} ---\n{output}\n\n"
+            prompt += f"--- Combined: {', '.join(titles)} ---\n{text}\n\n"
+    if missing:
+        prompt += (
+            f"--- Missing: {', '.join(missing)} ---\n"
+            "These tasks did not finish, so their results are not available. "
+            "Say which parts of the request are not covered instead of filling "
+            "them in.\n\n"
+        )
+    return prompt
+
 
-    async for event, _, _ in run_agent_standard(
-        synthesizer_agent,
-        synth_prompt,
-        "synthesis",
+async def _combine(user_request: str, parts: list[_Part], level: int) -> _Part:
+    """Merge a group of synthesis inputs into one with the partial synthesizer."""
+    titles = [title for part_titles, _ in parts for title in part_titles]
+    text = ""
+    with tracer.start_as_current_span(
+        "orchestrator.synthesize.partial",
+        attributes={"level": level, "input_count": len(parts)},
     ):
-        if event.content and event.content.parts:
-            part_text = event.content.parts[0].text
-            if part_text:
-                data = {"type": "synthesis_step", "content": part_text}
-                yield f"data: {json.dumps(data)}\n\n"
+        async for event, _, _ in run_agent_standard(
+            partial_synthesizer_agent,
+            _synthesis_prompt(user_request, parts),
+            f"synthesis_level_{level}",
+        ):
+            if event.content and event.content.parts:
+                text += event.content.parts[0].text or ""
+    return titles, text
 
 
-async def stream_orchestrator_generator(user_request: str) -> AsyncGenerator[str, None]:
-    """Orchestration loop: Plan -> Parallel Workers -> Synthesis."""
-    queue: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue()
+class _SynthesisTree:
+    """Inputs of the final synthesis, reduced as workers complete.
 
-    # 1. Planning phase
-    data = {"type": "status", "message": "Planning the orchestration..."}
-    yield f"data: {json.dumps(data)}\n\n"
+    Once the plan has more than threshold tasks, worker outputs are combined
+    in groups of group_size, in the order they complete, and the combined
+    parts in turn once group_size of them are done, so the reduction runs
+    while workers are still busy. Each combination queues a
+    "synthesis_partial" event. A combination that fails queues a
+    "synthesis_partial_failed" event instead, and its parts go to the final
+    synthesis uncombined. Smaller plans are synthesized in one call.
 
-    # Run planning directly (it's sequential)
-    plan_json = await _generate_plan(user_request)
+    With a compressor, outputs are compressed as they are recorded.
+    """
 
-    if not isinstance(plan_json, dict):
-        error_msg = json.dumps({"type": "error", "message": "Failed to generate plan."})
-        yield f"data: {error_msg}\n\n"
-        complete_msg = json.dumps({"type": "complete"})
-        yield f"data: {complete_msg}\n\n"
-        return
+    def __init__(
+        self,
+        user_request: str,
+        threshold: int,
+        group_size: int,
+        compressor: OutputCompressor | None = None,
+    ) -> None:
+        self.user_request = user_request
+        self.compressor = compressor
+        self.threshold = threshold
+        self.group_size = max(group_size, 2)
+        self.hierarchical = False
+        self.tasks: list[Any] = []
+        self.outputs: dict[int, str] = {}
+        self.levels: list[list[_Part]] = [[]]
+        self.uncombined: list[_Part] = []
+        self.running: set[asyncio.Task[None]] = set()
+        self.events: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+        self.pending = 0
 
-    yield f"data: {json.dumps({'type': 'plan', 'plan': plan_json})}\n\n"
+    def _title(self, task_id: int) -> str:
+        task = self.tasks[task_id] if task_id < len(self.tasks) else None
+        if isinstance(task, dict):
+            return str(task.get("title", f"Worker {task_id}"))
+        return f"Worker {task_id}"
 
-    # 2. Worker phase
-    tasks_list = plan_json.get("tasks", [])
-    if not isinstance(tasks_list, list):
-        tasks_list = []
+    def update_plan(self, tasks: list[Any]) -> None:
+        """Track the plan; the plan only grows, so the mode is chosen once."""
+        self.tasks = tasks
+        if not self.hierarchical and len(tasks) > self.threshold:
+            self.hierarchical = True
+            for task_id, output in self.outputs.items():
+                self._add(([self._title(task_id)], output))
 
-    # Execute workers (runs in background, we consume queue)
-    # We need to run _execute_workers but it returns *results*.
-    # The queue is populated as side-effect.
-    # We need to run it in background to consume queue concurrently.
+    def complete(self, task_id: int, output: str) -> None:
+        """Record a worker's output."""
+        if self.compressor is not None:
+            output = self.compressor.compress(output)
+        self.outputs[task_id] = output
+        if self.hierarchical:
+            self._add(([self._title(task_id)], output))
 
-    worker_task = asyncio.create_task(_execute_workers(tasks_list, user_request, queue))
-    workers_completed = False
+    @property
+    def missing(self) -> list[str]:
+        """Titles of the planned tasks that did not complete, in plan order."""
+        return [
+            self._title(task_id)
+            for task_id, task in enumerate(self.tasks)
+            if isinstance(task, dict) and task_id not in self.outputs
+        ]
 
-    # Consume queue
-    try:
+    def shortfall(self, min_fraction: float) -> str | None:
+        """Return why synthesis should not proceed, if too few tasks completed."""
+        planned = sum(isinstance(task, dict) for task in self.tasks)
+        if planned and len(self.outputs) < min_fraction * planned:
+            return (
+                f"Only {len(self.outputs)} of {planned} tasks completed; "
+                f"missing: {', '.join(self.missing)}."
+            )
+        return None
+
+    def _add(self, part: _Part, level: int = 0) -> None:
+        while len(self.levels) <= level:
+            self.levels.append([])
+        self.levels[level].append(part)
+        if len(self.levels[level]) >= self.group_size:
+            group = self.levels[level][: self.group_size]
+            del self.levels[level][: self.group_size]
+            self._spawn(group, level + 1)
+
+    def _spawn(self, group: list[_Part], level: int) -> None:
+        self.pending += 1
+        task = asyncio.create_task(self._reduce(group, level))
+        self.running.add(task)
+        task.add_done_callback(self.running.discard)
+
+    async def _reduce(self, group: list[_Part], level: int) -> None:
+        try:
+            part = await _combine(self.user_request, group, level)
+        except Exception as e:
+            logger.warning("Partial synthesis at level %s failed", level, exc_info=e)
+            self.uncombined.extend(group)
+            self.events.put_nowait(
+                {
+                    "type": "synthesis_partial_failed",
+                    "level": level,
+                    "covers": [title for titles, _ in group for title in titles],
+                    "message": str(e) or type(e).__name__,
+                },
+            )
+            return
+        self._add(part, level)
+        self.events.put_nowait(
+            {"type": "synthesis_partial", "level": level, "covers": part[0]},
+        )
+
+    def _take(self, item: dict[str, Any]) -> dict[str, Any]:
+        self.pending -= 1
+        return item
+
+    def ready(self) -> list[dict[str, Any]]:
+        """Return the events of the combinations finished so far."""
+        count = self.events.qsize()
+        return [self._take(self.events.get_nowait()) for _ in range(count)]
+
+    async def settle(self) -> AsyncGenerator[dict[str, Any]]:
+        """Once all workers are done, reduce until one synthesis can take the rest.
+
+        Yields the remaining "synthesis_partial" events. After a failed
+        combination, no further ones are attempted.
+        """
         while True:
-            item = await queue.get()
-            if item is None:
-                workers_completed = True
-                break
-            yield f"data: {json.dumps(item)}\n\n"
-            queue.task_done()
-    finally:
-        # Only cancel if we didn't finish normally (e.g. client disconnect)
-        if not workers_completed and not worker_task.done():
-            worker_task.cancel()
-            with suppress(asyncio.CancelledError):
-                await worker_task
+            while self.pending:
+                yield self._take(await self.events.get())
+            parts = self.parts
+            if (
+                not self.hierarchical
+                or len(parts) <= self.group_size
+                or self.uncombined
+            ):
+                return
+            # Too many incomplete groups are left: combine across levels
+            level = len(self.levels)
+            self.levels = [[]]
+            for start in range(0, len(parts), self.group_size):
+                group = parts[start : start + self.group_size]
+                if len(group) == 1:
+                    self._add(group[0])
+                else:
+                    self._spawn(group, level)
+
+    @property
+    def parts(self) -> list[_Part]:
+        """The inputs for the final synthesis, once settled."""
+        if not self.hierarchical:
+            return [
+                ([self._title(task_id)], self.outputs[task_id])
+                for task_id in sorted(self.outputs)
+            ]
+        # The most reduced parts first
+        reduced = [part for level in reversed(self.levels) for part in level]
+        return reduced + self.uncombined
+
+    def compression_report(self) -> dict[str, Any] | None:
+        """Count the tokens compression removed; return its "compression" event."""
+        if self.compressor is None:
+            return None
+        for reason, tokens in self.compressor.removed.items():
+            COMPRESSION_TOKENS_REMOVED.inc(tokens, reason=reason)
+        return {
+            "type": "compression",
+            "tokens_before": self.compressor.tokens_before,
+            "tokens_after": self.compressor.tokens_after,
+            "removed": dict(self.compressor.removed),
+        }
 
-    # Retrieve results
-    worker_outputs = await worker_task
+    async def close(self) -> None:
+        """Cancel the combinations still running."""
+        await cancel_tasks(self.running)
+
+
+async def _synthesize_results(
+    user_request: str,
+    parts: list[_Part],
+    missing: list[str] | None = None,
+) -> AsyncGenerator[str, None]:
+    """Synthesize worker outputs (or combinations of them) into a final response.
 
-    # 3. Synthesis phase
-    data = {"type": "status", "message": "Synthesizing final response..."}
+    The titles of tasks that did not complete are listed as missing sections.
+    A final "synthesis_complete" event reports the synthesis duration and its
+    estimated prompt tokens.
+    """
+    prompt = _synthesis_prompt(user_request, parts, missing)
+    started = time.monotonic()
+    with tracer.start_as_current_span(
+        "orchestrator.synthesize",
+        attributes={"input_count": len(parts), "missing_count": len(missing or [])},
+    ):
+        async for event, _, _ in run_agent_standard(
+            synthesizer_agent,
+            prompt,
+            "synthesis",
+        ):
+            if event.content and event.content.parts:
+                part_text = event.content.parts[0].text
+                if part_text:
+                    data = {"type": "synthesis_step", "content": part_text}
+                    yield f"data: {json.dumps(data)}\n\n"
+    duration = time.monotonic() - started
+    SYNTHESIS_SECONDS.observe(duration, compressed=str(ORCHESTRATOR_COMPRESSION))
+    data = {
+        "type": "synthesis_complete",
+        "duration_ms": round(duration * 1000),
+        "prompt_tokens": estimate_tokens(prompt),
+    }
     yield f"data: {json.dumps(data)}\n\n"
 
-    async for chunk in _synthesize_results(user_request, worker_outputs, tasks_list):
+
+async def stream_orchestrator_generator(
+    user_request: str,
+    *,
+    use_cache: bool = True,
+    fanout: bool = False,
+) -> AsyncGenerator[str, None]:
+    """Orchestration loop: Plan -> Parallel Workers -> Synthesis.
+
+    Planning and the worker phase overlap, as workers start while the plan
+    is still being written. Plans with more than
+    ORCHESTRATOR_HIERARCHICAL_THRESHOLD workers are synthesized map-reduce
+    style, so that synthesis also overlaps the worker phase.
+
+    Tasks that did not complete are noted as missing in the synthesis, unless
+    fewer than ORCHESTRATOR_MIN_COMPLETED_FRACTION of them completed, which
+    is reported as an error instead.
+
+    Plans and worker outputs are reused from earlier requests when cached;
+    use_cache=False plans and runs every worker afresh.
+
+    With fanout, the request is planned as a batch job of up to
+    ORCHESTRATOR_FANOUT_MAX_TASKS sub-tasks and run in large fan-out mode;
+    tasks of a longer plan beyond that limit are dropped.
+    """
+    # 1. Planning phase
+    data = {"type": "status", "message": "Planning the orchestration..."}
+    yield f"data: {json.dumps(data)}\n\n"
+
+    # 2. Worker phase: workers start as soon as the streamed plan has their task
+    compressor = (
+        OutputCompressor(
+            ORCHESTRATOR_WORKER_TOKEN_BUDGET,
+            ORCHESTRATOR_COMPRESSION_DEDUP_THRESHOLD,
+        )
+        if ORCHESTRATOR_COMPRESSION
+        else None
+    )
+    synthesis = _SynthesisTree(
+        user_request,
+        ORCHESTRATOR_HIERARCHICAL_THRESHOLD,
+        ORCHESTRATOR_SYNTHESIS_GROUP_SIZE,
+        compressor,
+    )
+    try:
+        async with aclosing(
+            _execute_workers(
+                _stream_plan(
+                    user_request,
+                    use_cache=use_cache,
+                    planner=fanout_orchestrator_agent if fanout else orchestrator_agent,
+                ),
+                user_request,
+                use_cache=use_cache,
+                fanout=fanout,
+            ),
+        ) as events:
+            async for item in events:
+                if item["type"] == "error":
+                    yield f"data: {json.dumps(item)}\n\n"
+                    yield f"data: {json.dumps({'type': 'complete'})}\n\n"
+                    return
+                if item["type"] == "plan":
+                    synthesis.update_plan(item["plan"]["tasks"])
+                elif item["type"] == "worker_complete":
+                    synthesis.complete(item["task_id"], item["final"])
+                yield f"data: {json.dumps(item)}\n\n"
+                for event in synthesis.ready():
+                    yield f"data: {json.dumps(event)}\n\n"
+
+        # 3. Synthesis phase, with the tasks that completed
+        shortfall = synthesis.shortfall(ORCHESTRATOR_MIN_COMPLETED_FRACTION)
+        if shortfall is not None:
+            yield f"data: {json.dumps({'type': 'error', 'message': shortfall})}\n\n"
+            yield f"data: {json.dumps({'type': 'complete'})}\n\n"
+            return
+        data = {"type": "status", "message": "Synthesizing final response..."}
+        yield f"data: {json.dumps(data)}\n\n"
+
+        report = synthesis.compression_report()
+        if report is not None:
+            yield f"data: {json.dumps(report)}\n\n"
+        async for event in synthesis.settle():
+            yield f"data: {json.dumps(event)}\n\n"
+    finally:
+        await synthesis.close()
+
+    async for chunk in _synthesize_results(
+        user_request, synthesis.parts, synthesis.missing
+    ):
         yield chunk
 
     yield f"data: {json.dumps({'type': 'complete'})}\n\n"
 
 
 @router.get("/stream_orchestrator")
-async def stream_orchestrator(prompt: str) -> StreamingResponse:
-    """Stream the orchestrator's execution."""
-    return StreamingResponse(
-        stream_orchestrator_generator(prompt),
-        media_type="text/event-stream",
+async def stream_orchestrator(
+    prompt: str,
+    bypass_cache: bool = False,  # noqa: FBT001, FBT002 - query parameter
+    fanout: bool = False,  # noqa: FBT001, FBT002 - query parameter
+) -> EventStreamResponse:
+    """Stream the orchestrator's execution.
+
+    With bypass_cache, no cached plan or worker output is reused. With
+    fanout, the request runs as a batch job in large fan-out mode, and its
+    agent runs are scheduled behind interactive traffic.
+    """
+    if fanout:
+        set_priority(Priority.BATCH)
+    return EventStreamResponse(
+        instrument_stream(
+            "orchestrator",
+            coalesce_stream(
+                f"/stream_orchestrator:{bypass_cache}:{fanout}:{prompt}",
+                lambda: stream_orchestrator_generator(
+                    prompt,
+                    use_cache=not bypass_cache,
+                    fanout=fanout,
+                ),
+            ),
+        ),
     )
 
 
+async def run_orchestrator_agent(_user_request: str) -> dict[str, Any]:
+    """Point the demo page handler at the streaming endpoint."""
+    return {"message": "Use streaming"}
+
+
 def register(app: FastAPI) -> PatternMetadata:
     """Register the pattern."""
     return configure_pattern(
@@ -221,7 +1150,7 @@ def register(app: FastAPI) -> PatternMetadata:
             ),
             icon="🎼",
             base_file=__file__,
-            handler=lambda _: {"message": "Use streaming"},
+            handler=run_orchestrator_agent,
             template_name="orchestrator.html.j2",
         ),
     )
@@ -28,10 +28,12 @@ class OrchestratorUI {
 
 	handleSubmit(e) {
 		e.preventDefault();
-		const prompt = new FormData(this.form).get("prompt");
+		const formData = new FormData(this.form);
+		const prompt = formData.get("prompt");
 		this.resetUI();
 
-		const url = `/stream_orchestrator?prompt=${encodeURIComponent(prompt)}`;
+		let url = `/stream_orchestrator?prompt=${encodeURIComponent(prompt)}`;
+		if (formData.get("fanout")) url += "&fanout=true";
 		const handler = new StreamHandler(
 			url,
 			(data) => this.handleMessage(data),
@@ -71,7 +73,33 @@ class OrchestratorUI {
 				this.activateWorker(data.task_id);
 				break;
 			case "worker_complete":
-				this.completeWorker(data.task_id);
+				this.completeWorker(data.task_id, data.duration_ms, data.cached);
+				break;
+			case "worker_failed":
+				this.failWorker(data.task_id, data.message);
+				break;
+			case "error":
+				if (this.statusText) this.statusText.innerText = data.message;
+				break;
+			case "progress":
+				if (this.statusText) {
+					this.statusText.innerText = `${data.completed}/${data.total} tasks done, ${data.running} running, ${data.failed} failed`;
+				}
+				break;
+			case "compression":
+				if (this.statusText) {
+					this.statusText.innerText = `Compressed worker outputs from ~${data.tokens_before} to ~${data.tokens_after} tokens`;
+				}
+				break;
+			case "synthesis_partial":
+				if (this.statusText) {
+					this.statusText.innerText = `Combined results of ${data.covers.join(", ")}`;
+				}
+				break;
+			case "synthesis_partial_failed":
+				if (this.statusText) {
+					this.statusText.innerText = `Could not combine results of ${data.covers.join(", ")}; using them as they are`;
+				}
 				break;
 			case "synthesis_step":
 				this.handleSynthesisStep(data.content);
@@ -94,6 +122,9 @@ class OrchestratorUI {
 		this.planSection.classList.remove("hidden");
 
 		plan.tasks.forEach((task, index) => {
+			// The plan streams in: tasks already shown keep their card
+			if (this.workerCards[index]) return;
+
 			const clone = template.content.cloneNode(true);
 			const card = clone.querySelector(".worker-card");
 
@@ -102,6 +133,11 @@ class OrchestratorUI {
 			// Safe text content population
 			card.querySelector(".worker-type").textContent = task.worker_type;
 			card.querySelector(".worker-rationale").textContent = task.description;
+			if (task.depends_on?.length) {
+				const deps = card.querySelector(".worker-deps");
+				deps.textContent = `After: ${task.depends_on.join(", ")}`;
+				deps.classList.remove("hidden");
+			}
 
 			this.planContainer.appendChild(clone);
 
@@ -134,7 +170,7 @@ class OrchestratorUI {
 		}
 	}
 
-	completeWorker(taskId) {
+	completeWorker(taskId, durationMs, cached) {
 		const card = this.workerCards[taskId];
 		if (card) {
 			card.classList.remove(
@@ -148,6 +184,31 @@ class OrchestratorUI {
 				"status-indicator w-3 h-3 bg-emerald-500 rounded-full shadow-[0_0_10px_rgba(16,185,129,0.5)]";
 			card.querySelector(".worker-progress").classList.add("hidden");
 			card.querySelector(".worker-done").classList.remove("hidden");
+			if (cached) {
+				card.querySelector(".worker-timing").textContent = "cached";
+			} else if (durationMs !== undefined) {
+				card.querySelector(".worker-timing").textContent =
+					`${(durationMs / 1000).toFixed(1)}s`;
+			}
+		}
+	}
+
+	failWorker(taskId, message) {
+		const card = this.workerCards[taskId];
+		if (card) {
+			card.classList.remove(
+				"active",
+				"ring-2",
+				"ring-indigo-500/40",
+				"scale-[1.01]",
+			);
+			card.classList.add("ring-2", "ring-rose-500/20");
+			card.querySelector(".status-indicator").className =
+				"status-indicator w-3 h-3 bg-rose-500 rounded-full";
+			card.querySelector(".worker-progress").classList.add("hidden");
+			const failed = card.querySelector(".worker-failed");
+			failed.querySelector(".worker-failure").textContent = message;
+			failed.classList.remove("hidden");
 		}
 	}
 
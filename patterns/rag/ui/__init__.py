@@ -8,6 +8,7 @@ from patterns.rag.agent import rag_agent
 from patterns.utils import (
     PatternConfig,
     PatternMetadata,
+    coalesce_call,
     configure_pattern,
     run_agent_standard,
 )
@@ -70,7 +71,13 @@ def register(app: FastAPI) -> PatternMetadata:
     @router.post("/rag/query")
     async def query_rag(request: QueryRequest) -> dict[str, str]:
         """Run the RAG agent."""
-        return await run_rag_agent(request.query, request.session_id)
+        if request.session_id:
+            return await run_rag_agent(request.query, request.session_id)
+        # Without a session the query is stateless and can share a run
+        return await coalesce_call(
+            f"/rag/query:{request.query}",
+            lambda: run_rag_agent(request.query),
+        )
 
     return configure_pattern(
         app=app,
@@ -1,16 +1,46 @@
 """Reflection Agent Pattern."""
 
+import logging
+from collections.abc import AsyncGenerator
+from difflib import SequenceMatcher
 from typing import Any
 
-from google.adk.agents import LlmAgent, LoopAgent, SequentialAgent
+from google.adk.agents import (
+    BaseAgent,
+    LlmAgent,
+    LoopAgent,
+    ParallelAgent,
+    SequentialAgent,
+)
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
 from google.adk.tools.tool_context import ToolContext
+from google.genai.types import Content, Part
+
+from patterns.config import (
+    GEMINI_MODEL,
+    REFLECTION_CRITIC_MODE,
+    REFLECTION_CRITIQUE_REPEAT_THRESHOLD,
+    REFLECTION_MIN_EDIT_RATIO,
+)
+from patterns.metrics import Counter
+from patterns.similarity import cosine_similarity, term_vector
 
-from patterns.config import GEMINI_MODEL
+logger = logging.getLogger(__name__)
 
 # --- Constants ---
 STATE_CURRENT_DOC = "current_document"
 STATE_CRITICISM = "criticism"
+STATE_CONVERGENCE = "convergence"
+STATE_PANEL_CRITICISM = "criticism_{focus}"
 COMPLETION_PHRASE = "No major issues found."
+MAX_ITERATIONS = 5
+
+ITERATIONS_SAVED = Counter(
+    "adp_reflection_iterations_saved_total",
+    "Refinement iterations skipped because the draft converged, by reason.",
+    ("reason",),
+)
 
 
 # --- Tool Definition ---
@@ -20,6 +50,132 @@ def exit_loop(tool_context: ToolContext) -> dict[str, Any]:
     return {}
 
 
+# --- Convergence ---
+def edit_ratio(before: str, after: str) -> float:
+    """Return the fraction (0-1) of words that differ between two texts."""
+    matcher = SequenceMatcher(None, before.split(), after.split(), autojunk=False)
+    return 1 - matcher.ratio()
+
+
+def convergence_reason(
+    previous_document: str | None,
+    document: str,
+    previous_criticism: str | None,
+    criticism: str | None,
+) -> str | None:
+    """Tell why another refinement round is not worth it, if it is not.
+
+    Returns:
+        "unchanged" when the last round barely edited the draft,
+        "repeated_critique" when the critique says what it said the round
+        before, or None.
+
+    """
+    if (
+        previous_document is not None
+        and REFLECTION_MIN_EDIT_RATIO > 0
+        and edit_ratio(previous_document, document) < REFLECTION_MIN_EDIT_RATIO
+    ):
+        return "unchanged"
+    if (
+        previous_criticism
+        and criticism
+        and REFLECTION_CRITIQUE_REPEAT_THRESHOLD > 0
+        and cosine_similarity(term_vector(previous_criticism), term_vector(criticism))
+        >= REFLECTION_CRITIQUE_REPEAT_THRESHOLD
+    ):
+        return "repeated_critique"
+    return None
+
+
+class ConvergenceCheckAgent(BaseAgent):
+    """Ends the refinement loop once rounds stop making progress.
+
+    It runs first in every round, without a model call. It compares the draft
+    and critique with those it saw at the start of the previous round. If
+    they converged, it escalates, skipping the critic and refiner calls of
+    the remaining rounds.
+    """
+
+    max_iterations: int
+
+    async def _run_async_impl(
+        self,
+        ctx: InvocationContext,
+    ) -> AsyncGenerator[Event, None]:
+        """Escalate if the last round converged, then remember this one."""
+        state = ctx.session.state
+        seen: dict[str, Any] = state.get(STATE_CONVERGENCE) or {}
+        if seen.get("invocation_id") != ctx.invocation_id:
+            seen = {"invocation_id": ctx.invocation_id, "iteration": 0}
+        document = str(state.get(STATE_CURRENT_DOC, ""))
+        criticism = state.get(STATE_CRITICISM)
+        iteration = seen["iteration"] + 1
+
+        reason = None
+        if iteration > 1:
+            reason = convergence_reason(
+                seen.get("document"),
+                document,
+                seen.get("criticism"),
+                criticism,
+            )
+        content = None
+        if reason is not None:
+            saved = self.max_iterations - iteration + 1
+            ITERATIONS_SAVED.inc(saved, reason=reason)
+            text = f"Converged ({reason.replace('_', ' ')}): skipped {saved} round(s)."
+            content = Content(role="model", parts=[Part(text=text)])
+
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=content,
+            actions=EventActions(
+                escalate=reason is not None,
+                state_delta={
+                    STATE_CONVERGENCE: {
+                        **seen,
+                        "iteration": iteration,
+                        "document": document,
+                        "criticism": criticism,
+                    },
+                },
+            ),
+        )
+
+
+class CritiqueMergeAgent(BaseAgent):
+    """Merges the critiques of a critic panel into the refiner's critique.
+
+    Critiques finding nothing to fix are left out, so the refiner sees
+    COMPLETION_PHRASE only when every critic was satisfied.
+    """
+
+    focuses: list[str]
+
+    async def _run_async_impl(
+        self,
+        ctx: InvocationContext,
+    ) -> AsyncGenerator[Event, None]:
+        """Store the merged critique as the round's criticism."""
+        issues = []
+        for focus in self.focuses:
+            key = STATE_PANEL_CRITICISM.format(focus=focus)
+            critique = str(ctx.session.state.get(key) or "").strip()
+            if critique and COMPLETION_PHRASE not in critique:
+                issues.append(f"- {focus.capitalize()}: {critique}")
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(
+                state_delta={STATE_CRITICISM: "\n".join(issues) or COMPLETION_PHRASE},
+            ),
+        )
+
+
 # --- Agent Definitions ---
 
 # 1. Initial Writer
@@ -72,15 +228,86 @@ ELSE: Improve the draft based on critique. Output *only* the refined text.
     output_key=STATE_CURRENT_DOC,
 )
 
-# 3. Loop
+# 2c. Critic panel: specialised critics review the draft at once, so one
+# round catches what several rounds of the general critic would
+_CRITIC_FOCUSES = {
+    "style": "style: clarity, flow, word choice and tone",
+    "factuality": "factuality: claims that are wrong, implausible or inconsistent",
+    "length": "length: keeping to 2-4 sentences, without padding",
+}
+
+
+def _panel_critic(focus: str, aspect: str) -> LlmAgent:
+    return LlmAgent(
+        name=f"{focus.capitalize()}CriticAgent",
+        model=GEMINI_MODEL,
+        include_contents="none",
+        instruction=f"""You are a Constructive Critic.
+Review only this aspect of the draft: {aspect}.
+**Draft:**
+```
+{{current_document}}
+```
+**Task:**
+IF improvements are needed: Provide 1-2 specific suggestions about this aspect.
+Output *only* the critique.
+ELSE IF it is good: Respond *exactly* with "{COMPLETION_PHRASE}".
+""",
+        output_key=STATE_PANEL_CRITICISM.format(focus=focus),
+    )
+
+
+critic_panel = ParallelAgent(
+    name="CriticPanel",
+    sub_agents=[
+        _panel_critic(focus, aspect) for focus, aspect in _CRITIC_FOCUSES.items()
+    ],
+)
+critique_merge_agent = CritiqueMergeAgent(
+    name="CritiqueMerge",
+    focuses=list(_CRITIC_FOCUSES),
+)
+
+# 3. Loop, stopped early once the draft converges
+convergence_check_agent = ConvergenceCheckAgent(
+    name="ConvergenceCheck",
+    max_iterations=MAX_ITERATIONS,
+)
 refinement_loop = LoopAgent(
     name="RefinementLoop",
-    sub_agents=[critic_agent, refiner_agent],
-    max_iterations=5,
+    sub_agents=[convergence_check_agent, critic_agent, refiner_agent],
+    max_iterations=MAX_ITERATIONS,
+)
+
+# The same loop with the critic panel; agents can only have one parent, so
+# the agents both loops use are cloned
+panel_refinement_loop = LoopAgent(
+    name="PanelRefinementLoop",
+    sub_agents=[
+        convergence_check_agent.clone(),
+        critic_panel,
+        critique_merge_agent,
+        refiner_agent.clone(),
+    ],
+    max_iterations=MAX_ITERATIONS,
 )
 
-# 4. Pipeline
-root_agent = SequentialAgent(
+# 4. Pipelines, served by REFLECTION_CRITIC_MODE
+reflection_pipeline = SequentialAgent(
     name="ReflectionPipeline",
     sub_agents=[initial_writer_agent, refinement_loop],
 )
+panel_reflection_pipeline = SequentialAgent(
+    name="PanelReflectionPipeline",
+    sub_agents=[initial_writer_agent.clone(), panel_refinement_loop],
+)
+if REFLECTION_CRITIC_MODE not in {"single", "panel"}:
+    logger.warning(
+        "Unknown REFLECTION_CRITIC_MODE %r; using the single critic",
+        REFLECTION_CRITIC_MODE,
+    )
+root_agent = (
+    panel_reflection_pipeline
+    if REFLECTION_CRITIC_MODE == "panel"
+    else reflection_pipeline
+)
@@ -2,14 +2,42 @@
 
 import asyncio
 import json
+import time
+from collections.abc import AsyncGenerator
+from typing import Any
+from unittest.mock import MagicMock, patch
 
 import pytest
 from fastapi import FastAPI
+from google.adk.agents import (
+    BaseAgent,
+    LlmAgent,
+    LoopAgent,
+    ParallelAgent,
+    SequentialAgent,
+)
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
 from google.adk.runners import InMemoryRunner
 from google.genai.types import Content, Part
 
-from patterns.reflection.agent import STATE_CURRENT_DOC, root_agent
-from patterns.reflection.ui import register
+from patterns.delta import apply_delta
+from patterns.reflection.agent import (
+    COMPLETION_PHRASE,
+    ITERATIONS_SAVED,
+    MAX_ITERATIONS,
+    STATE_CRITICISM,
+    STATE_CURRENT_DOC,
+    STATE_PANEL_CRITICISM,
+    ConvergenceCheckAgent,
+    CritiqueMergeAgent,
+    convergence_reason,
+    critic_panel,
+    edit_ratio,
+    panel_reflection_pipeline,
+    root_agent,
+)
+from patterns.reflection.ui import register, stream_reflection_deltas
 from patterns.utils import stream_agent_events
 
 
@@ -115,3 +143,250 @@ def test_reflection_registration() -> None:
     assert meta.id == "reflection"
     assert meta.name == "Reflection"
     assert meta.demo_url == "/demo/reflection"
+
+
+class _StubRefiner(BaseAgent):
+    """Writes the scripted draft and critique of each round, without a model."""
+
+    rounds: list[tuple[str, str]]
+
+    async def _run_async_impl(
+        self,
+        ctx: InvocationContext,
+    ) -> AsyncGenerator[Event, None]:
+        document, criticism = self.rounds.pop(0)
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            actions=EventActions(
+                state_delta={STATE_CURRENT_DOC: document, STATE_CRITICISM: criticism},
+            ),
+        )
+
+
+class _StubCritic(BaseAgent):
+    """Stores a fixed critique after a delay, without a model."""
+
+    output_key: str
+    critique: str
+    delay: float
+
+    async def _run_async_impl(
+        self,
+        ctx: InvocationContext,
+    ) -> AsyncGenerator[Event, None]:
+        await asyncio.sleep(self.delay)
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            actions=EventActions(state_delta={self.output_key: self.critique}),
+        )
+
+
+async def _run(agent: BaseAgent) -> dict[str, object]:
+    """Run an agent in a fresh session and return the session's state."""
+    runner = InMemoryRunner(agent=agent, app_name="stub_test")
+    await runner.session_service.create_session(
+        app_name="stub_test",
+        user_id="user",
+        session_id="session",
+    )
+    async for _ in runner.run_async(
+        user_id="user",
+        session_id="session",
+        new_message=Content(parts=[Part(text="Topic")]),
+    ):
+        pass
+    session = await runner.session_service.get_session(
+        app_name="stub_test",
+        user_id="user",
+        session_id="session",
+    )
+    assert session is not None
+    return dict(session.state)
+
+
+async def _run_rounds(rounds: list[tuple[str, str]]) -> int:
+    """Run a loop of the convergence check and a stub; return rounds run."""
+    stub = _StubRefiner(name="Stub", rounds=list(rounds))
+    loop = LoopAgent(
+        name="Loop",
+        sub_agents=[
+            ConvergenceCheckAgent(name="Check", max_iterations=MAX_ITERATIONS),
+            stub,
+        ],
+        max_iterations=MAX_ITERATIONS,
+    )
+    await _run(loop)
+    return len(rounds) - len(stub.rounds)
+
+
+def test_convergence_reason() -> None:
+    """Barely edited drafts and repeated critiques count as converged."""
+    draft = "The robot watched the red dunes and waited for a signal from home."
+    assert edit_ratio(draft, draft) == 0
+    assert convergence_reason(None, draft, None, None) is None
+    edited = draft.replace("waited for a signal from", "dreamed of")
+    assert convergence_reason(draft, edited, None, None) is None
+    assert convergence_reason(draft, draft, None, None) == "unchanged"
+    assert (
+        convergence_reason(
+            "A short draft.",
+            "A longer, reworked draft.",
+            "Add sensory detail to the dunes.",
+            "Please add sensory detail to the dunes!",
+        )
+        == "repeated_critique"
+    )
+
+
+@pytest.mark.asyncio
+async def test_converged_loop_stops_early() -> None:
+    """The loop ends once a round leaves the draft as it was."""
+    saved = ITERATIONS_SAVED.value(reason="unchanged")
+    rounds = [
+        ("First draft of the story.", "Make it vivid."),
+        ("A vivid second draft of the story.", "Name the robot."),
+        ("A vivid second draft of the story.", "Name the robot somehow."),
+        ("Never reached.", "Never reached."),
+        ("Never reached.", "Never reached."),
+    ]
+    assert await _run_rounds(rounds) == 3  # noqa: PLR2004
+    assert ITERATIONS_SAVED.value(reason="unchanged") == saved + 2
+
+
+@pytest.mark.asyncio
+async def test_changing_loop_runs_every_round() -> None:
+    """Rounds that keep rewriting the draft with new critiques all run."""
+    rounds = [
+        (
+            f"Draft {i}: " + " ".join(f"word{i}{j}" for j in range(8)),
+            f"Fix {i} topic{i}",
+        )
+        for i in range(MAX_ITERATIONS)
+    ]
+    assert await _run_rounds(rounds) == MAX_ITERATIONS
+
+
+def test_critic_panel_definition() -> None:
+    """The panel's critics each write their own critique for the merge."""
+    keys = [
+        critic.output_key
+        for critic in critic_panel.sub_agents
+        if isinstance(critic, LlmAgent)
+    ]
+    assert keys == [
+        STATE_PANEL_CRITICISM.format(focus=focus)
+        for focus in ("style", "factuality", "length")
+    ]
+    loop = panel_reflection_pipeline.sub_agents[1]
+    assert [agent.name for agent in loop.sub_agents] == [
+        "ConvergenceCheck",
+        "CriticPanel",
+        "CritiqueMerge",
+        "RefinerAgent",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_panel_critiques_are_merged_after_the_slowest_critic() -> None:
+    """Critics run at once; their critiques become one, minus the approvals."""
+    critiques = {
+        "style": "Vary the sentence openings.",
+        "factuality": COMPLETION_PHRASE,
+        "length": "Cut the last sentence.",
+    }
+    panel = ParallelAgent(
+        name="Panel",
+        sub_agents=[
+            _StubCritic(
+                name=f"{focus}_critic",
+                output_key=STATE_PANEL_CRITICISM.format(focus=focus),
+                critique=critique,
+                delay=0.2,
+            )
+            for focus, critique in critiques.items()
+        ],
+    )
+    merge = CritiqueMergeAgent(name="Merge", focuses=list(critiques))
+
+    started = time.monotonic()
+    state = await _run(SequentialAgent(name="Round", sub_agents=[panel, merge]))
+
+    assert time.monotonic() - started < 0.5  # noqa: PLR2004
+    assert state[STATE_CRITICISM] == (
+        "- Style: Vary the sentence openings.\n- Length: Cut the last sentence."
+    )
+
+
+@pytest.mark.asyncio
+async def test_satisfied_panel_merges_to_completion_phrase() -> None:
+    """With no critic raising an issue, the refiner is told to stop."""
+    merge = CritiqueMergeAgent(name="Merge", focuses=["style", "length"])
+    state = await _run(merge)
+    assert state[STATE_CRITICISM] == COMPLETION_PHRASE
+
+
+_STORY = (
+    "Unit 7 rolled across the red dunes, counting the days since the last "
+    "signal from Earth. At night it traced constellations in the dust, "
+    "hoping someone would read them."
+)
+
+
+@pytest.mark.asyncio
+async def test_delta_stream_rebuilds_every_revision() -> None:
+    """Revisions arrive as deltas between periodic snapshots."""
+    outputs = [
+        ("InitialWriterAgent", _STORY),
+        ("CriticAgent", "Give Unit 7 a more vivid sensory detail."),
+        ("RefinerAgent", _STORY.replace("red dunes", "rust-red, whispering dunes")),
+        ("CriticAgent", "Give Unit 7 a more vivid ending."),
+        ("RefinerAgent", _STORY.replace("read them", "answer them one day")),
+        ("RefinerAgent", _STORY.replace("At night", "Each night")),
+    ]
+
+    async def mock_run_agent_standard(
+        _agent: BaseAgent,
+        _prompt: str,
+        _app_name: str,
+    ) -> AsyncGenerator[tuple[Any, Any, Any], None]:
+        for author, text in outputs:
+            event = MagicMock()
+            event.author = author
+            event.content.parts = [MagicMock(text=text)]
+            yield event, None, None
+
+    with patch(
+        "patterns.reflection.ui.run_agent_standard",
+        side_effect=mock_run_agent_standard,
+    ):
+        items = [
+            json.loads(chunk.removeprefix("data: "))
+            async for chunk in stream_reflection_deltas(
+                root_agent,
+                "A robot on Mars",
+                "reflection_app",
+                snapshot_interval=3,
+            )
+        ]
+
+    texts: dict[str, str] = {}
+    rebuilt = []
+    for item in items[:-1]:
+        if item["type"] == "step":
+            texts[item["stream"]] = item["content"]
+        else:
+            texts[item["stream"]] = apply_delta(texts[item["stream"]], item["ops"])
+        rebuilt.append((item["role"], texts[item["stream"]]))
+
+    assert rebuilt == outputs
+    drafts = [item for item in items if item.get("stream") == STATE_CURRENT_DOC]
+    assert [(item["type"], item["revision"]) for item in drafts] == [
+        ("step", 0),
+        ("step_delta", 1),
+        ("step_delta", 2),
+        ("step", 3),
+    ]
+    assert items[-1]["type"] == "complete"
+    assert items[-1]["bytes_saved"] > 0
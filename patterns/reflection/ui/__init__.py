@@ -1,25 +1,112 @@
 """UI integration for the Reflection pattern."""
 
+import json
+from collections.abc import AsyncGenerator
+
 from fastapi import APIRouter, FastAPI
-from fastapi.responses import StreamingResponse
+from google.adk.agents import BaseAgent
 
+from patterns.config import REFLECTION_SNAPSHOT_INTERVAL
+from patterns.delta import text_delta
+from patterns.metrics import Counter
 from patterns.reflection.agent import root_agent
 from patterns.utils import (
+    EventStreamResponse,
     PatternConfig,
     PatternMetadata,
+    coalesce_stream,
     configure_pattern,
+    instrument_stream,
+    run_agent_standard,
     stream_agent_events,
 )
 
 router = APIRouter()
 
+DELTA_BYTES_SAVED = Counter(
+    "adp_reflection_delta_bytes_saved_total",
+    "Bytes of reflection step events saved by sending revisions as deltas.",
+)
+
+
+def _stream_key(agent: BaseAgent, author: str) -> str:
+    """Name the text an author revises: its state key, or else itself.
+
+    The writer and the refiner share a key, as both write the draft.
+    """
+    sub_agent = agent.find_agent(author)
+    return getattr(sub_agent, "output_key", None) or author
+
+
+async def stream_reflection_deltas(
+    agent: BaseAgent,
+    user_request: str,
+    app_name: str,
+    snapshot_interval: int = REFLECTION_SNAPSHOT_INTERVAL,
+) -> AsyncGenerator[str, None]:
+    """Yield SSE events sending each revision as an edit of the previous one.
+
+    Every output revises a stream (the draft, the critique, ...). The first
+    revision of a stream, every snapshot_interval-th one, and any revision
+    whose delta would not be smaller, are sent in full as a "step" event.
+    Others are sent as a "step_delta" event whose ops apply to the previous
+    revision (see patterns.delta). Both carry the stream and revision number,
+    so a client that missed a revision waits for the next snapshot.
+
+    The final "complete" event reports the bytes sent and saved.
+    """
+    revisions: dict[str, tuple[int, str]] = {}
+    sent = saved = 0
+    async for event, _, _ in run_agent_standard(agent, user_request, app_name):
+        if not (event.content and event.content.parts):
+            continue
+        text = event.content.parts[0].text
+        if not text:
+            continue
+        stream = _stream_key(agent, event.author)
+        revision, previous = revisions.get(stream, (-1, None))
+        revision += 1
+        revisions[stream] = (revision, text)
+
+        header = {"role": event.author, "stream": stream, "revision": revision}
+        data = json.dumps({"type": "step", **header, "content": text})
+        snapshot = snapshot_interval > 0 and revision % snapshot_interval == 0
+        if previous is not None and not snapshot:
+            ops = text_delta(previous, text)
+            delta = json.dumps({"type": "step_delta", **header, "ops": ops})
+            if len(delta) < len(data):
+                saved += len(data) - len(delta)
+                data = delta
+        chunk = f"data: {data}\n\n"
+        sent += len(chunk.encode())
+        yield chunk
+
+    DELTA_BYTES_SAVED.inc(saved)
+    data = json.dumps({"type": "complete", "bytes_sent": sent, "bytes_saved": saved})
+    yield f"data: {data}\n\n"
+
 
 @router.get("/stream_reflection")
-async def stream_reflection(prompt: str) -> StreamingResponse:
-    """Stream the reflection agent's execution."""
-    return StreamingResponse(
-        stream_agent_events(root_agent, prompt, "reflection_app"),
-        media_type="text/event-stream",
+async def stream_reflection(
+    prompt: str,
+    delta: bool = False,  # noqa: FBT001, FBT002 - query parameter
+) -> EventStreamResponse:
+    """Stream the reflection agent's execution.
+
+    With delta, revisions are sent as edits of the previous version.
+    """
+    return EventStreamResponse(
+        instrument_stream(
+            "reflection",
+            coalesce_stream(
+                f"/stream_reflection:{delta}:{prompt}",
+                lambda: (
+                    stream_reflection_deltas(root_agent, prompt, "reflection_app")
+                    if delta
+                    else stream_agent_events(root_agent, prompt, "reflection_app")
+                ),
+            ),
+        ),
     )
 
 
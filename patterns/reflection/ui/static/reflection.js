@@ -1,3 +1,21 @@
+// Applies a delta from /stream_reflection?delta=true to the previous text:
+// ["=", n] keeps n characters, ["-", n] skips them and ["+", text] inserts text
+function applyDelta(text, ops) {
+	let position = 0;
+	let result = "";
+	for (const [op, argument] of ops) {
+		if (op === "=") {
+			result += text.slice(position, position + argument);
+			position += argument;
+		} else if (op === "-") {
+			position += argument;
+		} else {
+			result += argument;
+		}
+	}
+	return result;
+}
+
 document.addEventListener("DOMContentLoaded", () => {
 	const form = document.querySelector(".run-form");
 	const resultsGrid = document.getElementById("results-grid");
@@ -12,6 +30,9 @@ document.addEventListener("DOMContentLoaded", () => {
 
 			if (!prompt) return;
 
+			// Latest revision of each stream (draft, critique, ...) received
+			const revisions = {};
+
 			// Clear previous results
 			resultsGrid.innerHTML = "";
 			resultsGrid.style.display = "grid";
@@ -19,10 +40,23 @@ document.addEventListener("DOMContentLoaded", () => {
 
 			try {
 				const streamHandler = new StreamHandler(
-					`/stream_reflection?prompt=${encodeURIComponent(prompt)}`,
+					`/stream_reflection?prompt=${encodeURIComponent(prompt)}&delta=true`,
 					(data) => {
 						// onMessage
+						if (data.type === "step_delta") {
+							const previous = revisions[data.stream];
+							// Missed a revision: wait for the next full snapshot
+							if (!previous || previous.revision !== data.revision - 1) return;
+							data.content = applyDelta(previous.content, data.ops);
+							data.type = "step";
+						}
 						if (data.type === "step") {
+							if (data.stream !== undefined) {
+								revisions[data.stream] = {
+									revision: data.revision,
+									content: data.content,
+								};
+							}
 							const card = document.createElement("div");
 							const h3 = document.createElement("h3");
 							const contentDiv = document.createElement("div");
@@ -31,7 +65,7 @@ document.addEventListener("DOMContentLoaded", () => {
 
 							// Apply specific styling based on role
 							let cssClass = "result-card";
-							if (data.role === "CriticAgent") cssClass += " critique";
+							if (data.role.endsWith("CriticAgent")) cssClass += " critique";
 							if (data.role === "RefinerAgent") cssClass += " final";
 							card.className = cssClass;
 							h3.textContent = data.role;
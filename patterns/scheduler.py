@@ -0,0 +1,215 @@
+"""Central admission control for LLM-backed agent runs."""
+
+import asyncio
+import bisect
+import itertools
+import time
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+
+from patterns.metrics import Gauge, Histogram
+from patterns.tracing import tracer
+
+
+class Priority(IntEnum):
+    """Scheduling classes; lower values are admitted first."""
+
+    INTERACTIVE = 0
+    BATCH = 1
+
+
+_CURRENT_PRIORITY: ContextVar[Priority] = ContextVar(
+    "llm_priority",
+    default=Priority.INTERACTIVE,
+)
+
+QUEUE_WAIT_SECONDS = Histogram(
+    "adp_llm_queue_wait_seconds",
+    "Time agent runs spent waiting for an LLM slot.",
+    ("pattern", "priority"),
+)
+ACTIVE_RUNS = Gauge(
+    "adp_llm_active_runs",
+    "Agent runs currently holding an LLM slot.",
+    ("pattern",),
+)
+QUEUED_RUNS = Gauge(
+    "adp_llm_queued_runs",
+    "Agent runs waiting for an LLM slot.",
+    ("pattern",),
+)
+
+
+def current_priority() -> Priority:
+    """Return the priority class of the current request."""
+    return _CURRENT_PRIORITY.get()
+
+
+def set_priority(priority: Priority) -> None:
+    """Set the priority class for the rest of the current request."""
+    _CURRENT_PRIORITY.set(priority)
+
+
+@contextmanager
+def priority_scope(priority: Priority) -> Iterator[None]:
+    """Run a block (and the tasks it spawns) under the given priority class."""
+    token = _CURRENT_PRIORITY.set(priority)
+    try:
+        yield
+    finally:
+        _CURRENT_PRIORITY.reset(token)
+
+
+class TokenBucket:
+    """Classic token bucket limiting how often new runs may start."""
+
+    def __init__(self, rate_per_second: float, burst: int) -> None:
+        """Initialize the bucket; a non-positive rate disables limiting."""
+        self.rate = rate_per_second
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it."""
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                elapsed = now - self._updated
+                self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class LlmScheduler:
+    """Admit agent runs under a global cap with per-pattern bulkheads.
+
+    Each pattern may reserve slots that only it can use; the remaining
+    capacity is shared. Waiting runs are admitted in priority order, then
+    first come first served, skipping any run whose pattern is at its limit.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        reservations: dict[str, int] | None = None,
+        rate_per_second: float = 0,
+        burst: int = 0,
+    ) -> None:
+        """Initialize the scheduler.
+
+        Args:
+            max_concurrency: Maximum number of runs in flight at once.
+            reservations: Slots reserved for specific pattern ids.
+            rate_per_second: Maximum sustained run starts per second (0 = off).
+            burst: Token bucket size (0 = max_concurrency).
+
+        """
+        self.max_concurrency = max_concurrency
+        self.reservations = dict(reservations or {})
+        if sum(self.reservations.values()) > max_concurrency:
+            msg = "Reserved LLM slots exceed the global concurrency limit"
+            raise ValueError(msg)
+        self._shared_capacity = max_concurrency - sum(self.reservations.values())
+        self._bucket = TokenBucket(rate_per_second, burst or max_concurrency)
+        self._active: dict[str, int] = {}
+        self._waiters: list[tuple[int, int, str, asyncio.Future[None]]] = []
+        self._sequence = itertools.count()
+
+    @property
+    def active(self) -> int:
+        """Number of runs currently admitted."""
+        return sum(self._active.values())
+
+    def _shared_in_use(self) -> int:
+        return sum(
+            max(0, count - self.reservations.get(pattern, 0))
+            for pattern, count in self._active.items()
+        )
+
+    def _can_admit(self, pattern: str) -> bool:
+        if self._active.get(pattern, 0) < self.reservations.get(pattern, 0):
+            return True
+        return self._shared_in_use() < self._shared_capacity
+
+    def _dispatch(self) -> None:
+        """Admit every waiter that fits, in priority order."""
+        remaining = []
+        for entry in self._waiters:
+            _, _, pattern, future = entry
+            if future.done():
+                continue
+            if self._can_admit(pattern):
+                self._active[pattern] = self._active.get(pattern, 0) + 1
+                future.set_result(None)
+            else:
+                remaining.append(entry)
+        self._waiters = remaining
+
+    def _release(self, pattern: str) -> None:
+        self._active[pattern] -= 1
+        ACTIVE_RUNS.dec(pattern=pattern)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        pattern: str,
+        priority: Priority | None = None,
+    ) -> AsyncIterator[None]:
+        """Hold one LLM slot for the duration of the block.
+
+        Args:
+            pattern: Pattern id the run is accounted to.
+            priority: Scheduling class; defaults to the current request's.
+
+        """
+        if priority is None:
+            priority = current_priority()
+        started = time.monotonic()
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        bisect.insort(
+            self._waiters,
+            (priority, next(self._sequence), pattern, future),
+            key=lambda entry: entry[:2],
+        )
+        QUEUED_RUNS.inc(pattern=pattern)
+        with tracer.start_as_current_span(
+            "llm_scheduler.wait",
+            attributes={"pattern": pattern, "priority": priority.name.lower()},
+        ):
+            self._dispatch()
+            try:
+                await future
+            except asyncio.CancelledError:
+                # Admitted just as the waiter was cancelled: hand the slot back
+                if future.done() and not future.cancelled():
+                    self._active[pattern] -= 1
+                    self._dispatch()
+                raise
+            finally:
+                QUEUED_RUNS.dec(pattern=pattern)
+
+            ACTIVE_RUNS.inc(pattern=pattern)
+            try:
+                await self._bucket.acquire()
+            except BaseException:
+                self._release(pattern)
+                raise
+        QUEUE_WAIT_SECONDS.observe(
+            time.monotonic() - started,
+            pattern=pattern,
+            priority=priority.name.lower(),
+        )
+        try:
+            yield
+        finally:
+            self._release(pattern)
@@ -7,6 +7,7 @@ from patterns.sequential.agent import incident_triage_pipeline
 from patterns.utils import (
     PatternConfig,
     PatternMetadata,
+    coalesce_call,
     configure_pattern,
     run_and_collect_history,
 )
@@ -41,10 +42,13 @@ def register(app: FastAPI) -> PatternMetadata:
             A dictionary containing the output text.
 
         """
-        history = await run_and_collect_history(
-            incident_triage_pipeline,
-            request.input_text,
-            "sequential_app",
+        history = await coalesce_call(
+            f"/sequential/run:{request.input_text}",
+            lambda: run_and_collect_history(
+                incident_triage_pipeline,
+                request.input_text,
+                "sequential_app",
+            ),
         )
         # extracting the final message content
         if history:
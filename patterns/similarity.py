@@ -0,0 +1,159 @@
+"""Cheap local text similarity, with no model call.
+
+For near-duplicate detection, a text is reduced to the set of its
+overlapping word n-grams (shingles), and that set to a short MinHash
+signature. The fraction of positions where two signatures agree estimates
+the Jaccard similarity of the shingle sets, so comparing texts costs a few
+dozen integer comparisons.
+
+Short requests that merely reorder or rephrase the same words are compared
+instead as bags of content words, by cosine similarity.
+"""
+
+import hashlib
+import math
+import random
+import re
+from collections import Counter
+from collections.abc import Mapping
+
+_WORD_RE = re.compile(r"\w+")
+
+# Function words that do not change what a request is about
+_STOPWORDS = frozenset(
+    (  # noqa: SIM905 - a word list reads best as text
+        "a an and are as at be by for from how i in into is it me my of on or "
+        "please the their this to us we what with write you your"
+    ).split(),
+)
+
+# Mersenne prime larger than any 64-bit shingle hash
+_PRIME = (1 << 89) - 1
+
+
+def shingles(text: str, size: int = 3) -> set[str]:
+    """Return the set of lowercase word n-grams of text.
+
+    Texts shorter than size words yield a single shingle of all their words.
+    """
+    words = _WORD_RE.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i : i + size]) for i in range(len(words) - size + 1)}
+
+
+def _shingle_hash(shingle: str) -> int:
+    return int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest())
+
+
+class MinHasher:
+    """Computes MinHash signatures with a fixed family of hash functions."""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1) -> None:
+        """Draw num_perm random hash functions, reproducibly from seed."""
+        rng = random.Random(seed)  # noqa: S311 - not used for security
+        self._coefficients = [
+            (rng.randrange(1, _PRIME), rng.randrange(0, _PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, items: set[str]) -> tuple[int, ...]:
+        """Return the MinHash signature of a set of shingles."""
+        if not items:
+            return ()
+        hashes = [_shingle_hash(item) for item in items]
+        return tuple(
+            min((a * h + b) % _PRIME for h in hashes) for a, b in self._coefficients
+        )
+
+    @staticmethod
+    def similarity(first: tuple[int, ...], second: tuple[int, ...]) -> float:
+        """Estimate the Jaccard similarity of two signed sets."""
+        if not first or not second:
+            return 1.0 if first == second else 0.0
+        return sum(a == b for a, b in zip(first, second, strict=True)) / len(first)
+
+
+_DEFAULT_HASHER = MinHasher()
+
+
+def group_near_duplicates(
+    texts: Mapping[str, str],
+    threshold: float,
+    hasher: MinHasher = _DEFAULT_HASHER,
+) -> list[list[str]]:
+    """Group the keys of texts whose estimated similarity reaches threshold.
+
+    Each text joins the first group whose leading text is similar enough, so
+    the first key of every group is its earliest member and groups keep the
+    order of texts. A threshold of 0 or less disables grouping.
+
+    Returns:
+        Groups of keys; singletons for texts without a near duplicate.
+
+    """
+    if threshold <= 0:
+        return [[key] for key in texts]
+    groups: list[tuple[tuple[int, ...], list[str]]] = []
+    for key, text in texts.items():
+        signature = hasher.signature(shingles(text))
+        for leader, members in groups:
+            if hasher.similarity(leader, signature) >= threshold:
+                members.append(key)
+                break
+        else:
+            groups.append((signature, [key]))
+    return [members for _, members in groups]
+
+
+def term_vector(text: str) -> dict[str, float]:
+    """Return the lowercase content words of text with their counts."""
+    words = _WORD_RE.findall(text.lower())
+    return dict(Counter(word for word in words if word not in _STOPWORDS))
+
+
+def cosine_similarity(first: Mapping[str, float], second: Mapping[str, float]) -> float:
+    """Return the cosine similarity (0-1) of two term vectors."""
+    dot = sum(weight * second.get(term, 0) for term, weight in first.items())
+    norms = math.hypot(*first.values()) * math.hypot(*second.values())
+    # Rounding can push identical vectors slightly above 1
+    return min(dot / norms, 1.0) if norms else 0.0
+
+
+class MinHashIndex:
+    """Finds near-duplicates among many signatures without comparing all pairs.
+
+    Signatures are split into bands and bucketed by band (locality-sensitive
+    hashing), so only signatures sharing a band are compared. With the
+    default 64 permutations in 16 bands, pairs at a similarity of 0.8 share
+    a band with a probability above 99.9%.
+    """
+
+    def __init__(self, threshold: float, bands: int = 16) -> None:
+        """Initialize an empty index matching at threshold similarity."""
+        self.threshold = threshold
+        self.bands = bands
+        self._buckets: dict[tuple[int, tuple[int, ...]], list[tuple[int, ...]]] = {}
+
+    def _keys(self, signature: tuple[int, ...]) -> list[tuple[int, tuple[int, ...]]]:
+        rows = max(len(signature) // self.bands, 1)
+        return [
+            (band, signature[start : start + rows])
+            for band, start in enumerate(range(0, len(signature), rows))
+        ]
+
+    def find(self, signature: tuple[int, ...]) -> bool:
+        """Return whether an indexed signature is similar enough to signature."""
+        if not signature:
+            return False
+        return any(
+            MinHasher.similarity(signature, other) >= self.threshold
+            for key in self._keys(signature)
+            for other in self._buckets.get(key, ())
+        )
+
+    def add(self, signature: tuple[int, ...]) -> None:
+        """Index signature."""
+        if signature:
+            for key in self._keys(signature):
+                self._buckets.setdefault(key, []).append(signature)
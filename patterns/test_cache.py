@@ -0,0 +1,138 @@
+"""Tests for the shared response cache."""
+
+from collections.abc import AsyncGenerator
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+from google.adk.agents import LlmAgent
+from google.adk.events import Event
+from google.genai.types import Content, GenerateContentConfig, Part
+
+from patterns import utils
+from patterns.cache import SemanticCache, TTLCache, agent_fingerprint
+from patterns.similarity import term_vector
+
+
+def test_ttl_cache_evicts_least_recently_used() -> None:
+    """The oldest untouched entry is evicted once capacity is exceeded."""
+    cache = TTLCache(max_entries=2, ttl_seconds=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3  # noqa: PLR2004
+    assert len(cache) == 2  # noqa: PLR2004
+
+
+def test_ttl_cache_expires_entries() -> None:
+    """Entries are dropped once their TTL has elapsed."""
+    cache = TTLCache(max_entries=10, ttl_seconds=5)
+    with patch("patterns.cache.time.monotonic", return_value=100.0):
+        cache.put("key", "value")
+    with patch("patterns.cache.time.monotonic", return_value=104.0):
+        assert cache.get("key") == "value"
+    with patch("patterns.cache.time.monotonic", return_value=106.0):
+        assert cache.get("key") is None
+    assert len(cache) == 0
+
+
+def test_semantic_cache_matches_similar_vectors() -> None:
+    """Lookups hit the most similar entry of their namespace until it expires."""
+    cache = SemanticCache(max_entries=10, ttl_seconds=5, threshold=0.8)
+    with patch("patterns.cache.time.monotonic", return_value=100.0):
+        cache.put("planner", term_vector("Travel guide for Tokyo"), "tokyo")
+        cache.put("planner", term_vector("Travel guide for Kyoto"), "kyoto")
+
+    with patch("patterns.cache.time.monotonic", return_value=104.0):
+        assert cache.get("planner", term_vector("Tokyo travel guide")) == ("tokyo", 1)
+        assert cache.get("other", term_vector("Tokyo travel guide")) is None
+        assert cache.get("planner", term_vector("Osaka travel guide")) is None
+    with patch("patterns.cache.time.monotonic", return_value=106.0):
+        assert cache.get("planner", term_vector("Tokyo travel guide")) is None
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_semantic_cache_lookup_skips_rejected_entries() -> None:
+    """Entries the accept predicate rejects are not returned."""
+    cache = SemanticCache(max_entries=10, ttl_seconds=5, threshold=0.5)
+    cache.put("planner", term_vector("Travel guide for Tokyo"), "tokyo")
+
+    vector = term_vector("Travel guide for Osaka")
+    assert cache.get("planner", vector) == ("tokyo", pytest.approx(2 / 3))
+    assert cache.get("planner", vector, lambda _, value: value != "tokyo") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_agent_fingerprint_tracks_configuration() -> None:
+    """Changing the model, instruction or sampling changes the fingerprint."""
+    base = LlmAgent(name="A", model="model-a", instruction="Be brief.")
+    same = LlmAgent(name="A", model="model-a", instruction="Be brief.")
+    other_model = LlmAgent(name="A", model="model-b", instruction="Be brief.")
+    other_instruction = LlmAgent(name="A", model="model-a", instruction="Be long.")
+    other_sampling = base.clone(
+        update={"generate_content_config": GenerateContentConfig(seed=2)},
+    )
+
+    assert agent_fingerprint(base) == agent_fingerprint(same)
+    assert agent_fingerprint(base) != agent_fingerprint(other_model)
+    assert agent_fingerprint(base) != agent_fingerprint(other_instruction)
+    assert agent_fingerprint(base) != agent_fingerprint(other_sampling)
+
+
+@pytest.mark.asyncio
+async def test_run_agent_standard_replays_cached_run() -> None:
+    """A repeated stateless prompt is replayed without running the agent."""
+    agent = LlmAgent(name="CachedAgent", model="model-a", instruction="Echo.")
+    calls = 0
+
+    async def fake_run_async(**_kwargs: Any) -> AsyncGenerator[Event]:  # noqa: ANN401
+        nonlocal calls
+        calls += 1
+        for text in ("Hello", " world"):
+            yield Event(
+                author=agent.name,
+                content=Content(role="model", parts=[Part(text=text)]),
+            )
+
+    runner = MagicMock()
+    runner.run_async = fake_run_async
+
+    with (
+        patch("patterns.utils.InMemoryRunner", return_value=runner),
+        patch("patterns.utils.RESPONSE_CACHE_PATTERNS", frozenset({"cache_test"})),
+        patch("patterns.utils._RESPONSE_CACHE", TTLCache(10, 60)),
+    ):
+        first = [
+            event.content.parts[0].text
+            async for event, _, _ in utils.run_agent_standard(
+                agent,
+                "hi",
+                "cache_test",
+            )
+        ]
+        second = [
+            event.content.parts[0].text
+            async for event, _, _ in utils.run_agent_standard(
+                agent,
+                "hi",
+                "cache_test",
+            )
+        ]
+        # Session-bound runs depend on history and must bypass the cache
+        stateful = [
+            event.content.parts[0].text
+            async for event, _, _ in utils.run_agent_standard(
+                agent,
+                "hi",
+                "cache_test",
+                "session-1",
+            )
+        ]
+
+    assert first == second == stateful == ["Hello", " world"]
+    assert calls == 2  # noqa: PLR2004
@@ -0,0 +1,40 @@
+"""Tests for text deltas."""
+
+import pytest
+
+from patterns.delta import apply_delta, text_delta
+
+_DRAFT = (
+    "The robot watched the red dunes of Mars.\n"
+    "Every night it waited for a signal from home."
+)
+
+
+def test_delta_round_trip() -> None:
+    """Applying a delta to the old text yields the new one."""
+    revised = _DRAFT.replace("waited for a signal from", "dreamed of")
+    for old, new in ((_DRAFT, revised), ("", _DRAFT), (_DRAFT, ""), (_DRAFT, _DRAFT)):
+        assert apply_delta(old, text_delta(old, new)) == new
+
+
+def test_delta_only_carries_the_edits() -> None:
+    """Unchanged text is referred to by length, not repeated."""
+    revised = _DRAFT.replace("The robot", "The lonely robot")
+    ops = text_delta(_DRAFT, revised)
+    assert ops == [["=", 3], ["+", " lonely"], ["=", len(_DRAFT) - 3]]
+
+
+def test_unknown_operation_is_rejected() -> None:
+    """A malformed delta is an error rather than a wrong text."""
+    with pytest.raises(ValueError, match="Unknown delta operation"):
+        apply_delta(_DRAFT, [["?", 1]])
+
+
+def test_delta_lengths_count_utf16_units() -> None:
+    """Emoji outside the BMP count as two units, matching JavaScript slicing."""
+    old = "Launch 🚀 at dawn"
+    new = "Launch 🚀 at dusk"
+    ops = text_delta(old, new)
+    assert ops == [["=", 13], ["-", 4], ["+", "dusk"]]
+    assert apply_delta(old, ops) == new
+    assert apply_delta("🚀🚀 go", [["-", 2], ["=", 5]]) == "🚀 go"
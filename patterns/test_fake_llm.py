@@ -0,0 +1,86 @@
+"""Tests for the deterministic local LLM backend."""
+
+from typing import Any
+
+import pytest
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.models.registry import LLMRegistry
+from google.genai import types
+
+from patterns.fake_llm import FakeLlm, ScriptRule
+from patterns.orchestrator.agent import ExecutionPlan, orchestrator_agent
+from patterns.tool_use.agent import tool_use_agent
+from patterns.utils import run_and_collect_history
+
+
+def _instant(**kwargs: Any) -> FakeLlm:  # noqa: ANN401
+    """Build a FakeLlm without simulated latency."""
+    return FakeLlm(model="fake", ttft_seconds=0, tokens_per_second=0, **kwargs)
+
+
+def _request(text: str) -> LlmRequest:
+    return LlmRequest(
+        contents=[types.Content(role="user", parts=[types.Part(text=text)])],
+    )
+
+
+def _text(response: LlmResponse) -> str:
+    assert response.content is not None
+    assert response.content.parts
+    return response.content.parts[0].text or ""
+
+
+def test_fake_model_names_resolve() -> None:
+    """The "fake" model names are routed to FakeLlm by the ADK registry."""
+    assert isinstance(LLMRegistry.new_llm("fake"), FakeLlm)
+    assert isinstance(LLMRegistry.new_llm("fake-load-test"), FakeLlm)
+
+
+@pytest.mark.asyncio
+async def test_streaming_chunks_and_determinism() -> None:
+    """Streaming yields partial chunks that add up to the final response."""
+    llm = _instant(chunk_tokens=3, response_tokens=10)
+    responses = [
+        r async for r in llm.generate_content_async(_request("hi"), stream=True)
+    ]
+
+    partial = "".join(_text(r) for r in responses if r.partial)
+    final = responses[-1]
+    assert not final.partial
+    assert partial == _text(final)
+    assert len(responses) == 5  # noqa: PLR2004 - 4 chunks of <=3 tokens + final
+    assert final.usage_metadata is not None
+    assert final.usage_metadata.candidates_token_count == 10  # noqa: PLR2004
+
+    again = [r async for r in llm.generate_content_async(_request("hi"))]
+    assert _text(again[-1]) == _text(final)
+
+
+@pytest.mark.asyncio
+async def test_structured_output_for_execution_plan() -> None:
+    """The planner gets a valid ExecutionPlan from the fake backend."""
+    agent = orchestrator_agent.clone(update={"model": _instant(list_items=2)})
+    history = await run_and_collect_history(agent, "Tokyo travel guide", "fake_test")
+
+    plan = ExecutionPlan.model_validate_json(history[-1]["content"])
+    assert plan.plan_title == "Tokyo travel guide"
+    assert len(plan.tasks) == 2  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_calculator_tool_call() -> None:
+    """The fake backend calls tools named in the instruction."""
+    agent = tool_use_agent.clone(update={"model": _instant()})
+    history = await run_and_collect_history(agent, "What is 12 * 3?", "fake_test")
+
+    assert "36" in history[-1]["content"]
+
+
+@pytest.mark.asyncio
+async def test_script_rules_take_precedence() -> None:
+    """Scripted rules override the generated text."""
+    llm = _instant(script=(ScriptRule(prompt="hello", text="Hi, {prompt}!"),))
+    responses = [r async for r in llm.generate_content_async(_request("hello"))]
+
+    assert _text(responses[-1]) == "Hi, hello!"
@@ -0,0 +1,95 @@
+"""Tests for hedged requests."""
+
+import asyncio
+from collections.abc import AsyncGenerator
+
+import pytest
+
+from patterns.hedging import (
+    HEDGE_SAVED_SECONDS,
+    HEDGE_WINS,
+    HEDGES,
+    LatencyTracker,
+    hedged_stream,
+)
+
+
+def _warm_tracker(latency: float) -> LatencyTracker:
+    tracker = LatencyTracker(percentile=90, min_samples=5)
+    for _ in range(5):
+        tracker.record("candidate", latency)
+    return tracker
+
+
+def test_hedge_delay_needs_history() -> None:
+    """Hedging starts only once enough samples were recorded."""
+    tracker = LatencyTracker(percentile=50, min_samples=3)
+    tracker.record("a", 1.0)
+    tracker.record("a", 3.0)
+    assert tracker.hedge_delay("a") is None
+
+    tracker.record("a", 2.0)
+    assert tracker.hedge_delay("a") == 2.0  # noqa: PLR2004
+    assert LatencyTracker(percentile=0, min_samples=1).hedge_delay("a") is None
+
+
+@pytest.mark.asyncio
+async def test_straggler_is_hedged_and_cancelled() -> None:
+    """A slow first run is raced by a duplicate that wins."""
+    tracker = _warm_tracker(0.01)
+    calls = 0
+    straggler_cancelled = asyncio.Event()
+
+    async def run() -> AsyncGenerator[str]:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                straggler_cancelled.set()
+                raise
+            yield "slow"
+        yield "fast"
+
+    before = HEDGE_WINS.value(pattern="unknown", candidate="candidate")
+    items = [item async for item in hedged_stream(run, tracker, "candidate")]
+
+    assert items == ["fast"]
+    assert calls == 2  # noqa: PLR2004
+    assert straggler_cancelled.is_set()
+    assert HEDGES.value(pattern="unknown", candidate="candidate") >= 1
+    assert HEDGE_WINS.value(pattern="unknown", candidate="candidate") == before + 1
+    assert HEDGE_SAVED_SECONDS.count(pattern="unknown", candidate="candidate") >= 1
+
+
+@pytest.mark.asyncio
+async def test_fast_run_is_not_hedged() -> None:
+    """A run responding within the percentile is streamed as is."""
+    tracker = _warm_tracker(1.0)
+    calls = 0
+
+    async def run() -> AsyncGenerator[str]:
+        nonlocal calls
+        calls += 1
+        yield "a"
+        yield "b"
+
+    items = [item async for item in hedged_stream(run, tracker, "candidate")]
+
+    assert items == ["a", "b"]
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_errors_propagate() -> None:
+    """The failure of the only run reaches the consumer."""
+
+    async def run() -> AsyncGenerator[str]:
+        msg = "boom"
+        raise RuntimeError(msg)
+        yield "unreachable"
+
+    with pytest.raises(RuntimeError, match="boom"):
+        async for _ in hedged_stream(run, LatencyTracker(90, 5), "failing"):
+            pass
@@ -0,0 +1,68 @@
+"""Tests for agent run metrics and their Prometheus exposition."""
+
+from collections.abc import AsyncGenerator
+
+import pytest
+
+from patterns.fake_llm import FakeLlm
+from patterns.metrics import Counter, Histogram, render_metrics
+from patterns.tool_use.agent import tool_use_agent
+from patterns.utils import (
+    AGENT_RUN_SECONDS,
+    AGENT_RUNS,
+    LLM_TOKENS,
+    STREAM_ERRORS,
+    STREAM_EVENTS,
+    STREAM_REQUESTS,
+    TOOL_CALL_SECONDS,
+    instrument_stream,
+    run_and_collect_history,
+)
+
+
+def test_prometheus_rendering() -> None:
+    """Counters and histograms render in the Prometheus text format."""
+    counter = Counter("test_render_total", "A test counter.", ("pattern",))
+    counter.inc(2, pattern='say "hi"')
+    histogram = Histogram("test_render_seconds", "A test histogram.", buckets=(1,))
+    histogram.observe(0.5)
+    histogram.observe(3)
+
+    text = render_metrics()
+    assert "# TYPE test_render_total counter" in text
+    assert 'test_render_total{pattern="say \\"hi\\""} 2.0' in text
+    assert 'test_render_seconds_bucket{le="1.0"} 1.0' in text
+    assert 'test_render_seconds_bucket{le="+Inf"} 2.0' in text
+    assert "test_render_seconds_count 2.0" in text
+
+
+@pytest.mark.asyncio
+async def test_agent_run_is_instrumented() -> None:
+    """A run records its count, duration, tokens and tool latency."""
+    model = FakeLlm(model="fake", ttft_seconds=0, tokens_per_second=0)
+    agent = tool_use_agent.clone(update={"model": model})
+    await run_and_collect_history(agent, "What is 2 + 2?", "metrics_test")
+
+    labels = {"pattern": "metrics_test", "agent": agent.name}
+    assert AGENT_RUNS.value(**labels) == 1
+    assert AGENT_RUN_SECONDS.count(**labels) == 1
+    assert LLM_TOKENS.value(pattern="metrics_test", author=agent.name, kind="output")
+    assert TOOL_CALL_SECONDS.count(pattern="metrics_test", tool="calculator") == 1
+
+
+@pytest.mark.asyncio
+async def test_instrument_stream_counts_events_and_errors() -> None:
+    """Stream metrics count every chunk and record failures."""
+
+    async def failing() -> AsyncGenerator[str]:
+        yield "data: {}\n\n"
+        msg = "boom"
+        raise RuntimeError(msg)
+
+    with pytest.raises(RuntimeError):
+        async for _ in instrument_stream("stream_test", failing()):
+            pass
+
+    assert STREAM_REQUESTS.value(pattern="stream_test") == 1
+    assert STREAM_EVENTS.value(pattern="stream_test") == 1
+    assert STREAM_ERRORS.value(pattern="stream_test") == 1
@@ -0,0 +1,96 @@
+"""Tests for the global LLM scheduler."""
+
+import asyncio
+
+import pytest
+
+from patterns.scheduler import QUEUE_WAIT_SECONDS, LlmScheduler, Priority
+
+
+async def _hold(
+    scheduler: LlmScheduler,
+    pattern: str,
+    release: asyncio.Event,
+    order: list[str],
+    *,
+    priority: Priority = Priority.INTERACTIVE,
+) -> None:
+    async with scheduler.slot(pattern, priority):
+        order.append(pattern)
+        await release.wait()
+
+
+@pytest.mark.asyncio
+async def test_global_cap_and_bulkhead() -> None:
+    """A burst from one pattern cannot take slots reserved for another."""
+    scheduler = LlmScheduler(max_concurrency=3, reservations={"rag": 1})
+    release = asyncio.Event()
+    order: list[str] = []
+
+    burst = [
+        asyncio.create_task(_hold(scheduler, "orchestrator", release, order))
+        for _ in range(4)
+    ]
+    await asyncio.sleep(0.01)
+    assert scheduler.active == 2  # noqa: PLR2004 - shared capacity only
+
+    rag = asyncio.create_task(_hold(scheduler, "rag", release, order))
+    await asyncio.sleep(0.01)
+    assert "rag" in order
+    assert scheduler.active == 3  # noqa: PLR2004
+
+    release.set()
+    await asyncio.gather(*burst, rag)
+    assert scheduler.active == 0
+    assert QUEUE_WAIT_SECONDS.count(pattern="rag", priority="interactive") >= 1
+
+
+@pytest.mark.asyncio
+async def test_interactive_runs_before_batch() -> None:
+    """Queued interactive runs are admitted ahead of earlier batch runs."""
+    scheduler = LlmScheduler(max_concurrency=1)
+    first = asyncio.Event()
+    release = asyncio.Event()
+    order: list[str] = []
+
+    holder = asyncio.create_task(_hold(scheduler, "holder", first, order))
+    await asyncio.sleep(0.01)
+    batch = asyncio.create_task(
+        _hold(scheduler, "batch", release, order, priority=Priority.BATCH),
+    )
+    interactive = asyncio.create_task(
+        _hold(scheduler, "interactive", release, order),
+    )
+    await asyncio.sleep(0.01)
+
+    first.set()
+    release.set()
+    await asyncio.gather(holder, batch, interactive)
+    assert order == ["holder", "interactive", "batch"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_frees_its_place() -> None:
+    """Cancelling a queued run leaves the scheduler consistent."""
+    scheduler = LlmScheduler(max_concurrency=1)
+    release = asyncio.Event()
+    order: list[str] = []
+
+    holder = asyncio.create_task(_hold(scheduler, "holder", release, order))
+    await asyncio.sleep(0.01)
+    waiter = asyncio.create_task(_hold(scheduler, "waiter", release, order))
+    await asyncio.sleep(0.01)
+    waiter.cancel()
+    release.set()
+    await holder
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    assert scheduler.active == 0
+    assert order == ["holder"]
+
+
+def test_reservations_must_fit() -> None:
+    """Reserving more slots than exist is a configuration error."""
+    with pytest.raises(ValueError, match="Reserved LLM slots"):
+        LlmScheduler(max_concurrency=2, reservations={"a": 2, "b": 1})
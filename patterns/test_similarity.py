@@ -0,0 +1,65 @@
+"""Tests for near-duplicate detection."""
+
+from patterns.similarity import (
+    MinHasher,
+    MinHashIndex,
+    cosine_similarity,
+    group_near_duplicates,
+    shingles,
+    term_vector,
+)
+
+_MUG = "Sip smarter: the mug that keeps your coffee hot for hours, all day long."
+_SALE = "Act now: only a hundred mugs left at this price!"
+
+
+def test_shingles() -> None:
+    """Shingles are lowercase word n-grams; short texts yield one shingle."""
+    assert shingles("Hot, hot COFFEE now", size=3) == {
+        "hot hot coffee",
+        "hot coffee now",
+    }
+    assert shingles("Buy it") == {"buy it"}
+    assert shingles("...") == set()
+
+
+def test_minhash_estimates_similarity() -> None:
+    """Signatures of equal texts agree fully, unrelated ones barely."""
+    hasher = MinHasher()
+    signature = hasher.signature(shingles(_MUG))
+    assert hasher.similarity(signature, hasher.signature(shingles(_MUG.upper()))) == 1
+    other = hasher.signature(
+        shingles("Act now: only a hundred mugs left at this price!")
+    )
+    assert hasher.similarity(signature, other) < 0.2  # noqa: PLR2004
+
+
+def test_group_near_duplicates() -> None:
+    """Near-duplicates join the group of the first similar text, in order."""
+    texts = {
+        "a": _MUG,
+        "b": _SALE,
+        "c": _MUG.replace("all day long", "all day long!"),
+    }
+    assert group_near_duplicates(texts, 0.8) == [["a", "c"], ["b"]]
+    assert group_near_duplicates(texts, 0) == [["a"], ["b"], ["c"]]
+
+
+def test_term_vectors_ignore_word_order_and_function_words() -> None:
+    """Rephrasings of one request match; a different subject does not."""
+    tokyo = term_vector("Travel guide for Tokyo")
+    assert tokyo == {"travel": 1, "guide": 1, "tokyo": 1}
+    assert cosine_similarity(tokyo, term_vector("Write me a Tokyo travel guide")) == 1
+    kyoto = term_vector("Travel guide for Kyoto")
+    assert cosine_similarity(tokyo, kyoto) < 0.7  # noqa: PLR2004
+    assert cosine_similarity(tokyo, {}) == 0
+
+
+def test_minhash_index_finds_near_duplicates() -> None:
+    """Only signatures similar enough to an indexed one are found."""
+    hasher = MinHasher()
+    index = MinHashIndex(0.8)
+    index.add(hasher.signature(shingles(_MUG)))
+    assert index.find(hasher.signature(shingles(_MUG.replace("long", "long!"))))
+    assert not index.find(hasher.signature(shingles(_SALE)))
+    assert not index.find(())
@@ -0,0 +1,120 @@
+"""Tests for request tracing and critical-path summaries."""
+
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+from opentelemetry import trace
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+
+from patterns.tracing import (
+    JsonFileSpanExporter,
+    configure_tracing,
+    critical_path,
+    find_critical_path,
+    tracer,
+)
+
+MS = 1_000_000
+
+
+def test_critical_path_follows_last_finishing_children() -> None:
+    """The path skips children that finished before the critical one started."""
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    local_tracer = provider.get_tracer("test")
+
+    root = local_tracer.start_span("request", start_time=0)
+    with trace.use_span(root):
+        plan = local_tracer.start_span("plan", start_time=0)
+        plan.end(end_time=10 * MS)
+        fast = local_tracer.start_span("fast worker", start_time=10 * MS)
+        fast.end(end_time=20 * MS)
+        slow = local_tracer.start_span("slow worker", start_time=10 * MS)
+        slow.end(end_time=80 * MS)
+        synth = local_tracer.start_span("synthesis", start_time=80 * MS)
+        synth.end(end_time=95 * MS)
+    root.end(end_time=100 * MS)
+
+    summary = critical_path(exporter.get_finished_spans())
+    assert summary is not None
+    assert [s.name for s in summary.path] == [
+        "request",
+        "plan",
+        "slow worker",
+        "synthesis",
+    ]
+    assert summary.duration_ms == 100  # noqa: PLR2004
+    assert summary.path[0].self_ms == 5  # noqa: PLR2004 - 100 - (10 + 70 + 15)
+    assert summary.bottleneck == "slow worker"
+
+
+def test_spans_without_context_or_times_are_skipped(tmp_path: Path) -> None:
+    """Incomplete spans neither break the summary nor reach the file."""
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    provider.get_tracer("test").start_span("request", start_time=0).end(10 * MS)
+    (span,) = exporter.get_finished_spans()
+    incomplete = ReadableSpan(name="incomplete")
+    unfinished = ReadableSpan(name="unfinished", context=span.context)
+
+    summary = critical_path([span, incomplete, unfinished])
+    assert summary is not None
+    assert summary.span_count == 1
+    assert critical_path([incomplete, unfinished]) is None
+
+    path = tmp_path / "spans.jsonl"
+    JsonFileSpanExporter(path).export([incomplete])
+    spans = json.loads(path.read_text())["resourceSpans"][0]["scopeSpans"]
+    assert spans == []
+
+
+def test_json_file_exporter_writes_otlp(tmp_path: Path) -> None:
+    """Exported spans are OTLP/JSON lines with parent links."""
+    path = tmp_path / "spans.jsonl"
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(JsonFileSpanExporter(path)))
+    local_tracer = provider.get_tracer("test")
+
+    with (
+        local_tracer.start_as_current_span("parent") as parent,
+        local_tracer.start_as_current_span("child", attributes={"task_id": 3}),
+    ):
+        pass
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    spans = [
+        span
+        for line in lines
+        for scope in line["resourceSpans"][0]["scopeSpans"]
+        for span in scope["spans"]
+    ]
+    child = next(s for s in spans if s["name"] == "child")
+    assert child["parentSpanId"] == format(parent.get_span_context().span_id, "016x")
+    assert child["attributes"] == [{"key": "task_id", "value": {"intValue": "3"}}]
+
+
+@pytest.mark.asyncio
+async def test_spans_link_across_create_task() -> None:
+    """Spans in tasks created under a span become its children."""
+    configure_tracing()
+
+    async def worker(index: int) -> None:
+        with tracer.start_as_current_span(f"worker {index}"):
+            await asyncio.sleep(0.01 * (index + 1))
+
+    with tracer.start_as_current_span("request") as root:
+        await asyncio.gather(*(asyncio.create_task(worker(i)) for i in range(3)))
+
+    trace_id = format(root.get_span_context().trace_id, "032x")
+    summary = find_critical_path(trace_id)
+    assert summary is not None
+    assert summary.span_count == 4  # noqa: PLR2004
+    assert [s.name for s in summary.path] == ["request", "worker 2"]
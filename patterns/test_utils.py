@@ -0,0 +1,278 @@
+"""Tests for the shared pattern utilities."""
+
+import asyncio
+from collections.abc import AsyncGenerator, MutableMapping
+from typing import Any
+
+import pytest
+
+from patterns.utils import (
+    CLIENT_DISCONNECTS,
+    TASKS_CANCELLED,
+    EventStreamResponse,
+    IncrementalJsonParser,
+    Overflow,
+    cancel_tasks,
+    coalesce_call,
+    coalesce_stream,
+    merge_streams,
+)
+
+
+@pytest.mark.asyncio
+async def test_coalesce_stream_shares_one_run() -> None:
+    """Concurrent identical requests attach to a single run."""
+    runs = 0
+    release = asyncio.Event()
+
+    async def source() -> AsyncGenerator[str]:
+        nonlocal runs
+        runs += 1
+        yield "a"
+        await release.wait()
+        yield "b"
+
+    async def consume() -> list[str]:
+        return [chunk async for chunk in coalesce_stream("key", source)]
+
+    first = asyncio.create_task(consume())
+    await asyncio.sleep(0.01)  # "a" is buffered before the late joiner arrives
+    second = asyncio.create_task(consume())
+    await asyncio.sleep(0.01)
+    release.set()
+
+    assert await first == ["a", "b"]
+    assert await second == ["a", "b"]
+    assert runs == 1
+
+
+@pytest.mark.asyncio
+async def test_coalesce_stream_cancels_abandoned_run() -> None:
+    """The shared run stops once its last subscriber disconnects."""
+    cancelled = asyncio.Event()
+
+    async def source() -> AsyncGenerator[str]:
+        try:
+            yield "a"
+            await asyncio.sleep(10)
+            yield "b"
+        finally:
+            cancelled.set()
+
+    stream = coalesce_stream("abandoned", source)
+    assert await anext(stream) == "a"
+    await stream.aclose()
+
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_coalesce_stream_does_not_join_run_being_cancelled() -> None:
+    """A request arriving while an abandoned run winds down starts afresh."""
+    runs = 0
+    unblock = asyncio.Event()
+
+    async def source() -> AsyncGenerator[int]:
+        nonlocal runs
+        runs += 1
+        run = runs
+        try:
+            yield run
+            await asyncio.sleep(10)
+        finally:
+            if run == 1:
+                await unblock.wait()
+
+    first = coalesce_stream("winding-down", source)
+    assert await anext(first) == 1
+    closing = asyncio.create_task(first.aclose())
+    await asyncio.sleep(0)
+
+    second = coalesce_stream("winding-down", source)
+    assert await asyncio.wait_for(anext(second), timeout=1) == 2  # noqa: PLR2004
+    unblock.set()
+    await closing
+    await second.aclose()
+
+
+@pytest.mark.asyncio
+async def test_coalesce_call_propagates_errors() -> None:
+    """Every waiter sees the failure of the shared call."""
+
+    async def failing() -> str:
+        await asyncio.sleep(0.01)
+        msg = "boom"
+        raise RuntimeError(msg)
+
+    results = await asyncio.gather(
+        coalesce_call("failing", failing),
+        coalesce_call("failing", failing),
+        return_exceptions=True,
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_event_stream_stops_work_on_disconnect() -> None:
+    """A client disconnect cancels the stream and every task it spawned."""
+    started = asyncio.Event()
+    worker_cancelled = asyncio.Event()
+    disconnected = asyncio.Event()
+
+    async def worker() -> None:
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            worker_cancelled.set()
+            raise
+
+    async def source() -> AsyncGenerator[str]:
+        task = asyncio.create_task(worker())
+        try:
+            yield "data: {}\n\n"
+            await asyncio.sleep(10)
+        finally:
+            await cancel_tasks([task])
+
+    async def receive() -> dict[str, str]:
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(_message: MutableMapping[str, Any]) -> None:
+        pass
+
+    before = TASKS_CANCELLED.value(pattern="unknown")
+    response = EventStreamResponse(source())
+    call = asyncio.create_task(response({"type": "http"}, receive, send))
+    await started.wait()
+    disconnected.set()
+    await asyncio.wait_for(call, timeout=1)
+
+    assert worker_cancelled.is_set()
+    assert TASKS_CANCELLED.value(pattern="unknown") == before + 1
+    assert CLIENT_DISCONNECTS.value(pattern="unknown") >= 1
+
+
+async def _numbers(name: str, count: int) -> AsyncGenerator[str]:
+    for i in range(count):
+        yield f"{name}{i}"
+        await asyncio.sleep(0)
+
+
+async def _drain_slowly(stream: AsyncGenerator[str]) -> list[str]:
+    """Let producers run ahead of the consumer before each item is taken."""
+    items = []
+    async for item in stream:
+        items.append(item)
+        await asyncio.sleep(0.001)
+    return items
+
+
+@pytest.mark.asyncio
+async def test_merge_streams_blocks_by_default() -> None:
+    """With BLOCK every item arrives, in order per source."""
+    items = await _drain_slowly(
+        merge_streams([_numbers("a", 20), _numbers("b", 20)], max_buffer=2),
+    )
+
+    assert [i for i in items if i.startswith("a")] == [f"a{i}" for i in range(20)]
+    assert len(items) == 40  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_merge_streams_drops_intermediate_items() -> None:
+    """DROP discards droppable items but keeps the rest."""
+    items = await _drain_slowly(
+        merge_streams(
+            [_numbers("a", 20), _numbers("b", 20)],
+            max_buffer=2,
+            overflow=Overflow.DROP,
+            droppable=lambda item: not item.endswith("19"),
+        ),
+    )
+
+    assert "a19" in items
+    assert "b19" in items
+    assert len(items) < 40  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_merge_streams_coalesces_per_source() -> None:
+    """COALESCE folds items of one source together without losing any."""
+    items = await _drain_slowly(
+        merge_streams(
+            [_numbers("a", 20), _numbers("b", 20)],
+            max_buffer=2,
+            overflow=Overflow.COALESCE,
+            coalesce=lambda previous, item: f"{previous},{item}",
+        ),
+    )
+
+    a_items = ",".join(i for i in items if i.startswith("a")).split(",")
+    assert a_items == [f"a{i}" for i in range(20)]
+    assert len(items) < 40  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_merge_streams_propagates_errors_and_cancels_sources() -> None:
+    """A failing source stops the others and re-raises in the consumer."""
+    cancelled = asyncio.Event()
+
+    async def failing() -> AsyncGenerator[str]:
+        yield "x"
+        msg = "boom"
+        raise RuntimeError(msg)
+
+    async def endless() -> AsyncGenerator[str]:
+        try:
+            while True:
+                yield "y"
+                await asyncio.sleep(0.01)
+        finally:
+            cancelled.set()
+
+    with pytest.raises(RuntimeError, match="boom"):
+        async for _ in merge_streams([failing(), endless()]):
+            pass
+
+    assert cancelled.is_set()
+
+
+@pytest.mark.asyncio
+async def test_merge_streams_accepts_sources_that_arrive_later() -> None:
+    """Streams from an async source are merged as soon as they arrive."""
+
+    async def sources() -> AsyncGenerator[AsyncGenerator[str]]:
+        yield _numbers("a", 3)
+        await asyncio.sleep(0.01)
+        yield _numbers("b", 3)
+
+    items = [item async for item in merge_streams(sources())]
+
+    assert sorted(items) == ["a0", "a1", "a2", "b0", "b1", "b2"]
+
+
+def test_incremental_json_parser_emits_array_elements_early() -> None:
+    """Each element of a top-level array is returned once it is complete."""
+    text = (
+        '```json\n{"title": "a \\"quoted\\" {title}", "tasks": ['
+        '{"name": "one", "tags": ["x", "]"]}, {"name": "two"}], "count": 2}\n```'
+    )
+    parser = IncrementalJsonParser()
+    elements = []
+    for start in range(0, len(text), 3):
+        elements.extend(parser.feed(text[start : start + 3]))
+        if len(elements) == 1:
+            assert not parser.complete
+
+    assert elements == [
+        ("tasks", {"name": "one", "tags": ["x", "]"]}),
+        ("tasks", {"name": "two"}),
+    ]
+    assert parser.complete
+    assert parser.fields == {
+        "title": 'a "quoted" {title}',
+        "tasks": [{"name": "one", "tags": ["x", "]"]}, {"name": "two"}],
+        "count": 2,
+    }
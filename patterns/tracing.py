@@ -0,0 +1,364 @@
+"""Request tracing on top of OpenTelemetry.
+
+ADK already emits spans for agent invocations, LLM calls and tool calls. This
+module adds a root span per HTTP request, exports finished spans to a local
+file in the OTLP/JSON format and computes a critical-path summary for every
+request. OpenTelemetry keeps the current span in a context variable, so spans
+started in tasks created with asyncio.create_task are linked to the span that
+was current when the task was created.
+"""
+
+import json
+import logging
+import threading
+from collections import OrderedDict, deque
+from collections.abc import Awaitable, Callable, Iterable, MutableMapping, Sequence
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor, TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    SpanExporter,
+    SpanExportResult,
+)
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+tracer = trace.get_tracer("agent_design_patterns")
+
+# Requests to these path prefixes are not traced
+UNTRACED_PATHS = ("/static/", "/api/patterns/", "/metrics", "/traces")
+
+_NANOS_PER_MS = 1_000_000
+
+Scope = MutableMapping[str, Any]
+Message = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+ASGIApp = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+
+class PathSegment(BaseModel):
+    """One span on the critical path of a request."""
+
+    name: str
+    span_id: str
+    start_ms: float
+    duration_ms: float
+    self_ms: float
+
+
+class CriticalPath(BaseModel):
+    """Where the wall-clock time of one request went."""
+
+    trace_id: str
+    root: str
+    duration_ms: float
+    span_count: int
+    path: list[PathSegment]
+    bottleneck: str
+
+
+def _hex_id(value: int, width: int) -> str:
+    return format(value, f"0{width}x")
+
+
+class _Timed(NamedTuple):
+    """The identity and timing of a finished span."""
+
+    name: str
+    trace_id: int
+    span_id: int
+    parent_id: int | None
+    start: int
+    end: int
+
+
+def _timed(span: ReadableSpan) -> _Timed | None:
+    """Return the timing of span, or None if it has no context or end."""
+    if span.context is None or span.start_time is None or span.end_time is None:
+        return None
+    return _Timed(
+        name=span.name,
+        trace_id=span.context.trace_id,
+        span_id=span.context.span_id,
+        parent_id=span.parent.span_id if span.parent is not None else None,
+        start=span.start_time,
+        end=span.end_time,
+    )
+
+
+def critical_path(spans: Sequence[ReadableSpan]) -> CriticalPath | None:
+    """Compute the chain of spans that determined a trace's duration.
+
+    Starting at the root, repeatedly pick the child that finished last, then
+    the child that finished last before that one started, and so on. Self
+    time is the part of a span's duration not covered by its critical
+    children.
+    """
+    finished = [t for t in map(_timed, spans) if t is not None]
+    ids = {t.span_id for t in finished}
+    roots = [t for t in finished if t.parent_id not in ids]
+    if not roots:
+        return None
+    root = max(roots, key=lambda t: t.end - t.start)
+
+    children: dict[int, list[_Timed]] = {}
+    for timed in finished:
+        if timed.parent_id is not None and timed.parent_id in ids:
+            children.setdefault(timed.parent_id, []).append(timed)
+
+    segments: list[PathSegment] = []
+
+    def walk(span: _Timed) -> None:
+        picked = []
+        cursor = span.end
+        kids = children.get(span.span_id, [])
+        for kid in sorted(kids, key=lambda t: t.end, reverse=True):
+            if kid.end <= cursor:
+                picked.append(kid)
+                cursor = kid.start
+        picked.reverse()
+        duration = span.end - span.start
+        covered = sum(kid.end - kid.start for kid in picked)
+        segments.append(
+            PathSegment(
+                name=span.name,
+                span_id=_hex_id(span.span_id, 16),
+                start_ms=(span.start - root.start) / _NANOS_PER_MS,
+                duration_ms=duration / _NANOS_PER_MS,
+                self_ms=max(duration - covered, 0) / _NANOS_PER_MS,
+            ),
+        )
+        for kid in picked:
+            walk(kid)
+
+    walk(root)
+    return CriticalPath(
+        trace_id=_hex_id(root.trace_id, 32),
+        root=root.name,
+        duration_ms=(root.end - root.start) / _NANOS_PER_MS,
+        span_count=len(finished),
+        path=segments,
+        bottleneck=max(segments, key=lambda s: s.self_ms).name,
+    )
+
+
+class CriticalPathProcessor(SpanProcessor):
+    """Collect spans per trace and summarize each trace when its root ends."""
+
+    def __init__(self, max_traces: int = 1000, max_summaries: int = 100) -> None:
+        """Bound the number of open traces and of summaries kept in memory."""
+        self.max_traces = max_traces
+        self._open: OrderedDict[int, list[ReadableSpan]] = OrderedDict()
+        self._summaries: deque[CriticalPath] = deque(maxlen=max_summaries)
+        self._lock = threading.Lock()
+
+    def on_end(self, span: ReadableSpan) -> None:
+        """Record a finished span; summarize the trace if it was the root."""
+        if span.context is None:
+            return
+        trace_id = span.context.trace_id
+        with self._lock:
+            spans = self._open.setdefault(trace_id, [])
+            spans.append(span)
+            if span.parent is not None:
+                # Drop the oldest unfinished trace rather than grow forever
+                if len(self._open) > self.max_traces:
+                    self._open.popitem(last=False)
+                return
+            del self._open[trace_id]
+
+        summary = critical_path(spans)
+        if summary is not None:
+            self._summaries.append(summary)
+            logger.info(
+                "Trace %s %s took %.1f ms; bottleneck: %s",
+                summary.trace_id,
+                summary.root,
+                summary.duration_ms,
+                summary.bottleneck,
+            )
+
+    def summaries(self) -> list[CriticalPath]:
+        """Return the most recent summaries, newest first."""
+        return list(reversed(self._summaries))
+
+    def summary(self, trace_id: str) -> CriticalPath | None:
+        """Return the summary of one trace, if it is still kept."""
+        return next((s for s in self._summaries if s.trace_id == trace_id), None)
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:  # noqa: ANN401
+    """Encode an attribute value as an OTLP/JSON AnyValue."""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(v) for v in value]}}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Any) -> list[dict[str, Any]]:  # noqa: ANN401
+    return [{"key": k, "value": _otlp_value(v)} for k, v in (attributes or {}).items()]
+
+
+def _otlp_span(span: ReadableSpan) -> dict[str, Any] | None:
+    """Encode one span as an OTLP/JSON Span, or None if it has no context."""
+    if span.context is None:
+        return None
+    encoded = {
+        "traceId": _hex_id(span.context.trace_id, 32),
+        "spanId": _hex_id(span.context.span_id, 16),
+        "name": span.name,
+        "kind": span.kind.value + 1,  # OTLP numbers kinds from UNSPECIFIED = 0
+        "startTimeUnixNano": str(span.start_time or 0),
+        "endTimeUnixNano": str(span.end_time or span.start_time or 0),
+        "attributes": _otlp_attributes(span.attributes),
+        "events": [
+            {
+                "timeUnixNano": str(event.timestamp),
+                "name": event.name,
+                "attributes": _otlp_attributes(event.attributes),
+            }
+            for event in span.events
+        ],
+        "status": {"code": span.status.status_code.value},
+    }
+    if span.parent is not None:
+        encoded["parentSpanId"] = _hex_id(span.parent.span_id, 16)
+    return encoded
+
+
+class JsonFileSpanExporter(SpanExporter):
+    """Append finished spans to a file as OTLP/JSON, one request per line.
+
+    Each line is an ExportTraceServiceRequest, which the OpenTelemetry
+    Collector's file receiver and most trace viewers can import directly.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        """Export to the given file, creating parent directories as needed."""
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        """Write one batch of spans, grouped by instrumentation scope."""
+        if not spans:
+            return SpanExportResult.SUCCESS
+        scopes: dict[str, list[dict[str, Any]]] = {}
+        for span in spans:
+            otlp_span = _otlp_span(span)
+            if otlp_span is None:
+                continue
+            name = span.instrumentation_scope.name if span.instrumentation_scope else ""
+            scopes.setdefault(name, []).append(otlp_span)
+        resource = spans[0].resource
+        line = json.dumps(
+            {
+                "resourceSpans": [
+                    {
+                        "resource": {
+                            "attributes": _otlp_attributes(resource.attributes),
+                        },
+                        "scopeSpans": [
+                            {"scope": {"name": name}, "spans": encoded}
+                            for name, encoded in scopes.items()
+                        ],
+                    },
+                ],
+            },
+        )
+        with self._lock, self.path.open("a", encoding="utf-8") as f:
+            f.write(line + "\n")
+        return SpanExportResult.SUCCESS
+
+
+_PROVIDER: TracerProvider | None = None
+_SUMMARIES: CriticalPathProcessor | None = None
+
+
+def configure_tracing(trace_file: str = "") -> TracerProvider:
+    """Install the global tracer provider (once) and its processors.
+
+    Args:
+        trace_file: Path of the OTLP/JSON span file; empty keeps spans in
+            memory only, for critical-path summaries.
+
+    """
+    global _PROVIDER, _SUMMARIES  # noqa: PLW0603
+    if _PROVIDER is not None:
+        return _PROVIDER
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": "agent-design-patterns"}),
+    )
+    _SUMMARIES = CriticalPathProcessor()
+    provider.add_span_processor(_SUMMARIES)
+    if trace_file:
+        provider.add_span_processor(
+            BatchSpanProcessor(JsonFileSpanExporter(trace_file))
+        )
+    trace.set_tracer_provider(provider)
+    _PROVIDER = provider
+    return provider
+
+
+def recent_critical_paths() -> list[CriticalPath]:
+    """Return the latest per-request critical-path summaries."""
+    return _SUMMARIES.summaries() if _SUMMARIES else []
+
+
+def find_critical_path(trace_id: str) -> CriticalPath | None:
+    """Return the critical-path summary of one request by trace id."""
+    return _SUMMARIES.summary(trace_id) if _SUMMARIES else None
+
+
+class TracingMiddleware:
+    """ASGI middleware wrapping each HTTP request, body included, in a span.
+
+    The trace id is returned in an X-Trace-Id response header so that the
+    request's critical path can be looked up at /traces/{trace_id}.
+    """
+
+    def __init__(self, app: ASGIApp, untraced: Iterable[str] = UNTRACED_PATHS) -> None:
+        """Wrap an ASGI application."""
+        self.app = app
+        self.untraced = tuple(untraced)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Trace HTTP requests; pass everything else straight through."""
+        path = scope.get("path", "")
+        if scope["type"] != "http" or path.startswith(self.untraced):
+            await self.app(scope, receive, send)
+            return
+
+        method = scope.get("method", "GET")
+        with tracer.start_as_current_span(
+            f"{method} {path}",
+            kind=trace.SpanKind.SERVER,
+            attributes={"http.request.method": method, "url.path": path},
+        ) as span:
+            trace_id = _hex_id(span.get_span_context().trace_id, 32)
+
+            async def send_with_trace_id(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    span.set_attribute(
+                        "http.response.status_code",
+                        message["status"],
+                    )
+                    if span.is_recording():
+                        headers = list(message.get("headers", []))
+                        headers.append((b"x-trace-id", trace_id.encode()))
+                        message["headers"] = headers
+                await send(message)
+
+            await self.app(scope, receive, send_with_trace_id)
@@ -1,24 +1,161 @@
 """Shared UI utilities for patterns."""
 
+import asyncio
 import json
+import time
 import uuid
-from collections.abc import AsyncGenerator, Awaitable, Callable
+from collections import deque
+from collections.abc import (
+    AsyncGenerator,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+)
+from contextvars import ContextVar
+from enum import StrEnum
 from pathlib import Path
-from typing import Any
+from typing import Annotated, Any
 
-from fastapi import APIRouter, FastAPI, Request
-from fastapi.responses import HTMLResponse
+from fastapi import APIRouter, Depends, FastAPI, Header, Request
+from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from google.adk.agents import BaseAgent
+from google.adk.agents import BaseAgent, RunConfig
 from google.adk.runners import InMemoryRunner
 from google.adk.sessions.in_memory_session_service import InMemorySessionService
 from google.genai.types import Content, Part
+from opentelemetry import trace
 from pydantic import BaseModel, ConfigDict
+from starlette.types import Receive, Scope, Send
+
+from patterns.cache import TTLCache, run_cache_key
+from patterns.config import (
+    LLM_MAX_CONCURRENCY,
+    LLM_RATE_BURST,
+    LLM_RATE_PER_SECOND,
+    LLM_RESERVED_SLOTS,
+    REQUEST_COALESCING,
+    RESPONSE_CACHE_MAX_ENTRIES,
+    RESPONSE_CACHE_PATTERNS,
+    RESPONSE_CACHE_TTL_SECONDS,
+    STREAM_BUFFER_SIZE,
+)
+from patterns.metrics import Counter, Histogram
+from patterns.scheduler import LlmScheduler, Priority, set_priority
+from patterns.tracing import tracer
 
 # Create a global service singleton
 _GLOBAL_SESSION_SERVICE = InMemorySessionService()
 
+# Whole-run event cache shared by every pattern that opts in
+_RESPONSE_CACHE = TTLCache(RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS)
+
+# Admission control shared by every agent run in the process
+_LLM_SCHEDULER = LlmScheduler(
+    LLM_MAX_CONCURRENCY,
+    LLM_RESERVED_SLOTS,
+    LLM_RATE_PER_SECOND,
+    LLM_RATE_BURST,
+)
+
+# Id of the pattern serving the current request, bound by configure_pattern
+_CURRENT_PATTERN: ContextVar[str | None] = ContextVar("current_pattern", default=None)
+
+
+# --- Run metrics ---
+AGENT_RUNS = Counter(
+    "adp_agent_runs_total",
+    "Agent runs started, including cache replays.",
+    ("pattern", "agent"),
+)
+AGENT_RUN_ERRORS = Counter(
+    "adp_agent_run_errors_total",
+    "Agent runs that raised an error.",
+    ("pattern", "agent"),
+)
+AGENT_CACHE_HITS = Counter(
+    "adp_agent_cache_hits_total",
+    "Agent runs replayed from the response cache.",
+    ("pattern", "agent"),
+)
+AGENT_FIRST_EVENT_SECONDS = Histogram(
+    "adp_agent_time_to_first_event_seconds",
+    "Time from starting an agent run to its first event.",
+    ("pattern", "agent"),
+)
+AGENT_RUN_SECONDS = Histogram(
+    "adp_agent_run_duration_seconds",
+    "Total duration of agent runs.",
+    ("pattern", "agent"),
+)
+AGENT_EVENTS = Counter(
+    "adp_agent_events_total",
+    "Events produced by agent runs, by authoring agent.",
+    ("pattern", "author"),
+)
+LLM_TOKENS = Counter(
+    "adp_llm_tokens_total",
+    "Model tokens reported in event usage metadata.",
+    ("pattern", "author", "kind"),
+)
+TOOL_CALL_SECONDS = Histogram(
+    "adp_tool_call_duration_seconds",
+    "Time from a function call event to its response event.",
+    ("pattern", "tool"),
+)
+STREAM_REQUESTS = Counter(
+    "adp_stream_requests_total",
+    "Streaming (SSE) requests served.",
+    ("pattern",),
+)
+STREAM_ERRORS = Counter(
+    "adp_stream_errors_total",
+    "Streaming requests that ended with an error.",
+    ("pattern",),
+)
+STREAM_FIRST_EVENT_SECONDS = Histogram(
+    "adp_stream_time_to_first_event_seconds",
+    "Time from the start of a stream to its first SSE event.",
+    ("pattern",),
+)
+STREAM_SECONDS = Histogram(
+    "adp_stream_duration_seconds",
+    "Total duration of streaming requests.",
+    ("pattern",),
+)
+STREAM_EVENTS = Counter(
+    "adp_stream_events_total",
+    "SSE events sent to clients.",
+    ("pattern",),
+)
+CLIENT_DISCONNECTS = Counter(
+    "adp_client_disconnects_total",
+    "Streaming requests abandoned by the client before they completed.",
+    ("pattern",),
+)
+TASKS_CANCELLED = Counter(
+    "adp_cancelled_tasks_total",
+    "Tasks spawned for a request that were cancelled before finishing.",
+    ("pattern",),
+)
+STREAM_ITEMS_DROPPED = Counter(
+    "adp_stream_items_dropped_total",
+    "Intermediate events dropped because a merged stream's buffer was full.",
+    ("pattern",),
+)
+STREAM_ITEMS_COALESCED = Counter(
+    "adp_stream_items_coalesced_total",
+    "Events folded into a buffered event because a merged stream's buffer was full.",
+    ("pattern",),
+)
+AGENT_RUNS_CANCELLED = Counter(
+    "adp_agent_runs_cancelled_total",
+    "Agent runs stopped before completion, e.g. after a client disconnect.",
+    ("pattern", "agent"),
+)
+
 
 # Threshold for including __init__.py files in code viewer
 _INIT_FILE_SIZE_THRESHOLD = 100
@@ -98,20 +235,243 @@ def parse_json_from_text(text: str) -> dict[str, Any] | list[Any] | None:
         return None
 
 
-async def run_agent_standard(
-    agent: BaseAgent,
-    user_request: str,
-    app_name: str,
-    session_id: str | None = None,
-) -> AsyncGenerator[tuple[Any, InMemoryRunner, str]]:
-    """Handle runner setup and event loop.
+# Returned by _loads for text that is not valid JSON
+_INVALID = object()
+
+
+def _loads(text: str) -> Any:  # noqa: ANN401
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return _INVALID
+
+
+class IncrementalJsonParser:
+    """Parse a JSON object streamed in chunks, reporting its parts early.
+
+    Unlike parse_json_from_text, which needs the whole text, the parser
+    reports each element of a top-level array field as soon as the element
+    is complete, e.g. every tasks[i] object once its closing brace arrives.
+    Other top-level fields are collected in fields when they complete. Text
+    before the opening brace (such as a Markdown code fence) and after the
+    closing one is ignored, as are elements that are not valid JSON.
+
+    Example:
+        parser = IncrementalJsonParser()
+        for chunk in chunks:
+            for field, element in parser.feed(chunk):
+                ...
+
+    """
+
+    def __init__(self) -> None:
+        """Start with an empty buffer."""
+        self.text = ""
+        self.fields: dict[str, Any] = {}
+        self._pos = 0
+        # Open containers, "{" or "["; the top-level object is the first
+        self._stack: list[str] = []
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._expect_key = False
+        self._key = ""
+        # Start of the pending top-level value, and of the pending element of
+        # a top-level array
+        self._value_start: int | None = None
+        self._element_start: int | None = None
+
+    @property
+    def complete(self) -> bool:
+        """Whether the top-level object has been closed."""
+        return self._started and not self._stack
+
+    def feed(self, chunk: str) -> list[tuple[str, Any]]:
+        """Add a chunk of text.
+
+        Returns:
+            (field, element) for every element of a top-level array that the
+            chunk completed, in order.
+
+        """
+        self.text += chunk
+        completed: list[tuple[str, Any]] = []
+        while self._pos < len(self.text) and not self.complete:
+            self._step(self.text[self._pos], self._pos, completed)
+            self._pos += 1
+        return completed
+
+    def _in_array(self) -> bool:
+        return self._stack == ["{", "["]
+
+    def _mark_start(self, index: int) -> None:
+        """Note where a top-level value or a top-level array element starts."""
+        if len(self._stack) == 1 and not self._expect_key:
+            if self._value_start is None:
+                self._value_start = index
+        elif self._in_array() and self._element_start is None:
+            self._element_start = index
+
+    def _end_scalar(self, index: int, completed: list[tuple[str, Any]]) -> None:
+        """Complete a pending scalar value or element ending before index."""
+        if len(self._stack) == 1 and self._value_start is not None:
+            value = _loads(self.text[self._value_start : index].strip())
+            if value is not _INVALID:
+                self.fields[self._key] = value
+            self._value_start = None
+        elif self._in_array() and self._element_start is not None:
+            value = _loads(self.text[self._element_start : index].strip())
+            if value is not _INVALID:
+                completed.append((self._key, value))
+            self._element_start = None
+
+    def _close(self, index: int, completed: list[tuple[str, Any]]) -> None:
+        """Handle a closing brace or bracket."""
+        self._end_scalar(index, completed)
+        self._stack.pop()
+        if self._in_array() and self._element_start is not None:
+            value = _loads(self.text[self._element_start : index + 1])
+            if value is not _INVALID:
+                completed.append((self._key, value))
+            self._element_start = None
+        elif len(self._stack) == 1 and self._value_start is not None:
+            value = _loads(self.text[self._value_start : index + 1])
+            if value is not _INVALID:
+                self.fields[self._key] = value
+            self._value_start = None
+
+    def _step_string(self, char: str, index: int) -> None:
+        """Advance inside a string, recording object keys of the top level."""
+        if self._escape:
+            self._escape = False
+        elif char == "\\":
+            self._escape = True
+        elif char == '"':
+            self._in_string = False
+            if len(self._stack) == 1 and self._expect_key:
+                self._key = str(_loads(self.text[self._string_start : index + 1]))
+                self._expect_key = False
+
+    def _step(self, char: str, index: int, completed: list[tuple[str, Any]]) -> None:
+        """Advance the scanner by one character."""
+        if not self._started:
+            if char == "{":
+                self._started = True
+                self._stack.append(char)
+                self._expect_key = True
+        elif self._in_string:
+            self._step_string(char, index)
+        elif char == '"':
+            self._in_string = True
+            self._string_start = index
+            self._mark_start(index)
+        elif char in "{[":
+            self._mark_start(index)
+            self._stack.append(char)
+        elif char in "}]":
+            self._close(index, completed)
+        elif char == ",":
+            self._end_scalar(index, completed)
+            if len(self._stack) == 1:
+                self._expect_key = True
+        elif not char.isspace() and char != ":":
+            self._mark_start(index)
+
+
+def get_current_pattern(default: str) -> str:
+    """Return the id of the pattern serving the current request, or default."""
+    return _CURRENT_PATTERN.get() or default
+
+
+def _bind_pattern(pattern_id: str) -> Callable[..., Awaitable[None]]:
+    """Build a route dependency that tags the request with its pattern id.
 
-    Yields (event, runner, session_id).
+    Clients running bulk jobs can send "X-Request-Priority: batch" to have
+    their agent runs scheduled behind interactive traffic.
     """
-    # Use provided session_id (from frontend) or generate one (for stateless demos)
-    if not session_id:
-        session_id = str(uuid.uuid4())
 
+    async def bind(
+        x_request_priority: Annotated[str | None, Header()] = None,
+    ) -> None:
+        _CURRENT_PATTERN.set(pattern_id)
+        trace.get_current_span().set_attribute("pattern", pattern_id)
+        if x_request_priority and x_request_priority.lower() == "batch":
+            set_priority(Priority.BATCH)
+
+    return bind
+
+
+def _response_cache_enabled(pattern_id: str) -> bool:
+    """Check whether whole-run caching is switched on for a pattern."""
+    return "*" in RESPONSE_CACHE_PATTERNS or pattern_id in RESPONSE_CACHE_PATTERNS
+
+
+class _RunObserver:
+    """Record metrics for the events of one live agent run."""
+
+    def __init__(self, pattern_id: str, agent_name: str) -> None:
+        self.pattern_id = pattern_id
+        self.agent_name = agent_name
+        self.started = time.perf_counter()
+        self.first_event_seen = False
+        self.pending_tools: dict[str, tuple[str, float]] = {}
+        AGENT_RUNS.inc(pattern=pattern_id, agent=agent_name)
+
+    def observe(self, event: Any) -> None:  # noqa: ANN401
+        """Account for one event of the run."""
+        now = time.perf_counter()
+        if not self.first_event_seen:
+            self.first_event_seen = True
+            AGENT_FIRST_EVENT_SECONDS.observe(
+                now - self.started,
+                pattern=self.pattern_id,
+                agent=self.agent_name,
+            )
+        author = event.author or self.agent_name
+        AGENT_EVENTS.inc(pattern=self.pattern_id, author=author)
+
+        usage = event.usage_metadata
+        if usage:
+            for kind, count in (
+                ("prompt", usage.prompt_token_count),
+                ("output", usage.candidates_token_count),
+            ):
+                if count:
+                    LLM_TOKENS.inc(
+                        count, pattern=self.pattern_id, author=author, kind=kind
+                    )
+
+        for call in event.get_function_calls():
+            self.pending_tools[call.id or call.name or ""] = (call.name or "", now)
+        for response in event.get_function_responses():
+            pending = self.pending_tools.pop(response.id or response.name or "", None)
+            if pending:
+                TOOL_CALL_SECONDS.observe(
+                    now - pending[1],
+                    pattern=self.pattern_id,
+                    tool=pending[0],
+                )
+
+    def finish(self, *, failed: bool = False, cancelled: bool = False) -> None:
+        """Record the outcome and duration of the run."""
+        if failed:
+            AGENT_RUN_ERRORS.inc(pattern=self.pattern_id, agent=self.agent_name)
+        if cancelled:
+            AGENT_RUNS_CANCELLED.inc(pattern=self.pattern_id, agent=self.agent_name)
+        AGENT_RUN_SECONDS.observe(
+            time.perf_counter() - self.started,
+            pattern=self.pattern_id,
+            agent=self.agent_name,
+        )
+
+
+async def _session_runner(
+    agent: BaseAgent,
+    app_name: str,
+    session_id: str,
+) -> InMemoryRunner:
+    """Build a runner on the shared session service, creating the session."""
     # Pass the global service to the runner
     runner = InMemoryRunner(
         agent=agent,
@@ -131,13 +491,346 @@ async def run_agent_standard(
             user_id="user",
             session_id=session_id,
         )
+    return runner
+
+
+async def run_agent_standard(
+    agent: BaseAgent,
+    user_request: str,
+    app_name: str,
+    session_id: str | None = None,
+    *,
+    run_config: RunConfig | None = None,
+) -> AsyncGenerator[tuple[Any, InMemoryRunner | None, str]]:
+    """Handle runner setup and event loop.
+
+    Yields (event, runner, session_id). Stateless runs (no session_id) of
+    patterns listed in RESPONSE_CACHE_PATTERNS are served from the response
+    cache when possible, in which case the runner is None. Live runs hold a
+    slot from the global LLM scheduler until they finish. Pass a run_config
+    with StreamingMode.SSE to receive partial events while the model writes.
+    """
+    pattern_id = get_current_pattern(app_name)
+    with tracer.start_as_current_span(
+        f"agent_run {agent.name}",
+        attributes={"pattern": pattern_id, "agent.name": agent.name},
+    ) as span:
+        cache_key = None
+        if not session_id and _response_cache_enabled(pattern_id):
+            # Streamed runs also record partial events, so are cached apart
+            streaming = run_config.streaming_mode if run_config else None
+            cache_key = run_cache_key(agent, user_request, variant=str(streaming))
+            cached_events = _RESPONSE_CACHE.get(cache_key)
+            if cached_events is not None:
+                span.set_attribute("cache_hit", value=True)
+                AGENT_RUNS.inc(pattern=pattern_id, agent=agent.name)
+                AGENT_CACHE_HITS.inc(pattern=pattern_id, agent=agent.name)
+                session_id = str(uuid.uuid4())
+                for event in cached_events:
+                    yield event.model_copy(deep=True), None, session_id
+                return
+
+        # Use provided session_id (from frontend) or generate one (for stateless demos)
+        if not session_id:
+            session_id = str(uuid.uuid4())
+
+        runner = await _session_runner(agent, app_name, session_id)
+
+        recorded_events = []
+        async with _LLM_SCHEDULER.slot(pattern_id):
+            observer = _RunObserver(pattern_id, agent.name)
+            try:
+                async for event in runner.run_async(
+                    user_id="user",
+                    session_id=session_id,
+                    new_message=Content(parts=[Part(text=user_request)]),
+                    run_config=run_config,
+                ):
+                    observer.observe(event)
+                    if cache_key:
+                        recorded_events.append(event.model_copy(deep=True))
+                    yield event, runner, session_id
+            except Exception:
+                observer.finish(failed=True)
+                raise
+            except (asyncio.CancelledError, GeneratorExit):
+                observer.finish(cancelled=True)
+                raise
+            observer.finish()
+
+        # Only complete runs are cached so a replay never ends early
+        if cache_key:
+            _RESPONSE_CACHE.put(cache_key, recorded_events)
+
+
+async def cancel_tasks(tasks: Iterable[asyncio.Task[Any]]) -> None:
+    """Cancel the unfinished tasks spawned for a request and wait for them."""
+    pending = [task for task in tasks if not task.done()]
+    if not pending:
+        return
+    for task in pending:
+        task.cancel()
+    TASKS_CANCELLED.inc(len(pending), pattern=get_current_pattern("unknown"))
+    await asyncio.gather(*pending, return_exceptions=True)
 
-    async for event in runner.run_async(
-        user_id="user",
-        session_id=session_id,
-        new_message=Content(parts=[Part(text=user_request)]),
-    ):
-        yield event, runner, session_id
+
+class Overflow(StrEnum):
+    """What merge_streams does when its buffer is full."""
+
+    # Pause the producer until the consumer catches up
+    BLOCK = "block"
+    # Discard droppable items, evicting the oldest buffered one if needed
+    DROP = "drop"
+    # Fold the item into the newest buffered item from the same source
+    COALESCE = "coalesce"
+
+
+class _SourceEnd:
+    """Marks the end of one merged source, and its error if it failed."""
+
+    def __init__(self, error: Exception | None = None) -> None:
+        self.error = error
+
+
+class _MergeBuffer:
+    """Bounded buffer shared by the producers and consumer of merge_streams."""
+
+    def __init__(
+        self,
+        max_items: int,
+        overflow: Overflow,
+        droppable: Callable[[Any], bool],
+        coalesce: Callable[[Any, Any], Any],
+    ) -> None:
+        self.max_items = max(max_items, 1)
+        self.overflow = overflow
+        self.droppable = droppable
+        self.coalesce = coalesce
+        # (source index, item); end markers bypass the size limit
+        self.entries: deque[tuple[int, Any]] = deque()
+        self.changed = asyncio.Condition()
+        self.pattern_id = get_current_pattern("unknown")
+
+    def _make_room(self, source: int, item: Any) -> bool:  # noqa: ANN401
+        """Apply the overflow policy to a full buffer; True if item was handled."""
+        if self.overflow == Overflow.DROP:
+            if self.droppable(item):
+                STREAM_ITEMS_DROPPED.inc(pattern=self.pattern_id)
+                return True
+            for entry in self.entries:
+                if not isinstance(entry[1], _SourceEnd) and self.droppable(entry[1]):
+                    self.entries.remove(entry)
+                    self.entries.append((source, item))
+                    STREAM_ITEMS_DROPPED.inc(pattern=self.pattern_id)
+                    return True
+        elif self.overflow == Overflow.COALESCE:
+            for index in range(len(self.entries) - 1, -1, -1):
+                entry_source, previous = self.entries[index]
+                if entry_source != source:
+                    continue
+                if isinstance(previous, _SourceEnd):
+                    break
+                merged = self.coalesce(previous, item)
+                if merged is None:
+                    break
+                self.entries[index] = (source, merged)
+                STREAM_ITEMS_COALESCED.inc(pattern=self.pattern_id)
+                return True
+        return False
+
+    async def put(self, source: int, item: Any) -> None:  # noqa: ANN401
+        """Add an item, applying the overflow policy while the buffer is full."""
+        async with self.changed:
+            while len(self.entries) >= self.max_items:
+                if self._make_room(source, item):
+                    return
+                await self.changed.wait()
+            self.entries.append((source, item))
+            self.changed.notify_all()
+
+    async def close(self, source: int, error: Exception | None = None) -> None:
+        """Record the end of a source, with its error if it failed."""
+        async with self.changed:
+            self.entries.append((source, _SourceEnd(error)))
+            self.changed.notify_all()
+
+    async def get(self) -> tuple[int, Any]:
+        """Take the oldest entry, waiting for one if the buffer is empty."""
+        async with self.changed:
+            await self.changed.wait_for(lambda: self.entries)
+            entry = self.entries.popleft()
+            self.changed.notify_all()
+            return entry
+
+
+async def _pump_source(
+    index: int,
+    stream: AsyncIterator[Any],
+    buffer: _MergeBuffer,
+) -> None:
+    """Feed one source into the merge buffer."""
+    try:
+        async for item in stream:
+            await buffer.put(index, item)
+    except Exception as e:  # noqa: BLE001
+        await buffer.close(index, e)
+    else:
+        await buffer.close(index)
+    finally:
+        aclose = getattr(stream, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+async def _feed_sources(
+    streams: AsyncIterable[AsyncIterator[Any]],
+    buffer: _MergeBuffer,
+    tasks: list[asyncio.Task[None]],
+) -> None:
+    """Start merging each stream as soon as it is produced.
+
+    The feeder is source 0 of the merge; the streams it adds follow.
+    """
+    try:
+        async for stream in streams:
+            tasks.append(
+                asyncio.create_task(_pump_source(len(tasks), stream, buffer)),
+            )
+    except Exception as e:  # noqa: BLE001
+        await buffer.close(0, e)
+    else:
+        await buffer.close(0)
+    finally:
+        aclose = getattr(streams, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+async def merge_streams(
+    streams: Iterable[AsyncIterator[Any]] | AsyncIterable[AsyncIterator[Any]],
+    *,
+    max_buffer: int = STREAM_BUFFER_SIZE,
+    overflow: Overflow = Overflow.BLOCK,
+    droppable: Callable[[Any], bool] = lambda _: True,
+    coalesce: Callable[[Any, Any], Any] = lambda _previous, _item: None,
+) -> AsyncGenerator[Any]:
+    """Interleave several async streams through a bounded buffer.
+
+    Items are yielded in arrival order. When the consumer falls behind and
+    max_buffer items are waiting, the overflow policy decides what happens
+    to the next item: BLOCK pauses its producer; DROP discards it if
+    droppable(item) is true, otherwise evicts the oldest droppable buffered
+    item; COALESCE replaces the newest buffered item from the same source
+    with coalesce(previous, item), unless that returns None. When neither
+    applies, the producer blocks.
+
+    The first source to fail stops the others and its exception is raised
+    once the items buffered before it have been yielded. Closing or
+    cancelling the merged stream cancels every source.
+
+    Args:
+        streams: The async iterators to merge, or an async iterable producing
+            them, in which case each starts merging as soon as it is produced
+            and the merge ends once every produced stream has ended.
+        max_buffer: Maximum items waiting for the consumer.
+        overflow: Policy applied when the buffer is full.
+        droppable: Which items DROP may discard.
+        coalesce: Merges two items from one source, or returns None.
+
+    Yields:
+        Items from every stream, in the order they were produced.
+
+    """
+    buffer = _MergeBuffer(max_buffer, overflow, droppable, coalesce)
+    tasks: list[asyncio.Task[None]] = []
+    if isinstance(streams, AsyncIterable):
+        tasks.append(asyncio.create_task(_feed_sources(streams, buffer, tasks)))
+    else:
+        tasks.extend(
+            asyncio.create_task(_pump_source(index, stream, buffer))
+            for index, stream in enumerate(streams)
+        )
+    # Sources are only added before the feeder ends, so once every task
+    # started so far has ended, no more items can come
+    ended = 0
+    try:
+        while ended < len(tasks):
+            _, item = await buffer.get()
+            if not isinstance(item, _SourceEnd):
+                yield item
+            elif item.error is not None:
+                raise item.error
+            else:
+                ended += 1
+    finally:
+        await cancel_tasks(tasks)
+
+
+class EventStreamResponse(StreamingResponse):
+    """SSE response that stops its stream as soon as the client goes away.
+
+    Starlette only watches for disconnects on servers implementing ASGI spec
+    versions before 2.4; on newer ones a disconnect surfaces when the next
+    chunk fails to send, which can be long after the client left if an LLM
+    call is in progress. This response always listens for http.disconnect,
+    cancels the stream when it arrives and closes the generator, so the
+    tasks it spawned are cancelled with it.
+    """
+
+    media_type = "text/event-stream"
+
+    async def __call__(self, _scope: Scope, receive: Receive, send: Send) -> None:
+        """Stream the body until it ends or the client disconnects."""
+        pattern_id = get_current_pattern("unknown")
+        streamer = asyncio.create_task(self.stream_response(send))
+        listener = asyncio.create_task(self.listen_for_disconnect(receive))
+        try:
+            await asyncio.wait(
+                {streamer, listener},
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if streamer.done():
+                streamer.result()
+            else:
+                CLIENT_DISCONNECTS.inc(pattern=pattern_id)
+        except OSError:
+            # The server failed to send a chunk to a client that is gone
+            CLIENT_DISCONNECTS.inc(pattern=pattern_id)
+        finally:
+            for task in (streamer, listener):
+                task.cancel()
+            await asyncio.gather(streamer, listener, return_exceptions=True)
+            aclose = getattr(self.body_iterator, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+        if self.background is not None:
+            await self.background()
+
+
+async def instrument_stream(
+    pattern_id: str,
+    stream: AsyncGenerator[str],
+) -> AsyncGenerator[str]:
+    """Pass an SSE stream through while recording its request metrics."""
+    STREAM_REQUESTS.inc(pattern=pattern_id)
+    started = time.perf_counter()
+    first_event_seen = False
+    try:
+        async for chunk in stream:
+            if not first_event_seen:
+                first_event_seen = True
+                STREAM_FIRST_EVENT_SECONDS.observe(
+                    time.perf_counter() - started,
+                    pattern=pattern_id,
+                )
+            STREAM_EVENTS.inc(pattern=pattern_id)
+            yield chunk
+    except Exception:
+        STREAM_ERRORS.inc(pattern=pattern_id)
+        raise
+    finally:
+        STREAM_SECONDS.observe(time.perf_counter() - started, pattern=pattern_id)
 
 
 async def stream_agent_events(
@@ -195,6 +888,119 @@ async def run_and_collect_history(
     return history
 
 
+class _Flight:
+    """A single in-flight run shared by every identical concurrent request."""
+
+    def __init__(self) -> None:
+        self.chunks: list[Any] = []
+        self.done = False
+        self.error: BaseException | None = None
+        self.subscribers = 0
+        self.changed = asyncio.Condition()
+        self.task: asyncio.Task[None] | None = None
+
+
+# In-flight runs keyed by endpoint and request payload
+_IN_FLIGHT: dict[str, _Flight] = {}
+
+
+async def _pump_flight(
+    key: str,
+    flight: _Flight,
+    source: AsyncGenerator[Any],
+) -> None:
+    """Drain source into the flight buffer, waking subscribers on each chunk."""
+    try:
+        async for chunk in source:
+            async with flight.changed:
+                flight.chunks.append(chunk)
+                flight.changed.notify_all()
+    except Exception as e:  # noqa: BLE001
+        flight.error = e
+    finally:
+        # New requests start a fresh run; current subscribers keep the buffer
+        if _IN_FLIGHT.get(key) is flight:
+            del _IN_FLIGHT[key]
+        async with flight.changed:
+            flight.done = True
+            flight.changed.notify_all()
+
+
+async def coalesce_stream(
+    key: str,
+    factory: Callable[[], AsyncGenerator[Any]],
+) -> AsyncGenerator[Any]:
+    """Share one run of a stream between identical concurrent requests.
+
+    The first request for key starts factory() in the background; later
+    requests attach to it and first receive everything buffered so far. The
+    run is cancelled once every subscriber has gone away.
+
+    Args:
+        key: Identity of the request (endpoint plus payload).
+        factory: Creates the underlying stream for a new run.
+
+    Yields:
+        Every chunk produced by the shared run, in order.
+
+    """
+    if not REQUEST_COALESCING:
+        async for chunk in factory():
+            yield chunk
+        return
+
+    flight = _IN_FLIGHT.get(key)
+    if flight is None:
+        flight = _Flight()
+        _IN_FLIGHT[key] = flight
+        flight.task = asyncio.create_task(_pump_flight(key, flight, factory()))
+    else:
+        # The shared run's spans live in the trace of the request that started it
+        trace.get_current_span().add_event(
+            "coalesce.join",
+            {"key": key, "buffered_chunks": len(flight.chunks)},
+        )
+
+    flight.subscribers += 1
+    index = 0
+    try:
+        while True:
+            async with flight.changed:
+                await flight.changed.wait_for(
+                    lambda seen=index: seen < len(flight.chunks) or flight.done,
+                )
+                pending = flight.chunks[index:]
+                finished = flight.done
+            for chunk in pending:
+                yield chunk
+            index += len(pending)
+            if finished and index >= len(flight.chunks):
+                break
+        if flight.error:
+            raise flight.error
+    finally:
+        flight.subscribers -= 1
+        if flight.subscribers == 0 and flight.task:
+            # Detach first, so requests arriving during the cancellation
+            # start a fresh run instead of joining this one as it winds down
+            if _IN_FLIGHT.get(key) is flight:
+                del _IN_FLIGHT[key]
+            await cancel_tasks([flight.task])
+
+
+async def coalesce_call(key: str, factory: Callable[[], Awaitable[Any]]) -> Any:  # noqa: ANN401
+    """Share one awaited result between identical concurrent requests."""
+
+    async def _single() -> AsyncGenerator[Any]:
+        yield await factory()
+
+    stream = coalesce_stream(key, _single)
+    try:
+        return await anext(stream)
+    finally:
+        await stream.aclose()
+
+
 class PatternMetadata(BaseModel):
     """Metadata for a pattern."""
 
@@ -215,10 +1021,22 @@ class PatternConfig(BaseModel):
     base_file: str
     handler: Callable[[str], Awaitable[Any]] | None
     template_name: str
+    # Stateless patterns share one run between identical concurrent requests
+    coalesce_requests: bool = True
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
 
+async def _run_demo_handler(config: PatternConfig, prompt: str) -> Any:  # noqa: ANN401
+    """Run a pattern's demo handler, coalescing identical requests if allowed."""
+    handler = config.handler
+    if handler is None:
+        return None
+    if not config.coalesce_requests:
+        return await handler(prompt)
+    return await coalesce_call(f"/demo/{config.id}:{prompt}", lambda: handler(prompt))
+
+
 def configure_pattern(
     app: FastAPI,
     router: APIRouter,
@@ -283,12 +1101,12 @@ def configure_pattern(
     async def demo(request: Request, prompt: str = "") -> HTMLResponse:
         result = None
         if prompt and config.handler:
-            result = await config.handler(prompt)
+            result = await _run_demo_handler(config, prompt)
 
         return ctx.templates.TemplateResponse(
+            request,
             ctx.template_name,
             {
-                "request": request,
                 "prompt": prompt,
                 "result": result,
                 "code_files": ctx.get_code_files(),
@@ -302,8 +1120,8 @@ def configure_pattern(
             },
         )
 
-    # Include the router in the main app
-    app.include_router(router)
+    # Include the router in the main app, tagging its requests with the pattern id
+    app.include_router(router, dependencies=[Depends(_bind_pattern(config.id))])
 
     return PatternMetadata(
         id=config.id,
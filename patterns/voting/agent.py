@@ -1,9 +1,28 @@
 """Voting / Best-of-N Agent Pattern."""
 
 from google.adk.agents import LlmAgent
+from pydantic import BaseModel, Field
 
 from patterns.config import GEMINI_MODEL
 
+# --- Data Models ---
+
+
+class CopyBatch(BaseModel):
+    """Several ad copy options written in one model call."""
+
+    copies: list[str] = Field(
+        description="One ad copy per requested option, in the requested order",
+    )
+
+
+class MatchVerdict(BaseModel):
+    """The outcome of one tournament match between a few options."""
+
+    winner: int = Field(description="Number of the best option, starting at 1")
+    reason: str = Field(description="One sentence on why it won")
+
+
 # --- Generator Agents ---
 # We define three distinct agents to produce diverse outputs based on different
 # personas.
@@ -34,6 +53,24 @@ the user. Keep it under 50 words. Use strong calls to action and time-sensitive
 language.""",
 )
 
+# --- The Batch Generator Agent ---
+# In batched mode, this agent writes every option in a single model call.
+
+batch_generator_agent = LlmAgent(
+    name="BatchCopywriterAgent",
+    model=GEMINI_MODEL,
+    instruction="""You are a team of marketing copywriters.
+You will receive a product description and a numbered list of ad copy options
+to write, each with a style:
+- Humorous: witty, funny and memorable.
+- Professional: trustworthy and elegant, focused on value and reliability.
+- Urgent: excitement and FOMO, strong calls to action, time-sensitive language.
+
+Write one short, catchy ad copy per option, under 50 words each, in the
+requested order. Options sharing a style must take clearly different angles.""",
+    output_schema=CopyBatch,
+)
+
 # --- The Judge Agent ---
 # This agent evaluates the options and picks the winner.
 
@@ -54,3 +91,17 @@ Output Format:
 **Final Polish:** [The text of the winning copy, potentially slightly improved]
 """,
 )
+
+# --- The Match Judge Agent ---
+# In tournament mode, this agent judges small brackets of options in parallel;
+# the winners advance until the Judge Agent decides the final.
+
+match_judge_agent = LlmAgent(
+    name="MatchJudgeAgent",
+    model=GEMINI_MODEL,
+    instruction="""You are an Editor judging one match of an ad copy contest.
+You will receive a few numbered ad copy options for a product.
+Evaluate them based on clarity, catchiness, and persuasion, and pick the single
+best one.""",
+    output_schema=MatchVerdict,
+)
@@ -1,13 +1,26 @@
 """Tests for the Voting Pattern."""
 
+import json
+from collections.abc import AsyncGenerator
+from typing import Any
+from unittest.mock import MagicMock, patch
+
 import pytest
+from google.adk.agents import BaseAgent, LlmAgent
 
 from patterns.voting.agent import (
+    batch_generator_agent,
     humorous_agent,
     judge_agent,
+    match_judge_agent,
     professional_agent,
     urgent_agent,
 )
+from patterns.voting.ui import (
+    plan_candidates,
+    run_batched_stream,
+    stream_voting_generator,
+)
 
 
 @pytest.mark.asyncio
@@ -29,3 +42,192 @@ async def test_instructions_exist() -> None:
     assert professional_agent.instruction, "Professional agent missing instruction"
     assert urgent_agent.instruction, "Urgent agent missing instruction"
     assert judge_agent.instruction, "Judge agent missing instruction"
+
+
+def test_plan_candidates() -> None:
+    """Samples are interleaved over personas, extra samples get numbered keys."""
+    candidates = plan_candidates(2)
+    assert [c.key for c in candidates] == [
+        "humorous",
+        "professional",
+        "urgent",
+        "humorous-2",
+        "professional-2",
+        "urgent-2",
+    ]
+    assert candidates[3].label == "Humorous Style #2"
+    # Extra samples vary the sampling of the persona's agent
+    assert candidates[0].agent is humorous_agent
+    sample = candidates[3].agent
+    assert isinstance(sample, LlmAgent)
+    assert sample.instruction == humorous_agent.instruction
+    assert sample.generate_content_config is not None
+    assert sample.generate_content_config.seed == 2  # noqa: PLR2004
+    assert plan_candidates(2)[3].agent is sample
+
+
+@pytest.mark.asyncio
+async def test_tournament_judging() -> None:
+    """Brackets are judged in rounds until a small final reaches the judge."""
+    prompts: dict[str, list[str]] = {}
+
+    async def mock_run_agent_standard(
+        agent: BaseAgent,
+        prompt: str,
+        app_name: str,
+    ) -> AsyncGenerator[tuple[Any, Any, Any], None]:
+        prompts.setdefault(agent.name, []).append(prompt)
+        if agent == match_judge_agent:
+            text = json.dumps({"winner": 2, "reason": "Catchier"})
+        else:
+            text = f"Copy of {app_name}"
+        event = MagicMock()
+        event.is_final_response.return_value = True
+        event.content.parts = [MagicMock(text=text)]
+        yield event, None, None
+
+    with patch(
+        "patterns.voting.ui.run_agent_standard",
+        side_effect=mock_run_agent_standard,
+    ):
+        items = [
+            json.loads(chunk.removeprefix("data: "))
+            async for chunk in stream_voting_generator(
+                "A mug",
+                samples_per_persona=2,
+                max_concurrency=2,
+                judge_mode="tournament",
+                bracket_size=2,
+            )
+        ]
+
+    matches = [item for item in items if item["type"] == "match"]
+    # Round 1: three pairs; round 2: one pair and a bye
+    assert [m["round"] for m in matches] == [1, 1, 1, 2, 2]
+    assert [m["winner"] for m in matches[:3]] == [
+        "professional",
+        "humorous-2",
+        "urgent-2",
+    ]
+    assert len(prompts[match_judge_agent.name]) == 4  # noqa: PLR2004
+    assert all("Option 3" not in p for p in prompts[match_judge_agent.name])
+    (final_prompt,) = prompts[judge_agent.name]
+    assert "Option 2 (Urgent Style #2)" in final_prompt
+    assert "Option 3" not in final_prompt
+    assert items[-1] == {"type": "complete"}
+
+
+@pytest.mark.asyncio
+async def test_batched_generation() -> None:
+    """One model call writes every candidate, streamed to each card."""
+    calls: list[str] = []
+
+    async def mock_run_agent_standard(
+        agent: BaseAgent,
+        _prompt: str,
+        _app_name: str,
+        **_kwargs: object,
+    ) -> AsyncGenerator[tuple[Any, Any, Any], None]:
+        calls.append(agent.name)
+        text = (
+            json.dumps({"copies": ["Ha", "Trust", "Now"]})
+            if agent == batch_generator_agent
+            else "Winner"
+        )
+        event = MagicMock()
+        event.is_final_response.return_value = True
+        event.content.parts = [MagicMock(text=text)]
+        yield event, None, None
+
+    with patch(
+        "patterns.voting.ui.run_agent_standard",
+        side_effect=mock_run_agent_standard,
+    ):
+        items = [
+            json.loads(chunk.removeprefix("data: "))
+            async for chunk in stream_voting_generator("A mug", generation="batched")
+        ]
+
+    steps = {item["agent"]: item["content"] for item in items if item["type"] == "step"}
+    assert steps == {
+        "humorous": "Ha",
+        "professional": "Trust",
+        "urgent": "Now",
+        "judge": "Winner",
+    }
+    assert calls == [batch_generator_agent.name, judge_agent.name]
+
+
+@pytest.mark.asyncio
+async def test_batched_generation_streams_each_copy() -> None:
+    """Each card's copy is yielded as soon as its array element is complete."""
+    chunks = ['```json\n{"copies": ["Ha", ', '"Trust", "No', 'w"]}\n```']
+    sent: list[str] = []
+
+    async def mock_run_agent_standard(
+        _agent: BaseAgent,
+        _prompt: str,
+        _app_name: str,
+        **_kwargs: object,
+    ) -> AsyncGenerator[tuple[Any, Any, Any], None]:
+        for chunk in chunks:
+            sent.append(chunk)
+            event = MagicMock()
+            event.is_final_response.return_value = False
+            event.content.parts = [MagicMock(text=chunk)]
+            yield event, None, None
+        final = MagicMock()
+        final.is_final_response.return_value = True
+        final.content.parts = [MagicMock(text="".join(chunks))]
+        yield final, None, None
+
+    with patch(
+        "patterns.voting.ui.run_agent_standard",
+        side_effect=mock_run_agent_standard,
+    ):
+        received = [
+            (item["agent"], item["content"], len(sent))
+            async for item in run_batched_stream(plan_candidates(1), "A mug")
+        ]
+
+    assert received == [
+        ("humorous", "Ha", 1),
+        ("professional", "Trust", 2),
+        ("urgent", "Now", 3),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_identical_candidates_skip_the_judge() -> None:
+    """When every candidate converges, the judge is not called."""
+    calls: list[str] = []
+
+    async def mock_run_agent_standard(
+        agent: BaseAgent,
+        _prompt: str,
+        _app_name: str,
+    ) -> AsyncGenerator[tuple[Any, Any, Any], None]:
+        calls.append(agent.name)
+        event = MagicMock()
+        event.content.parts = [MagicMock(text="The mug that keeps coffee hot.")]
+        yield event, None, None
+
+    with patch(
+        "patterns.voting.ui.run_agent_standard",
+        side_effect=mock_run_agent_standard,
+    ):
+        items = [
+            json.loads(chunk.removeprefix("data: "))
+            async for chunk in stream_voting_generator("A mug")
+        ]
+
+    assert judge_agent.name not in calls
+    duplicates = next(item for item in items if item["type"] == "duplicates")
+    assert duplicates == {
+        "type": "duplicates",
+        "kept": "humorous",
+        "merged": ["professional", "urgent"],
+    }
+    verdict = next(item for item in items if item.get("agent") == "judge")
+    assert "**Winner:** Humorous Style" in verdict["content"]
+    assert items[-1] == {"type": "complete"}
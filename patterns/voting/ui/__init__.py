@@ -2,150 +2,499 @@
 
 import asyncio
 import json
+import logging
 from collections.abc import AsyncGenerator
+from contextlib import aclosing
+from dataclasses import dataclass
+from functools import cache
 from typing import Any
 
 from fastapi import APIRouter, FastAPI
-from fastapi.responses import StreamingResponse
-from google.adk.agents import BaseAgent
+from google.adk.agents import BaseAgent, RunConfig
+from google.adk.agents.run_config import StreamingMode
+from google.genai.types import GenerateContentConfig
 
+from patterns.config import (
+    HEDGE_MIN_SAMPLES,
+    HEDGE_PERCENTILE,
+    VOTING_BRACKET_SIZE,
+    VOTING_DEDUP_THRESHOLD,
+    VOTING_GENERATION,
+    VOTING_JUDGE_MODE,
+    VOTING_MAX_CONCURRENCY,
+    VOTING_SAMPLES_PER_PERSONA,
+)
+from patterns.hedging import LatencyTracker, hedged_stream
+from patterns.metrics import Counter
+from patterns.similarity import group_near_duplicates
+from patterns.tracing import tracer
 from patterns.utils import (
+    EventStreamResponse,
+    IncrementalJsonParser,
+    Overflow,
     PatternConfig,
     PatternMetadata,
+    coalesce_stream,
     configure_pattern,
+    instrument_stream,
+    merge_streams,
+    parse_json_from_text,
     run_agent_standard,
 )
 from patterns.voting.agent import (
+    batch_generator_agent,
     humorous_agent,
     judge_agent,
+    match_judge_agent,
     professional_agent,
     urgent_agent,
 )
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
+# Candidate personas: display label and generator agent, by key
+PERSONAS: dict[str, tuple[str, BaseAgent]] = {
+    "humorous": ("Humorous", humorous_agent),
+    "professional": ("Professional", professional_agent),
+    "urgent": ("Urgent", urgent_agent),
+}
+
+DUPLICATES_MERGED = Counter(
+    "adp_voting_duplicates_merged_total",
+    "Voting candidates merged into a near-duplicate before judging.",
+)
+JUDGE_SKIPS = Counter(
+    "adp_voting_judge_skips_total",
+    "Voting requests decided without a judge call, as one distinct candidate was left.",
+)
+
+# Temperature added per extra sample of a persona, on top of the default 1.0
+_SAMPLE_TEMPERATURE_STEP = 0.2
+
+# First-event latency history of each persona, used to hedge stragglers
+_CANDIDATE_LATENCY = LatencyTracker(HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES)
+
+# The batch generator streams its output so each card fills in as it is written
+_STREAMING = RunConfig(streaming_mode=StreamingMode.SSE)
+
+
+@dataclass(frozen=True)
+class Candidate:
+    """One ad copy to generate: a sample of a persona."""
 
-async def run_single_agent_to_queue(
+    key: str
+    label: str
+    persona: str
+    agent: BaseAgent
+
+
+async def run_single_agent_stream(
     agent: BaseAgent,
     prompt: str,
     session_suffix: str,
-    queue: asyncio.Queue,
     key: str,
-) -> str:
-    """Run an agent and put its tokens into a queue. Return full text."""
-    full_text = ""
+) -> AsyncGenerator[dict[str, str]]:
+    """Run an agent and stream its tokens as step events."""
     # We use a unique app_name/session for each to ensure isolation
+    with tracer.start_as_current_span(
+        "voting.candidate",
+        attributes={"candidate": key},
+    ):
+        async for event, _, _ in run_agent_standard(
+            agent,
+            prompt,
+            f"voting_{session_suffix}",
+        ):
+            if event.content and event.content.parts:
+                part_text = event.content.parts[0].text
+                if part_text:
+                    yield {"type": "step", "agent": key, "content": part_text}
+
+
+def _merge_steps(
+    previous: dict[str, str],
+    item: dict[str, str],
+) -> dict[str, str] | None:
+    """Fold two consecutive steps of one candidate into a single step."""
+    if previous["type"] == item["type"] == "step":
+        return {**previous, "content": previous["content"] + item["content"]}
+    return None
+
+
+@cache
+def _sample_agent(persona: str, sample: int) -> BaseAgent:
+    """Return the generator of one sample of a persona.
+
+    The first sample is the persona's agent itself. Later ones are clones
+    with their own seed and a higher temperature, so that they differ.
+    """
+    agent = PERSONAS[persona][1]
+    if sample == 1:
+        return agent
+    return agent.clone(
+        update={
+            "name": f"{agent.name}_{sample}",
+            "generate_content_config": GenerateContentConfig(
+                temperature=min(1 + _SAMPLE_TEMPERATURE_STEP * (sample - 1), 2),
+                seed=sample,
+            ),
+        },
+    )
+
+
+def plan_candidates(samples_per_persona: int) -> list[Candidate]:
+    """List the candidates to generate: every persona, samples times.
+
+    Samples are ordered round-robin over the personas, so that under a
+    concurrency cap the first candidates to run cover every style. The
+    first sample of a persona is keyed by the persona itself.
+    """
+    return [
+        Candidate(
+            key=persona if sample == 1 else f"{persona}-{sample}",
+            label=f"{label} Style" if sample == 1 else f"{label} Style #{sample}",
+            persona=persona,
+            agent=_sample_agent(persona, sample),
+        )
+        for sample in range(1, max(samples_per_persona, 1) + 1)
+        for persona, (label, _) in PERSONAS.items()
+    ]
+
+
+async def _bounded(
+    semaphore: asyncio.Semaphore,
+    stream: AsyncGenerator[dict[str, str]],
+) -> AsyncGenerator[dict[str, str]]:
+    """Start stream only once the semaphore has a free slot."""
+    async with semaphore, aclosing(stream):
+        async for item in stream:
+            yield item
+
+
+async def _batch_copies(prompt: str) -> AsyncGenerator[Any]:
+    """Run the batch generator, yielding each copy as soon as it is complete."""
+    parser = IncrementalJsonParser()
+    final_text = ""
+    streamed = 0
     async for event, _, _ in run_agent_standard(
-        agent,
+        batch_generator_agent,
         prompt,
-        f"voting_{session_suffix}",
+        "voting_batch",
+        run_config=_STREAMING,
     ):
-        if event.content and event.content.parts:
-            part_text = event.content.parts[0].text
-            if part_text:
-                full_text += part_text
-                await queue.put({"type": "step", "agent": key, "content": part_text})
-    return full_text
-
-
-async def stream_voting_generator(user_request: str) -> AsyncGenerator[str, None]:
-    """Yield SSE events for the parallel voting process."""
-    queue: asyncio.Queue[dict[str, str] | None] = asyncio.Queue()
-
-    # 1. Start parallel generators
-    # We use asyncio.create_task to run them in background
-    tasks = [
-        asyncio.create_task(
-            run_single_agent_to_queue(
-                humorous_agent,
-                user_request,
-                "humorous",
-                queue,
-                "humorous",
-            ),
-        ),
-        asyncio.create_task(
-            run_single_agent_to_queue(
-                professional_agent,
-                user_request,
-                "professional",
-                queue,
-                "professional",
-            ),
-        ),
-        asyncio.create_task(
-            run_single_agent_to_queue(
-                urgent_agent,
-                user_request,
-                "urgent",
-                queue,
-                "urgent",
+        if not (event.content and event.content.parts):
+            continue
+        text = "".join(p.text for p in event.content.parts if p.text)
+        chunk = text
+        if event.is_final_response():
+            # The final event repeats the whole text; feed what partial
+            # events did not (all of it when the model did not stream)
+            final_text = text
+            chunk = text[len(parser.text) :] if text.startswith(parser.text) else ""
+        for field, copy in parser.feed(chunk):
+            if field == "copies":
+                streamed += 1
+                yield copy
+
+    # Copies the incremental parse missed, in a response it could not follow
+    batch = parse_json_from_text(final_text or parser.text)
+    copies = batch.get("copies") if isinstance(batch, dict) else None
+    if isinstance(copies, list):
+        for copy in copies[streamed:]:
+            yield copy
+
+
+async def run_batched_stream(
+    candidates: list[Candidate],
+    user_request: str,
+) -> AsyncGenerator[dict[str, str]]:
+    """Write every candidate in one model call and stream them as steps.
+
+    The batch's JSON is parsed as it streams, so each candidate's step is
+    yielded as soon as its copy is complete.
+    """
+    options = "\n".join(
+        f"{number}. {candidate.label}"
+        for number, candidate in enumerate(candidates, start=1)
+    )
+    prompt = f"Product Description: {user_request}\n\nOptions to write:\n{options}"
+    written = 0
+    with tracer.start_as_current_span(
+        "voting.batch",
+        attributes={"candidates": len(candidates)},
+    ):
+        async with aclosing(_batch_copies(prompt)) as copies:
+            async for copy in copies:
+                if written < len(candidates) and isinstance(copy, str) and copy:
+                    candidate = candidates[written]
+                    yield {"type": "step", "agent": candidate.key, "content": copy}
+                written += 1
+
+    if written < len(candidates):
+        logger.warning("Batch wrote %d of %d candidates", written, len(candidates))
+
+
+def _generate_candidates(
+    candidates: list[Candidate],
+    user_request: str,
+    generation: str,
+    max_concurrency: int,
+) -> AsyncGenerator[dict[str, str]]:
+    """Stream the step events of every candidate.
+
+    Separate runs go in parallel, at most max_concurrency at a time, merging
+    their token streams. When the client falls behind, buffered tokens of a
+    candidate are concatenated, so nothing is lost and the buffer stays
+    bounded. A run that is slow to respond is raced against a duplicate.
+    """
+    if generation == "batched":
+        return hedged_stream(
+            lambda: run_batched_stream(candidates, user_request),
+            _CANDIDATE_LATENCY,
+            "batch",
+        )
+
+    semaphore = asyncio.Semaphore(max(max_concurrency, 1))
+    streams = [
+        _bounded(
+            semaphore,
+            hedged_stream(
+                lambda c=c: run_single_agent_stream(
+                    c.agent,
+                    user_request,
+                    c.key,
+                    c.key,
+                ),
+                _CANDIDATE_LATENCY,
+                c.persona,
             ),
-        ),
+        )
+        for c in candidates
     ]
+    return merge_streams(streams, overflow=Overflow.COALESCE, coalesce=_merge_steps)
+
 
-    async def producer_manager() -> None:
-        """Wait for all tasks to complete and signal done."""
-        try:
-            await asyncio.gather(*tasks)
-        finally:
-            await queue.put(None)  # Sentinel
-
-    # Start manager in background
-    _manager_task = asyncio.create_task(producer_manager())
-
-    try:
-        # 2. Consume queue until sentinel
-        while True:
-            item = await queue.get()
-            if item is None:
-                break
+def _judge_prompt(
+    user_request: str,
+    options: list[Candidate],
+    texts: dict[str, str],
+    task: str,
+) -> str:
+    """Build a judge prompt listing the given options with their texts."""
+    sections = [f"Original Product Description: {user_request}\n"]
+    sections.extend(
+        f"Option {number} ({option.label}):\n{texts[option.key]}\n"
+        for number, option in enumerate(options, start=1)
+    )
+    sections.append(task)
+    return "\n---\n".join(sections)
+
+
+async def _judge_match(
+    user_request: str,
+    bracket: list[Candidate],
+    texts: dict[str, str],
+) -> Candidate:
+    """Pick the winner of one tournament match; a lone entrant gets a bye."""
+    if len(bracket) == 1:
+        return bracket[0]
+    prompt = _judge_prompt(
+        user_request,
+        bracket,
+        texts,
+        "Decide which option wins this match.",
+    )
+    verdict = None
+    with tracer.start_as_current_span(
+        "voting.match",
+        attributes={"candidates": [c.key for c in bracket]},
+    ):
+        async for event, _, _ in run_agent_standard(
+            match_judge_agent,
+            prompt,
+            "voting_match",
+        ):
+            if event.is_final_response() and event.content and event.content.parts:
+                # When output_schema is used, the final event's text is the JSON
+                text = "".join(p.text for p in event.content.parts if p.text)
+                if text:
+                    verdict = parse_json_from_text(text)
+
+    winner = verdict.get("winner") if isinstance(verdict, dict) else None
+    if not isinstance(winner, int) or not 1 <= winner <= len(bracket):
+        # An unusable verdict must not stall the tournament
+        logger.warning("Invalid match verdict %r, advancing option 1", verdict)
+        winner = 1
+    return bracket[winner - 1]
+
+
+async def _play_round(
+    user_request: str,
+    entrants: list[Candidate],
+    texts: dict[str, str],
+    bracket_size: int,
+) -> list[tuple[list[Candidate], Candidate]]:
+    """Judge every match of one tournament round in parallel."""
+    brackets = [
+        entrants[i : i + bracket_size] for i in range(0, len(entrants), bracket_size)
+    ]
+    async with asyncio.TaskGroup() as group:
+        matches = [
+            group.create_task(_judge_match(user_request, bracket, texts))
+            for bracket in brackets
+        ]
+    return [(b, m.result()) for b, m in zip(brackets, matches, strict=True)]
+
+
+def _collapse_duplicates(
+    candidates: list[Candidate],
+    texts: dict[str, str],
+    threshold: float,
+) -> tuple[list[Candidate], list[dict[str, Any]]]:
+    """Keep one candidate per group of near-duplicate texts.
+
+    Returns:
+        The kept candidates, and a "duplicates" event per merged group.
+
+    """
+    by_key = {c.key: c for c in candidates}
+    with tracer.start_as_current_span(
+        "voting.dedup",
+        attributes={"candidates": len(candidates)},
+    ) as span:
+        groups = group_near_duplicates(
+            {c.key: texts[c.key] for c in candidates},
+            threshold,
+        )
+        span.set_attribute("distinct", len(groups))
+
+    events = []
+    for kept, *duplicates in groups:
+        if duplicates:
+            DUPLICATES_MERGED.inc(len(duplicates))
+            events.append({"type": "duplicates", "kept": kept, "merged": duplicates})
+    return [by_key[kept] for kept, *_ in groups], events
+
+
+async def stream_voting_generator(  # noqa: PLR0913
+    user_request: str,
+    *,
+    samples_per_persona: int = VOTING_SAMPLES_PER_PERSONA,
+    max_concurrency: int = VOTING_MAX_CONCURRENCY,
+    generation: str = VOTING_GENERATION,
+    judge_mode: str = VOTING_JUDGE_MODE,
+    bracket_size: int = VOTING_BRACKET_SIZE,
+    dedup_threshold: float = VOTING_DEDUP_THRESHOLD,
+) -> AsyncGenerator[str, None]:
+    """Yield SSE events for the parallel voting process.
+
+    Args:
+        user_request: The product description to write ad copy for.
+        samples_per_persona: Candidates generated per persona.
+        max_concurrency: Candidates generated at the same time.
+        generation: "separate" to run one agent per candidate, or "batched"
+            to write every candidate in a single model call.
+        judge_mode: "single" to judge all candidates in one prompt, or
+            "tournament" to judge small brackets in parallel rounds until a
+            final of at most bracket_size candidates remains.
+        bracket_size: Candidates per tournament match.
+        dedup_threshold: Estimated similarity from which candidates are
+            merged before judging; 0 disables merging.
+
+    """
+    candidates = plan_candidates(samples_per_persona)
+    texts = {c.key: "" for c in candidates}
+
+    # 1. Generate the candidates, streaming each one's steps as they arrive
+    async with aclosing(
+        _generate_candidates(candidates, user_request, generation, max_concurrency),
+    ) as events:
+        async for item in events:
+            texts[item["agent"]] += item["content"]
             yield f"data: {json.dumps(item)}\n\n"
-            queue.task_done()
-    finally:
-        _manager_task.cancel()
-
-    # 3. Retrieve results from tasks (they are already done)
-    results = await asyncio.gather(*tasks)
-    humorous_text, professional_text, urgent_text = results
-
-    # 4. Construct judge prompt
-    judge_prompt = f"""Original Product Description: {user_request}
-
----
-Option 1 (Humorous Style):
-{humorous_text}
-
----
-Option 2 (Professional Style):
-{professional_text}
-
----
-Option 3 (Urgent Style):
-{urgent_text}
-
----
-Decide which option is best for a general audience."""
-
-    # 5. Stream judge decision
-    async for event, _, _ in run_agent_standard(judge_agent, judge_prompt, "judge"):
-        if event.content and event.content.parts:
-            part_text = event.content.parts[0].text
-            if part_text:
-                data = json.dumps(
-                    {"type": "step", "agent": "judge", "content": part_text},
-                )
-                yield f"data: {data}\n\n"
+
+    finalists = [c for c in candidates if texts[c.key]]
+    if not finalists:
+        error_msg = json.dumps(
+            {"type": "error", "message": "Failed to generate candidates."},
+        )
+        yield f"data: {error_msg}\n\n"
+        yield f"data: {json.dumps({'type': 'complete'})}\n\n"
+        return
+
+    # 2. Near-duplicates need not be judged twice; a lone distinct candidate
+    # wins without a judge call
+    finalists, merged = _collapse_duplicates(finalists, texts, dedup_threshold)
+    for event in merged:
+        yield f"data: {json.dumps(event)}\n\n"
+    if len(finalists) == 1:
+        JUDGE_SKIPS.inc()
+        (winner,) = finalists
+        verdict = (
+            f"**Winner:** {winner.label}\n"
+            "**Reason:** It was the only distinct candidate, so no judging was "
+            "needed.\n"
+            f"**Final Polish:** {texts[winner.key]}"
+        )
+        data = json.dumps({"type": "step", "agent": "judge", "content": verdict})
+        yield f"data: {data}\n\n"
+        yield f"data: {json.dumps({'type': 'complete'})}\n\n"
+        return
+
+    # 3. In tournament mode, winners of parallel matches advance until the
+    # final is small enough for a single judge prompt
+    bracket_size = max(bracket_size, 2)
+    round_number = 0
+    while judge_mode == "tournament" and len(finalists) > bracket_size:
+        round_number += 1
+        with tracer.start_as_current_span(
+            "voting.round",
+            attributes={"round": round_number, "entrants": len(finalists)},
+        ):
+            results = await _play_round(user_request, finalists, texts, bracket_size)
+        for bracket, winner in results:
+            match = {
+                "type": "match",
+                "round": round_number,
+                "candidates": [c.key for c in bracket],
+                "winner": winner.key,
+            }
+            yield f"data: {json.dumps(match)}\n\n"
+        finalists = [winner for _, winner in results]
+
+    # 4. Stream judge decision
+    judge_prompt = _judge_prompt(
+        user_request,
+        finalists,
+        texts,
+        "Decide which option is best for a general audience.",
+    )
+    with tracer.start_as_current_span("voting.judge"):
+        async for event, _, _ in run_agent_standard(judge_agent, judge_prompt, "judge"):
+            if event.content and event.content.parts:
+                part_text = event.content.parts[0].text
+                if part_text:
+                    data = json.dumps(
+                        {"type": "step", "agent": "judge", "content": part_text},
+                    )
+                    yield f"data: {data}\n\n"
 
     yield f"data: {json.dumps({'type': 'complete'})}\n\n"
 
 
 @router.get("/stream_voting")
-async def stream_voting(prompt: str) -> StreamingResponse:
+async def stream_voting(prompt: str) -> EventStreamResponse:
     """Stream the voting agent's execution."""
-    return StreamingResponse(
-        stream_voting_generator(prompt),
-        media_type="text/event-stream",
+    return EventStreamResponse(
+        instrument_stream(
+            "voting",
+            coalesce_stream(
+                f"/stream_voting:{prompt}",
+                lambda: stream_voting_generator(prompt),
+            ),
+        ),
     )
 
 
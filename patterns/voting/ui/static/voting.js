@@ -14,6 +14,24 @@ document.addEventListener("DOMContentLoaded", () => {
 		urgent: document.getElementById("result-urgent"),
 		judge: document.getElementById("result-judge"),
 	};
+	const grid = document.querySelector(".voting-results-grid");
+	const rounds = document.getElementById("tournament-rounds");
+
+	// Extra samples of a persona (e.g. "humorous-2") get their own card
+	const getOutput = (agent) => {
+		if (outputs[agent] || !grid) return outputs[agent];
+		const [persona, sample] = agent.split("-");
+		const card = document.createElement("div");
+		card.className = `result-card result-card-${persona} result-card-extra`;
+		const title = document.createElement("h3");
+		title.textContent = `${persona.charAt(0).toUpperCase()}${persona.slice(1)} #${sample}`;
+		const content = document.createElement("div");
+		content.className = "content";
+		card.append(title, content);
+		grid.appendChild(card);
+		outputs[agent] = content;
+		return content;
+	};
 
 	if (form) {
 		form.addEventListener("submit", async (e) => {
@@ -29,18 +47,28 @@ document.addEventListener("DOMContentLoaded", () => {
 			const judgeSection = document.getElementById("judge-section");
 			if (judgeSection) judgeSection.style.display = "none";
 
+			for (const card of document.querySelectorAll(".result-card-extra")) {
+				card.remove();
+			}
+			for (const card of document.querySelectorAll(".result-card-duplicate")) {
+				card.classList.remove("result-card-duplicate");
+				card.removeAttribute("title");
+			}
 			for (const key in outputs) {
-				if (outputs[key]) outputs[key].innerHTML = "";
+				if (outputs[key]?.closest(".result-card-extra")) {
+					delete outputs[key];
+				} else if (outputs[key]) {
+					outputs[key].innerHTML = "";
+				}
+			}
+			if (rounds) {
+				rounds.innerHTML = "";
+				rounds.style.display = "none";
 			}
 			if (submitBtn) submitBtn.disabled = true;
 
 			// Initialize state for this run
-			const accumulatedState = {
-				humorous: "",
-				professional: "",
-				urgent: "",
-				judge: "",
-			};
+			const accumulatedState = {};
 
 			const resetSubmitButton = () => {
 				if (submitBtn) {
@@ -55,29 +83,47 @@ document.addEventListener("DOMContentLoaded", () => {
 				`/stream_voting?prompt=${encodeURIComponent(prompt)}`,
 				(data) => {
 					// onMessage
-					if (data.type === "step") {
-						const agent = data.agent; // humorous, professional, urgent, judge
-						if (outputs[agent]) {
+					if (data.type === "match") {
+						// Tournament judging: one line per match, before the final
+						if (judgeSection) judgeSection.style.display = "block";
+						if (rounds) {
+							rounds.style.display = "block";
+							const line = document.createElement("li");
+							line.textContent = `Round ${data.round}: ${data.candidates.join(" vs ")} → ${data.winner}`;
+							rounds.appendChild(line);
+						}
+					} else if (data.type === "duplicates") {
+						// Near-duplicates are merged into the kept card before judging
+						for (const key of data.merged) {
+							const card = outputs[key]?.closest(".result-card");
+							if (card) {
+								card.classList.add("result-card-duplicate");
+								card.title = `Near-duplicate of ${data.kept}`;
+							}
+						}
+					} else if (data.type === "step") {
+						const agent = data.agent; // humorous, professional, urgent (-n), judge
+						const output = getOutput(agent);
+						if (output) {
 							// Reveal judge section when first token arrives
 							if (agent === "judge" && judgeSection) {
 								judgeSection.style.display = "block";
 							}
 
-							if (accumulatedState[agent] !== undefined) {
-								accumulatedState[agent] += data.content;
-								const currentContent = accumulatedState[agent];
+							accumulatedState[agent] =
+								(accumulatedState[agent] || "") + data.content;
+							const currentContent = accumulatedState[agent];
 
-								if (
-									typeof marked !== "undefined" &&
-									typeof DOMPurify !== "undefined"
-								) {
-									outputs[agent].innerHTML = DOMPurify.sanitize(
-										marked.parse(currentContent),
-									);
-								} else {
-									// Fallback to plain text for security if libraries are missing.
-									outputs[agent].textContent = currentContent;
-								}
+							if (
+								typeof marked !== "undefined" &&
+								typeof DOMPurify !== "undefined"
+							) {
+								output.innerHTML = DOMPurify.sanitize(
+									marked.parse(currentContent),
+								);
+							} else {
+								// Fallback to plain text for security if libraries are missing.
+								output.textContent = currentContent;
 							}
 						}
 					}